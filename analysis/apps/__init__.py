@@ -1,9 +1,12 @@
 "App analysis utilities."
 
+from .inventory import build_inventory, get_inventory
 from .list_installed_apps import categorize_installed_apps
 from .social_media_detector import detect_social_media_apps
 
 __all__ = [
+    "build_inventory",
+    "get_inventory",
     "categorize_installed_apps",
     "detect_social_media_apps",
 ]
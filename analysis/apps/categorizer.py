@@ -0,0 +1,95 @@
+# filename: analysis/apps/categorizer.py
+"""Single-pass package categorizer built on the shared pattern matcher."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Set
+
+from utils.pattern_matcher import PatternMatcher
+
+# Categories assigned after every rule, in priority order.
+FALLBACK_CATEGORIES = ("user", "system", "uncategorized")
+
+
+@dataclass
+class CategoryRule:
+    """Patterns assigning packages to one category.
+
+    Lower ``priority`` wins. ``manufacturer`` rules match packages containing
+    the device manufacturer name, which is only known at categorization time.
+    All matching is case-insensitive.
+    """
+
+    category: str
+    priority: int = 0
+    prefixes: List[str] = field(default_factory=list)
+    substrings: List[str] = field(default_factory=list)
+    exact: List[str] = field(default_factory=list)
+    manufacturer: bool = False
+
+
+class CategoryMatcher:
+    """Assign each package to its highest-priority category in one pass.
+
+    Rules are compiled once into a case-insensitive
+    :class:`~utils.pattern_matcher.PatternMatcher` whose values are category
+    ranks, so a package is classified in time linear in its name no matter
+    how many patterns are loaded. Packages matching no rule fall back to
+    ``user``, ``system`` and finally ``uncategorized``.
+    """
+
+    def __init__(self, rules: Iterable[CategoryRule]) -> None:
+        ordered = sorted(enumerate(rules), key=lambda item: (item[1].priority, item[0]))
+        self.rule_categories: List[str] = []
+        self._patterns: PatternMatcher[int] = PatternMatcher(ignore_case=True)
+        self._manufacturer: int | None = None
+        for _, rule in ordered:
+            if rule.category not in self.rule_categories:
+                self.rule_categories.append(rule.category)
+            rank = self.rule_categories.index(rule.category)
+            for prefix in rule.prefixes:
+                self._patterns.add_prefix(prefix, rank)
+            for name in rule.exact:
+                self._patterns.add_exact(name, rank)
+            for sub in rule.substrings:
+                self._patterns.add_substring(sub, rank)
+            if rule.manufacturer and self._manufacturer is None:
+                self._manufacturer = rank
+
+    @property
+    def categories(self) -> List[str]:
+        """All category names in priority order."""
+        extra = [c for c in FALLBACK_CATEGORIES if c not in self.rule_categories]
+        return [*self.rule_categories, *extra]
+
+    def _rank(self, name: str, vendor: str | None) -> int | None:
+        best = min(self._patterns.iter_matches(name), default=None)
+        if (vendor is not None and self._manufacturer is not None
+                and (best is None or self._manufacturer < best) and vendor in name):
+            best = self._manufacturer
+        return best
+
+    def match(self, pkg: str, manufacturer: str | None = None) -> str | None:
+        """Return the best rule category for ``pkg`` or ``None``."""
+        vendor = manufacturer.lower() if manufacturer is not None else None
+        rank = self._rank(pkg.lower(), vendor)
+        return None if rank is None else self.rule_categories[rank]
+
+    def categorize(self, all_apps: Set[str], system_apps: Set[str],
+                   user_apps: Set[str], manufacturer: str) -> Dict[str, List[str]]:
+        """Return ``{category: sorted packages}`` for every category."""
+        categorized: Dict[str, List[str]] = {name: [] for name in self.categories}
+        vendor = manufacturer.lower()
+        for pkg in sorted(all_apps):
+            rank = self._rank(pkg.lower(), vendor)
+            if rank is not None:
+                category = self.rule_categories[rank]
+            elif pkg in user_apps:
+                category = "user"
+            elif pkg in system_apps:
+                category = "system"
+            else:
+                category = "uncategorized"
+            categorized[category].append(pkg)
+        return categorized
@@ -0,0 +1,209 @@
+# filename: analysis/apps/category_rules.py
+"""Load app category rules from JSON/TOML files and compile them to matchers.
+
+A rules file lists categories with their patterns and priority::
+
+    [[rules]]
+    category = "manufacturer"
+    priority = 0
+    manufacturer = true
+
+    [[rules]]
+    category = "android"
+    priority = 10
+    prefix = ["com.google.android", "com.android", "android"]
+    substring = []
+    exact = []
+
+JSON files use the same layout (``{"rules": [...]}``). Compiled matchers are
+kept in memory, keyed by the SHA-256 of the rules file, so reloading an
+unchanged file does not recompile it. Nothing compiled is written to disk:
+rebuilding is cheap (tens of milliseconds for 50,000 patterns) and loading a
+serialized matcher from a writable directory would execute whatever was
+placed there. Without a file the built-in lists from
+:mod:`app_category_keywords` are used.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # pragma: no cover - Python < 3.11
+    tomllib = None  # type: ignore[assignment]
+
+from . import app_category_keywords
+from .categorizer import CategoryMatcher, CategoryRule
+
+RULES_ENV = "NETHIRA_CATEGORY_RULES"
+WATCH_ENV = "NETHIRA_CATEGORY_RULES_WATCH"
+# Compiled matchers kept for recently loaded rules files.
+_COMPILED_ENTRIES = 8
+_compiled: "OrderedDict[str, CategoryMatcher]" = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+def default_rules() -> List[CategoryRule]:
+    """Return the built-in rules in their historical priority order."""
+    prefix_rules = [
+        ("android", app_category_keywords.ANDROID_PACKAGES),
+        ("google", app_category_keywords.GOOGLE_PACKAGES),
+        ("facebook", app_category_keywords.FACEBOOK_PACKAGES),
+        ("tiktok", app_category_keywords.TIKTOK_PACKAGES),
+        ("twitter", app_category_keywords.TWITTER_PACKAGES),
+        ("instagram", app_category_keywords.INSTAGRAM_PACKAGES),
+        ("parler", app_category_keywords.PARLER_PACKAGES),
+        ("reddit", app_category_keywords.REDDIT_PACKAGES),
+        ("vendor", app_category_keywords.VENDOR_KEYWORDS),
+    ]
+    rules = [CategoryRule("manufacturer", priority=0, manufacturer=True)]
+    for priority, (category, prefixes) in enumerate(prefix_rules, start=1):
+        rules.append(CategoryRule(category, priority=priority * 10, prefixes=list(prefixes)))
+    return rules
+
+
+def _as_list(value: object, key: str) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"'{key}' must be a string or list of strings")
+    return list(value)
+
+
+def parse_rules(data: dict) -> List[CategoryRule]:
+    """Build rules from the decoded contents of a rules file."""
+    entries = data.get("rules")
+    if not isinstance(entries, list):
+        raise ValueError("rules file must contain a 'rules' list")
+    rules = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get("category"):
+            raise ValueError(f"rule {index} has no 'category'")
+        rules.append(CategoryRule(
+            category=str(entry["category"]),
+            priority=int(entry.get("priority", index)),
+            prefixes=_as_list(entry.get("prefix"), "prefix"),
+            substrings=_as_list(entry.get("substring"), "substring"),
+            exact=_as_list(entry.get("exact"), "exact"),
+            manufacturer=bool(entry.get("manufacturer", False)),
+        ))
+    return rules
+
+
+def _decode(path: str, raw: bytes) -> dict:
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise ValueError("TOML rules need Python 3.11+; use JSON instead")
+        return tomllib.loads(raw.decode("utf-8"))
+    return json.loads(raw.decode("utf-8"))
+
+
+def load_rules(path: str) -> List[CategoryRule]:
+    """Read and validate the rules in ``path``."""
+    with open(path, "rb") as f:
+        return parse_rules(_decode(path, f.read()))
+
+
+def compile_rules_file(path: str) -> CategoryMatcher:
+    """Return the matcher for ``path``, reusing one compiled from identical contents."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    with _compiled_lock:
+        matcher = _compiled.get(digest)
+        if matcher is not None:
+            _compiled.move_to_end(digest)
+            print(f"[category_rules] Reusing compiled rules for {path}")
+            return matcher
+
+    start = time.perf_counter()
+    matcher = CategoryMatcher(parse_rules(_decode(path, raw)))
+    print(f"[category_rules] Compiled {path} in {(time.perf_counter() - start) * 1000:.1f} ms")
+    with _compiled_lock:
+        _compiled[digest] = matcher
+        while len(_compiled) > _COMPILED_ENTRIES:
+            _compiled.popitem(last=False)
+    return matcher
+
+
+class RulesLoader:
+    """Hold the active matcher, optionally reloading when the file changes.
+
+    With ``watch`` enabled the rules file's mtime and size are polled at most
+    every ``poll_interval`` seconds; a changed file is recompiled and swapped
+    in, while a broken edit keeps the previous matcher in place.
+    """
+
+    def __init__(self, path: Optional[str] = None, watch: bool = False,
+                 poll_interval: float = 2.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.path = path
+        self.watch = watch
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._stamp: tuple | None = None
+        self._checked = clock()
+        self._matcher = self._load()
+
+    def _file_stamp(self) -> tuple | None:
+        try:
+            st = os.stat(self.path)  # type: ignore[arg-type]
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self) -> CategoryMatcher:
+        if not self.path:
+            return CategoryMatcher(default_rules())
+        self._stamp = self._file_stamp()
+        return compile_rules_file(self.path)
+
+    def matcher(self) -> CategoryMatcher:
+        """Return the current matcher, reloading first if the file changed."""
+        if self.watch and self.path and self.clock() - self._checked >= self.poll_interval:
+            with self._lock:
+                self._checked = self.clock()
+                stamp = self._file_stamp()
+                if stamp is not None and stamp != self._stamp:
+                    try:
+                        self._matcher = self._load()
+                        print(f"[category_rules] Reloaded {self.path}")
+                    except (OSError, ValueError) as exc:
+                        self._stamp = stamp
+                        print(f"[category_rules] Keeping previous rules, reload failed: {exc}")
+        return self._matcher
+
+
+_loader: RulesLoader | None = None
+_loader_lock = threading.Lock()
+
+
+def get_matcher() -> CategoryMatcher:
+    """Return the process-wide matcher configured by ``NETHIRA_CATEGORY_RULES``."""
+    global _loader
+    if _loader is None:
+        with _loader_lock:
+            if _loader is None:
+                _loader = RulesLoader(
+                    os.environ.get(RULES_ENV) or None,
+                    watch=os.environ.get(WATCH_ENV, "") not in ("", "0"),
+                )
+    return _loader.matcher()
+
+
+def set_rules_file(path: Optional[str], watch: bool = False) -> CategoryMatcher:
+    """Switch the process-wide matcher to ``path`` (``None`` for built-ins)."""
+    global _loader
+    with _loader_lock:
+        _loader = RulesLoader(path, watch=watch)
+    return _loader.matcher()
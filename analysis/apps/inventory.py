@@ -0,0 +1,128 @@
+"""Build a package inventory for a device in a single shell round trip.
+
+One ``pm list packages -f -U -i --show-versioncode`` call lists every package
+with its APK path, uid, installer and version code; the system and third-party
+listings are appended to the same shell command so the whole snapshot costs
+one round trip. Report stages share the resulting :class:`DeviceInventory`
+instead of each listing packages again.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Dict
+
+from models.device_inventory import DeviceInventory, PackageRecord
+from utils import adb_async, adb_shell
+
+_SYSTEM_MARKER = "__NETHIRA_SYSTEM__"
+_THIRD_PARTY_MARKER = "__NETHIRA_THIRD_PARTY__"
+# Older pm builds reject -U/--show-versioncode, so fall back to -f -i there.
+INVENTORY_CMD = (
+    "pm list packages -f -U -i --show-versioncode 2>/dev/null"
+    " || pm list packages -f -i; "
+    f"echo {_SYSTEM_MARKER}; pm list packages -s; "
+    f"echo {_THIRD_PARTY_MARKER}; pm list packages -3"
+)
+DEFAULT_TTL = float(os.environ.get("NETHIRA_INVENTORY_TTL", "60"))
+
+_cache: Dict[str, DeviceInventory] = {}
+_cache_lock = threading.Lock()
+
+
+def parse_package_line(line: str) -> PackageRecord | None:
+    """Parse one ``pm list packages`` line into a :class:`PackageRecord`."""
+    line = line.strip()
+    if not line.startswith("package:"):
+        return None
+    tokens = line[len("package:"):].split()
+    if not tokens:
+        return None
+    head = tokens[0]
+    record = PackageRecord(name=head)
+    if "=" in head and head.startswith("/"):
+        record.apk_path, record.name = head.rsplit("=", 1)
+    for token in tokens[1:]:
+        if token.startswith("versionCode:"):
+            record.version_code = token.split(":", 1)[1]
+        elif token.startswith("uid:"):
+            record.uid = token.split(":", 1)[1]
+        elif token.startswith("installer="):
+            installer = token.split("=", 1)[1]
+            record.installer = "" if installer == "null" else installer
+    return record
+
+
+def _names(section: str) -> set[str]:
+    names = set()
+    for line in section.splitlines():
+        record = parse_package_line(line)
+        if record:
+            names.add(record.name)
+    return names
+
+
+def parse_inventory(serial: str, output: str) -> DeviceInventory:
+    """Build a :class:`DeviceInventory` from :data:`INVENTORY_CMD` output."""
+    listing, _, rest = output.partition(_SYSTEM_MARKER)
+    system_section, _, third_party_section = rest.partition(_THIRD_PARTY_MARKER)
+    system = _names(system_section)
+    third_party = _names(third_party_section)
+
+    packages: Dict[str, PackageRecord] = {}
+    for line in listing.splitlines():
+        record = parse_package_line(line)
+        if record is None:
+            continue
+        record.system = record.name in system
+        record.third_party = record.name in third_party
+        packages[record.name] = record
+    return DeviceInventory(serial, packages, time.time())
+
+
+def build_inventory(serial: str) -> DeviceInventory:
+    """Fetch a fresh inventory for ``serial``."""
+    print(f"[inventory] Listing packages on {serial}")
+    output = adb_shell(serial, INVENTORY_CMD)
+    inventory = parse_inventory(serial, "" if output == "N/A" else output)
+    print(f"[inventory] {len(inventory.packages)} packages on {serial}")
+    return inventory
+
+
+async def build_inventory_async(serial: str) -> DeviceInventory:
+    """Async variant of :func:`build_inventory`."""
+    output = await adb_async.adb_shell(serial, INVENTORY_CMD)
+    return parse_inventory(serial, "" if output == "N/A" else output)
+
+
+def get_inventory(serial: str, refresh: bool = False,
+                  max_age: float | None = None) -> DeviceInventory:
+    """Return a cached inventory for ``serial`` if younger than ``max_age``."""
+    max_age = DEFAULT_TTL if max_age is None else max_age
+    with _cache_lock:
+        cached = _cache.get(serial)
+    if cached and not refresh and time.time() - cached.fetched_at < max_age:
+        return cached
+    inventory = build_inventory(serial)
+    if inventory.packages:
+        with _cache_lock:
+            _cache[serial] = inventory
+    return inventory
+
+
+def invalidate(serial: str | None = None) -> None:
+    """Forget cached inventories."""
+    with _cache_lock:
+        if serial is None:
+            _cache.clear()
+        else:
+            _cache.pop(serial, None)
+
+
+def resolve(device: str | DeviceInventory) -> DeviceInventory:
+    """Return ``device`` if it is an inventory, otherwise build one for the serial."""
+    if isinstance(device, DeviceInventory):
+        return device
+    return build_inventory(device)
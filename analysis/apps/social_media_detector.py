@@ -1,7 +1,10 @@
-from typing import Dict, List
+from __future__ import annotations
 
-from . import app_category_keywords
-from utils import list_packages
+from typing import Dict, List, Set
+
+from . import app_category_keywords, inventory as inventory_mod
+from models.device_inventory import DeviceInventory
+from utils.pattern_matcher import PrefixTrie
 
 
 SOCIAL_CATEGORIES = {
@@ -13,13 +16,24 @@ SOCIAL_CATEGORIES = {
     "reddit": app_category_keywords.REDDIT_PACKAGES,
 }
 
+_SOCIAL_PREFIXES: PrefixTrie[str] = PrefixTrie()
+for _name, _prefixes in SOCIAL_CATEGORIES.items():
+    for _prefix in _prefixes:
+        _SOCIAL_PREFIXES.add(_prefix, _name)
+
+
+def detect_social_media_apps(device: str | DeviceInventory) -> Dict[str, List[str]]:
+    """Return detected social media packages present on the device.
+
+    ``device`` is either a serial or an already-built :class:`DeviceInventory`.
+    """
+    return detect_in_packages(inventory_mod.resolve(device).all_packages)
+
 
-def detect_social_media_apps(serial: str) -> Dict[str, List[str]]:
-    """Return detected social media packages present on the device."""
-    installed = set(list_packages(serial))
+def detect_in_packages(installed: Set[str]) -> Dict[str, List[str]]:
+    """Return social media packages found among ``installed``."""
     results: Dict[str, List[str]] = {name: [] for name in SOCIAL_CATEGORIES}
-    for name, prefixes in SOCIAL_CATEGORIES.items():
-        for pkg in installed:
-            if any(pkg.startswith(pref) for pref in prefixes):
-                results[name].append(pkg)
+    for pkg in installed:
+        for name in dict.fromkeys(_SOCIAL_PREFIXES.iter_matches(pkg)):
+            results[name].append(pkg)
     return {k: sorted(v) for k, v in results.items() if v}
@@ -1,9 +1,10 @@
 "Device analysis utilities."
 
-from . import device_enumeration, device_info_fetcher, device_reporter
+from . import device_enumeration, device_info_fetcher, device_reporter, property_cache
 
 __all__ = [
     "device_enumeration",
     "device_info_fetcher",
     "device_reporter",
+    "property_cache",
 ]
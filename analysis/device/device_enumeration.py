@@ -31,13 +31,31 @@ def display_enumerated_devices(devices: List[DeviceInfo]) -> None:
     display_utils.print_device_table(devices)
 
 
-def enumerate_and_display_devices() -> List[DeviceInfo]:
+def enumerate_and_display_devices(workers: int | None = None,
+                                  deadline: float | None = None) -> List[DeviceInfo]:
     """
     Full pipeline to enumerate and display connected Android devices.
 
+    Devices are queried concurrently and each row is printed as soon as that
+    device answers, so the list is in answer order.
+
+    Args:
+        workers (int | None): Maximum devices queried at once.
+        deadline (float | None): Seconds before a device is shown as stale.
+
     Returns:
         List[DeviceInfo]: Devices detected and displayed.
     """
-    devices = enumerate_connected_devices()
-    display_enumerated_devices(devices)
+    devices: List[DeviceInfo] = []
+    for device in device_info_fetcher.iter_device_info(workers=workers, deadline=deadline):
+        if not devices:
+            display_utils.print_title("Connected Devices")
+            display_utils.print_device_table_header()
+        devices.append(device)
+        display_utils.print_device_row(len(devices), device)
+
+    if devices:
+        print()
+    else:
+        display_utils.print_warning("No devices connected.")
     return devices
@@ -1,7 +1,32 @@
 # analysis/device_info_fetcher.py
 
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, List
+
 from models.device_info import DeviceInfo
-from utils import adb_shell, list_connected_devices
+from utils import list_connected_devices
+from . import property_cache
+
+DEFAULT_WORKERS = int(os.environ.get("NETHIRA_ENUM_WORKERS", "8"))
+DEFAULT_DEADLINE = float(os.environ.get("NETHIRA_DEVICE_DEADLINE", "15"))
+
+# DeviceInfo field -> system property it is read from
+DEVICE_PROPERTIES = {
+    "model": "ro.product.model",
+    "manufacturer": "ro.product.manufacturer",
+    "android_version": "ro.build.version.release",
+    "sdk_version": "ro.build.version.sdk",
+    "device_name": "ro.product.device",
+    "build_number": "ro.build.display.id",
+    "security_patch": "ro.build.version.security_patch",
+    "fingerprint": "ro.build.fingerprint",
+    "bootloader": "ro.bootloader",
+    "cpu_abi": "ro.product.cpu.abi",
+}
 
 
 def get_connected_devices() -> list[str]:
@@ -9,26 +34,93 @@ def get_connected_devices() -> list[str]:
     return list_connected_devices()
 
 
+def device_info_from_snapshot(
+    serial: str, snapshot: property_cache.PropertySnapshot | None
+) -> DeviceInfo:
+    """Build a DeviceInfo from a getprop snapshot (``N/A`` if unavailable)."""
+    fields = {
+        name: snapshot.get(prop) if snapshot else "N/A"
+        for name, prop in DEVICE_PROPERTIES.items()
+    }
+    return DeviceInfo(serial=serial, **fields)
 
 
-def get_device_info(serial: str) -> DeviceInfo:
+def get_device_info(serial: str, refresh: bool = False) -> DeviceInfo:
     """Gathers detailed information for a specific connected device."""
-    return DeviceInfo(
-        serial=serial,
-        model=adb_shell(serial, "getprop ro.product.model"),
-        manufacturer=adb_shell(serial, "getprop ro.product.manufacturer"),
-        android_version=adb_shell(serial, "getprop ro.build.version.release"),
-        sdk_version=adb_shell(serial, "getprop ro.build.version.sdk"),
-        device_name=adb_shell(serial, "getprop ro.product.device"),
-        build_number=adb_shell(serial, "getprop ro.build.display.id"),
-        security_patch=adb_shell(serial, "getprop ro.build.version.security_patch"),
-        fingerprint=adb_shell(serial, "getprop ro.build.fingerprint"),
-        bootloader=adb_shell(serial, "getprop ro.bootloader"),
-        cpu_abi=adb_shell(serial, "getprop ro.product.cpu.abi"),
-    )
-
-
-def fetch_all_device_info() -> list[DeviceInfo]:
+    snapshot = property_cache.get_snapshot(serial, refresh=refresh)
+    return device_info_from_snapshot(serial, snapshot)
+
+
+def partial_device_info(serial: str) -> DeviceInfo:
+    """Return a stale DeviceInfo from whatever properties are already cached."""
+    snapshot = property_cache.get_property_cache().peek(serial)
+    info = device_info_from_snapshot(serial, snapshot)
+    info.stale = True
+    return info
+
+
+def iter_device_info(serials: List[str] | None = None,
+                     workers: int | None = None,
+                     deadline: float | None = None) -> Iterator[DeviceInfo]:
+    """Yield DeviceInfo objects as devices answer, querying them concurrently.
+
+    At most ``workers`` devices are queried at once. A device that has not
+    answered ``deadline`` seconds after its query started is yielded as a
+    stale partial entry and its worker is abandoned, so a wedged device never
+    holds up the rest.
+    """
+    if serials is None:
+        serials = get_connected_devices()
+    workers = max(1, workers or DEFAULT_WORKERS)
+    deadline = deadline or DEFAULT_DEADLINE
+
+    results: "queue.Queue[tuple[str, DeviceInfo | None]]" = queue.Queue()
+    waiting = deque(dict.fromkeys(serials))
+    running: Dict[str, float] = {}
+
+    def worker(serial: str) -> None:
+        try:
+            info: DeviceInfo | None = get_device_info(serial)
+        except Exception as exc:  # noqa: BLE001 - reported as a stale entry
+            print(f"[device_info_fetcher] {serial} failed: {exc}")
+            info = None
+        results.put((serial, info))
+
+    def launch() -> None:
+        while waiting and len(running) < workers:
+            serial = waiting.popleft()
+            running[serial] = time.monotonic()
+            threading.Thread(
+                target=worker, args=(serial,), name=f"nethira-enum-{serial}", daemon=True
+            ).start()
+
+    launch()
+    while running:
+        timeout = min(running.values()) + deadline - time.monotonic()
+        try:
+            serial, info = results.get(timeout=max(0.0, timeout))
+        except queue.Empty:
+            pass
+        else:
+            # Answers from devices that already timed out are dropped.
+            if running.pop(serial, None) is not None:
+                yield info or partial_device_info(serial)
+
+        now = time.monotonic()
+        for serial, started in list(running.items()):
+            if now - started >= deadline:
+                print(f"[device_info_fetcher] {serial} missed its {deadline}s deadline")
+                del running[serial]
+                yield partial_device_info(serial)
+        launch()
+
+
+def fetch_all_device_info(workers: int | None = None,
+                          deadline: float | None = None) -> list[DeviceInfo]:
     """Returns a list of DeviceInfo objects for all connected devices."""
     serials = get_connected_devices()
-    return [get_device_info(serial) for serial in serials]
+    found = {
+        info.serial: info
+        for info in iter_device_info(serials, workers=workers, deadline=deadline)
+    }
+    return [found[serial] for serial in serials if serial in found]
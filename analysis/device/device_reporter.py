@@ -2,19 +2,43 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 
 from models.device_info import DeviceInfo
+from analysis.apps import inventory as inventory_mod
 from analysis.apps import list_installed_apps, social_media_detector
+from models.device_inventory import DeviceInventory
 from utils import file_utils
 from . import device_info_fetcher
 
 
-def build_report(serial: str, manufacturer: str) -> dict:
-    """Collect device info, app categories and social apps."""
+def build_report(serial: str, manufacturer: str,
+                 inventory: DeviceInventory | None = None) -> dict:
+    """Collect device info, app categories and social apps.
+
+    The package listing is fetched once (or taken from ``inventory``) and
+    shared by every stage.
+    """
     info: DeviceInfo = device_info_fetcher.get_device_info(serial)
-    apps = list_installed_apps.categorize_installed_apps(serial, manufacturer)
-    social = social_media_detector.detect_social_media_apps(serial)
+    inventory = inventory or inventory_mod.build_inventory(serial)
+    apps = list_installed_apps.categorize_installed_apps(inventory, manufacturer)
+    social = social_media_detector.detect_social_media_apps(inventory)
+    return {
+        "device_info": info.to_dict(),
+        "app_categories": apps,
+        "social_media": social,
+    }
+
+
+async def build_report_async(serial: str, manufacturer: str) -> dict:
+    """Async variant of :func:`build_report` fetching info and packages concurrently."""
+    info, inventory = await asyncio.gather(
+        asyncio.to_thread(device_info_fetcher.get_device_info, serial),
+        inventory_mod.build_inventory_async(serial),
+    )
+    apps = list_installed_apps.categorize_installed_apps(inventory, manufacturer)
+    social = social_media_detector.detect_social_media_apps(inventory)
     return {
         "device_info": info.to_dict(),
         "app_categories": apps,
@@ -22,9 +46,10 @@ def build_report(serial: str, manufacturer: str) -> dict:
     }
 
 
-def save_report(serial: str, manufacturer: str, path: str | None = None) -> str:
+def save_report(serial: str, manufacturer: str, path: str | None = None,
+                inventory: DeviceInventory | None = None) -> str:
     """Save a JSON device report and return the file path."""
-    report = build_report(serial, manufacturer)
+    report = build_report(serial, manufacturer, inventory)
     filepath = path or file_utils.get_timestamped_log_path(f"report_{serial}")
     file_utils.save_text_to_file(filepath, json.dumps(report, indent=2))
     return filepath
@@ -0,0 +1,141 @@
+"""Per-device cache of ``getprop`` snapshots.
+
+A single ``getprop`` call returns every system property, so one round trip is
+enough to build a :class:`DeviceInfo`. Snapshots are kept per serial for a TTL.
+Once it expires a small probe re-reads ``ro.build.fingerprint`` and the kernel
+boot id, and the snapshot is only fetched again if either changed.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+from utils import adb_shell
+
+BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+_BOOT_MARKER = "__NETHIRA_BOOT_ID__"
+_SNAPSHOT_CMD = f"getprop; echo {_BOOT_MARKER}; cat {BOOT_ID_PATH} 2>/dev/null; true"
+_IDENTITY_CMD = (
+    f"getprop ro.build.fingerprint; echo {_BOOT_MARKER}; "
+    f"cat {BOOT_ID_PATH} 2>/dev/null; true"
+)
+_PROP_RE = re.compile(r"^\[([^\]]+)\]: \[(.*?)\]$", re.M | re.S)
+
+
+def parse_getprop(text: str) -> Dict[str, str]:
+    """Parse ``getprop`` output (``[key]: [value]`` lines) into a dict."""
+    return {m.group(1): m.group(2) for m in _PROP_RE.finditer(text)}
+
+
+def _split_boot_id(output: str) -> tuple[str, str]:
+    head, _, boot_id = output.partition(_BOOT_MARKER)
+    return head, boot_id.strip()
+
+
+@dataclass
+class PropertySnapshot:
+    """All system properties of one device at a point in time."""
+
+    serial: str
+    properties: Dict[str, str] = field(default_factory=dict)
+    boot_id: str = ""
+    fetched_at: float = 0.0
+
+    @property
+    def fingerprint(self) -> str:
+        return self.properties.get("ro.build.fingerprint", "")
+
+    def get(self, key: str, default: str = "") -> str:
+        return self.properties.get(key, default)
+
+
+class PropertyCache:
+    """Cache ``getprop`` snapshots per device serial."""
+
+    def __init__(self, ttl: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl = ttl
+        self.clock = clock
+        self._snapshots: Dict[str, PropertySnapshot] = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, serial: str) -> Optional[PropertySnapshot]:
+        print(f"[property_cache] Fetching getprop snapshot for {serial}")
+        output = adb_shell(serial, _SNAPSHOT_CMD)
+        if output == "N/A":
+            return None
+        head, boot_id = _split_boot_id(output)
+        props = parse_getprop(head)
+        if not props:
+            return None
+        return PropertySnapshot(serial, props, boot_id, self.clock())
+
+    def _still_valid(self, snap: PropertySnapshot) -> bool:
+        output = adb_shell(snap.serial, _IDENTITY_CMD)
+        if output == "N/A":
+            return False
+        fingerprint, boot_id = _split_boot_id(output)
+        return fingerprint.strip() == snap.fingerprint and boot_id == snap.boot_id
+
+    def snapshot(self, serial: str, refresh: bool = False) -> Optional[PropertySnapshot]:
+        """Return the property snapshot for ``serial`` or ``None`` if unreachable."""
+        with self._lock:
+            cached = self._snapshots.get(serial)
+        if cached and not refresh:
+            if self.clock() - cached.fetched_at < self.ttl:
+                return cached
+            if self._still_valid(cached):
+                cached.fetched_at = self.clock()
+                return cached
+            print(f"[property_cache] Build or boot changed for {serial}")
+
+        snap = self._fetch(serial)
+        with self._lock:
+            if snap is None:
+                self._snapshots.pop(serial, None)
+            else:
+                self._snapshots[serial] = snap
+        return snap
+
+    def peek(self, serial: str) -> Optional[PropertySnapshot]:
+        """Return whatever snapshot is cached for ``serial`` without any I/O."""
+        with self._lock:
+            return self._snapshots.get(serial)
+
+    def get(self, serial: str, key: str, default: str = "N/A") -> str:
+        """Return a single property, using the cached snapshot if possible."""
+        snap = self.snapshot(serial)
+        if snap is None:
+            return default
+        return snap.get(key, "")
+
+    def invalidate(self, serial: str | None = None) -> None:
+        """Drop the snapshot for ``serial`` or all snapshots."""
+        with self._lock:
+            if serial is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(serial, None)
+
+
+_default_cache = PropertyCache(ttl=float(os.environ.get("NETHIRA_PROP_TTL", "300")))
+
+
+def get_property_cache() -> PropertyCache:
+    """Return the process-wide property cache."""
+    return _default_cache
+
+
+def get_snapshot(serial: str, refresh: bool = False) -> Optional[PropertySnapshot]:
+    """Return the cached property snapshot for ``serial``."""
+    return _default_cache.snapshot(serial, refresh)
+
+
+def get_property(serial: str, key: str, default: str = "N/A") -> str:
+    """Return one property for ``serial`` from the shared cache."""
+    return _default_cache.get(serial, key, default)
@@ -10,8 +10,9 @@ from .cvss_scorer import CVSSScorer
 from .risk_classifier import RiskClassifier
 from .version_tracker import VersionTracker
 from .scanner import scan_packages
+from .scan_engine import ScanEngine, scan_fleet
 from .report_writer import write_json_report, write_csv_report
-from .pipeline import analyze_packages, format_results
+from .pipeline import analyze_fleet, analyze_packages, format_results
 
 ManifestAnalyzer: Any | None
 ComponentScanner: Any | None
@@ -36,8 +37,11 @@ __all__ = [
     "RiskClassifier",
     "VersionTracker",
     "scan_packages",
+    "ScanEngine",
+    "scan_fleet",
     "write_json_report",
     "write_csv_report",
     "analyze_packages",
+    "analyze_fleet",
     "format_results",
 ]
@@ -2,12 +2,67 @@
 
 from __future__ import annotations
 
-import csv
+import asyncio
 import hashlib
 import os
-from typing import Dict, List
+import re
+import shlex
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
 
-from utils.adb_utils import run_adb
+from utils import adb_async
+from utils.adb_utils import adb_pull, adb_shell, batched_commands, run_adb, stream_file
+from utils.csv_appender import BufferedCSVAppender
+from utils.hash_utils import MultiHasher, hashes_of_file
+from . import tar_transfer
+from .pull_planner import (
+    DEFAULT_PULL_ORDER,
+    PlannedPull,
+    PullPlan,
+    PullProgress,
+    parse_stat_output,
+    plan_pulls,
+    run_plan,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from database.apk_store import APKStore
+
+LOG_HEADER = ["package", "remote_path", "local_path", "sha256"]
+# Returned by _reuse_known for an APK known only by hash, with no local copy.
+_SKIPPED = object()
+_SHA256_LINE_RE = re.compile(r"^([0-9a-fA-F]{64})\s+\*?(\S.*)$")
+TRANSFER_MODES = ("auto", "tar", "file")
+DEFAULT_TRANSFER = os.environ.get("NETHIRA_PULL_TRANSFER", "auto")
+
+
+def device_hash_commands(paths: Iterable[str]) -> List[str]:
+    """Return shell commands hashing ``paths`` on the device in few batches.
+
+    Older devices only ship ``sha256sum`` as a toybox applet, so the command
+    picks whichever is available. Unreadable paths are simply missing from
+    the output.
+    """
+    prefix = (
+        "if command -v sha256sum >/dev/null 2>&1; then h=sha256sum; "
+        "else h='toybox sha256sum'; fi; $h"
+    )
+    return batched_commands(prefix, (shlex.quote(p) for p in paths))
+
+
+def device_size_commands(paths: Iterable[str]) -> List[str]:
+    """Return shell commands printing ``<size> <path>`` for ``paths``."""
+    return batched_commands("stat -c '%s %n'", (shlex.quote(p) for p in paths))
+
+
+def parse_device_hashes(output: str) -> Dict[str, str]:
+    """Parse ``sha256sum`` output into ``{path: sha256}``."""
+    hashes: Dict[str, str] = {}
+    for line in output.splitlines():
+        match = _SHA256_LINE_RE.match(line.strip())
+        if match:
+            hashes[match.group(2)] = match.group(1).lower()
+    return hashes
 
 
 class APKExtractor:
@@ -15,72 +70,441 @@ class APKExtractor:
 
     def __init__(self,
                  output_dir: str = "output/app_static_profiles",
-                 log_file: str = "output/apk_pull_log.csv") -> None:
+                 log_file: str = "output/apk_pull_log.csv",
+                 hash_algorithms: Iterable[str] = ("sha256",),
+                 stream: bool = True,
+                 split_workers: int = adb_async.DEFAULT_DEVICE_CONCURRENCY,
+                 store: "APKStore | None" = None,
+                 known_hashes: Optional[Iterable[str]] = None,
+                 device_hash: bool = True,
+                 pull_order: str = DEFAULT_PULL_ORDER,
+                 transfer: str = DEFAULT_TRANSFER,
+                 tar_gzip: bool = False) -> None:
         self.output_dir = output_dir
         self.log_file = log_file
+        # sha256 is always computed; extra digests are added to the metadata.
+        self.hash_algorithms = tuple(dict.fromkeys(("sha256", *hash_algorithms)))
+        self.stream = stream
+        self.split_workers = max(1, split_workers)
+        # With a store, pulled files become links into its deduplicated blobs.
+        self.store = store
+        # APKs whose hash is already known are not pulled again; their hashes
+        # are computed on the device first in one batched command.
+        self.known_hashes = set(known_hashes or ())
+        self.device_hash = device_hash
+        self.pull_order = pull_order
+        # ``auto`` streams bulk pulls through one ``tar`` when the device has
+        # it; ``file`` always pulls APKs one by one.
+        if transfer not in TRANSFER_MODES:
+            raise ValueError(f"unknown transfer mode: {transfer}")
+        self.transfer = transfer
+        self.tar_gzip = tar_gzip
         os.makedirs(self.output_dir, exist_ok=True)
         os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+        # Log rows are batched and flushed when each public pull returns.
+        self._log = BufferedCSVAppender(self.log_file, LOG_HEADER)
         print(f"[APKExtractor] Output directory: {self.output_dir}")
         print(f"[APKExtractor] Log file: {self.log_file}")
 
     def _write_log(self, row: List[str]) -> None:
-        write_header = not os.path.exists(self.log_file)
-        with open(self.log_file, "a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            if write_header:
-                writer.writerow(["package", "remote_path", "local_path", "sha256"])
-                print(f"[APKExtractor] Writing header to log")
-            print(f"[APKExtractor] Logging row: {row}")
-            writer.writerow(row)
-
-    def pull_apk(self, serial: str, package: str) -> Dict[str, str] | None:
-        """Pull the APK for ``package`` from ``serial`` and return metadata."""
+        print(f"[APKExtractor] Logging row: {row}")
+        self._log.append(row)
+
+    def flush_log(self) -> None:
+        """Write buffered log rows to :attr:`log_file`."""
+        self._log.flush()
+
+    @staticmethod
+    def _apk_paths(pm_output: str) -> List[str]:
+        """Return every path from ``pm path``: the base APK and any splits."""
+        paths = [
+            line.replace("package:", "").strip()
+            for line in pm_output.splitlines()
+            if line.startswith("package:")
+        ]
+        return list(dict.fromkeys(p for p in paths if p))
+
+    @staticmethod
+    def bundle_hash(splits: List[Dict[str, str]]) -> str:
+        """Return one SHA-256 over every file of an app bundle.
+
+        It is computed from the sorted ``(file name, sha256)`` pairs, so it only
+        changes when a split is added, removed or modified.
+        """
+        entries = sorted(
+            f"{os.path.basename(s['remote_path'])} {s['sha256']}" for s in splits
+        )
+        return hashlib.sha256("\n".join(entries).encode("utf-8")).hexdigest()
+
+    def _local_path(self, package: str, remote_path: str) -> str:
+        pkg_dir = os.path.join(self.output_dir, package)
+        os.makedirs(pkg_dir, exist_ok=True)
+        return os.path.join(pkg_dir, os.path.basename(remote_path))
+
+    def _stream_pull(self, serial: str, remote_path: str, local_path: str,
+                     size: int | None = None) -> Dict[str, str]:
+        """Write and hash ``remote_path`` in one pass with constant memory.
+
+        A known ``size`` makes a truncated stream fail instead of being kept.
+        """
+        hasher = MultiHasher(self.hash_algorithms)
+        partial = f"{local_path}.part"
+        try:
+            with open(partial, "wb") as f:
+                for chunk in stream_file(serial, remote_path, expected_size=size):
+                    f.write(chunk)
+                    hasher.update(chunk)
+            if hasher.size == 0:
+                raise RuntimeError(f"no data received for {remote_path}")
+            os.replace(partial, local_path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        print(f"[APKExtractor] Streamed {hasher.size} bytes to {local_path}")
+        return hasher.hexdigests()
+
+    def _pull_and_hash(self, serial: str, remote_path: str, local_path: str,
+                       size: int | None = None) -> Dict[str, str]:
+        print(f"[APKExtractor] Pulling from {remote_path} to {local_path}")
+        if self.stream:
+            try:
+                return self._stream_pull(serial, remote_path, local_path, size)
+            except (RuntimeError, OSError) as exc:
+                print(f"[APKExtractor] Streaming pull failed ({exc}), using adb pull")
+        # ``local_path`` may be a link to a store blob; writing it in place
+        # would overwrite the blob, so pull beside it and replace the link.
+        partial = f"{local_path}.part"
+        try:
+            adb_pull(serial, remote_path, partial)
+            os.replace(partial, local_path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        return hashes_of_file(local_path, self.hash_algorithms)
+
+    def _finish_pull(self, package: str, remote_path: str, local_path: str | None,
+                     digests: Dict[str, str]) -> Dict[str, Any]:
+        sha256 = digests["sha256"]
+        print(f"[APKExtractor] SHA256 for {package} ({os.path.basename(remote_path)}): {sha256}")
+
+        self._write_log([package, remote_path, local_path or "", sha256])
+        meta: Dict[str, Any] = {
+            "package": package,
+            "remote_path": remote_path,
+            "sha256": sha256,
+        }
+        if local_path is None:
+            meta["skipped"] = True
+        else:
+            meta["local_path"] = local_path
+        meta.update((algo, digest) for algo, digest in digests.items() if algo != "sha256")
+        return meta
+
+    def _bundle_meta(self, splits: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Combine per-file metadata; the base APK's fields stay at the top level."""
+        base = next(
+            (s for s in splits if os.path.basename(s["remote_path"]) == "base.apk"),
+            splits[0],
+        )
+        meta: Dict[str, Any] = dict(base)
+        meta["splits"] = splits
+        meta["bundle_sha256"] = self.bundle_hash(splits)
+        if len(splits) > 1:
+            print(f"[APKExtractor] Pulled {len(splits)} APK(s) for {base['package']}, "
+                  f"bundle SHA256: {meta['bundle_sha256']}")
+        return meta
+
+    @property
+    def _checks_device_hashes(self) -> bool:
+        return self.device_hash and (self.store is not None or bool(self.known_hashes))
+
+    def device_hashes(self, serial: str, paths: Iterable[str]) -> Dict[str, str]:
+        """Hash ``paths`` on the device; paths that could not be hashed are omitted."""
+        hashes: Dict[str, str] = {}
+        for cmd in device_hash_commands(paths):
+            output = adb_shell(serial, cmd)
+            if output != "N/A":
+                hashes.update(parse_device_hashes(output))
+        print(f"[APKExtractor] Device reported {len(hashes)} hash(es) on {serial}")
+        return hashes
+
+    async def device_hashes_async(self, serial: str, paths: Iterable[str]) -> Dict[str, str]:
+        """Async variant of :meth:`device_hashes`."""
+        hashes: Dict[str, str] = {}
+        for cmd in device_hash_commands(paths):
+            output = await adb_async.adb_shell(serial, cmd)
+            if output != "N/A":
+                hashes.update(parse_device_hashes(output))
+        print(f"[APKExtractor] Device reported {len(hashes)} hash(es) on {serial}")
+        return hashes
+
+    def device_sizes(self, serial: str, paths: Iterable[str]) -> Dict[str, int]:
+        """Stat ``paths`` on the device; paths that could not be stat'ed are omitted."""
+        sizes: Dict[str, int] = {}
+        for cmd in device_size_commands(paths):
+            output = adb_shell(serial, cmd)
+            if output != "N/A":
+                sizes.update(parse_stat_output(output))
+        return sizes
+
+    async def device_sizes_async(self, serial: str, paths: Iterable[str]) -> Dict[str, int]:
+        """Async variant of :meth:`device_sizes`."""
+        sizes: Dict[str, int] = {}
+        for cmd in device_size_commands(paths):
+            output = await adb_async.adb_shell(serial, cmd)
+            if output != "N/A":
+                sizes.update(parse_stat_output(output))
+        return sizes
+
+    def _is_known(self, sha256: str | None) -> bool:
+        if not sha256:
+            return False
+        if sha256 in self.known_hashes:
+            return True
+        return self.store is not None and self.store.has_blob(sha256)
+
+    def _reuse_known(self, sha256: str, local_path: str) -> Any:
+        """Return how to reuse a known APK, or ``None`` to pull it.
+
+        That is ``local_path`` once a stored blob is linked there, or
+        ``_SKIPPED`` when the hash is only listed in ``known_hashes`` and
+        no copy exists locally.
+        """
+        if self.store is not None and self.store.materialize(sha256, local_path):
+            return local_path
+        if sha256 in self.known_hashes:
+            return _SKIPPED
+        return None
+
+    def _complete_pull(self, serial: str, package: str, remote_path: str,
+                       local_path: str, digests: Dict[str, str],
+                       device_sha: str | None = None) -> Dict[str, str]:
+        if device_sha and digests["sha256"] != device_sha:
+            print(f"[APKExtractor] Warning: {remote_path} changed during pull "
+                  f"(device {device_sha[:12]}, local {digests['sha256'][:12]})")
+        if self.store is not None:
+            self.store.ingest(local_path, digests["sha256"])
+            self.store.record(serial, package, remote_path, digests["sha256"], local_path)
+        return self._finish_pull(package, remote_path, local_path, digests)
+
+    def _pull_one(self, serial: str, package: str, remote_path: str,
+                  device_sha: str | None = None, size: int | None = None) -> Dict[str, str]:
+        local_path = self._local_path(package, remote_path)
+        reused = self._reuse_known(device_sha, local_path) if device_sha else None
+        if reused is None:
+            digests = self._pull_and_hash(serial, remote_path, local_path, size)
+            return self._complete_pull(serial, package, remote_path, local_path,
+                                       digests, device_sha)
+
+        print(f"[APKExtractor] Skipping pull of {remote_path}, hash already known")
+        if reused is _SKIPPED:
+            # Nothing local to hash, so only the device's SHA-256 is known.
+            return self._finish_pull(package, remote_path, None, {"sha256": device_sha})
+        digests = {"sha256": device_sha}
+        if len(self.hash_algorithms) > 1:
+            digests = hashes_of_file(reused, self.hash_algorithms)
+        if self.store is not None:
+            self.store.record(serial, package, remote_path, digests["sha256"], reused)
+        return self._finish_pull(package, remote_path, reused, digests)
+
+    def _uses_tar(self, serial: str, items: List[PlannedPull]) -> bool:
+        if self.transfer == "file" or (self.transfer == "auto" and len(items) < 2):
+            return False
+        return bool(items) and tar_transfer.tar_available(serial)
+
+    def _tar_pull(self, serial: str, items: List[PlannedPull],
+                  hashes: Dict[str, str]) -> Dict[Tuple[str, str], Any]:
+        """Transfer ``items`` through one ``tar`` stream, in the given order.
+
+        Files the stream did not deliver are missing from the result.
+        """
+        by_remote = {item.remote_path: item for item in items}
+        progress = PullProgress(sum(i.size for i in items), len(items))
+        done: Dict[Tuple[str, str], Any] = {}
+        compress = self.tar_gzip and tar_transfer.gzip_available(serial)
+        print(f"[APKExtractor] Streaming {len(items)} APK(s) from {serial} through tar"
+              f"{' (gzip)' if compress else ''}")
+
+        def on_file(remote_path: str, local_path: str,
+                    digests: Dict[str, str], size: int) -> None:
+            item = by_remote[remote_path]
+            try:
+                done[(item.package, remote_path)] = self._complete_pull(
+                    serial, item.package, remote_path, local_path, digests,
+                    hashes.get(remote_path),
+                )
+            except Exception as exc:  # noqa: BLE001 - reported per package
+                done[(item.package, remote_path)] = exc
+            print(progress.advance(size))
+
+        tar_transfer.stream_tar(
+            serial, list(by_remote),
+            lambda remote: self._local_path(by_remote[remote].package, remote),
+            self.hash_algorithms, compress, on_file,
+        )
+        return done
+
+    def _pull_paths(self, serial: str, package: str, paths: List[str],
+                    hashes: Dict[str, str], sizes: Dict[str, int]) -> Dict[str, Any]:
+        workers = min(self.split_workers, len(paths))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            splits = list(pool.map(
+                lambda p: self._pull_one(serial, package, p, hashes.get(p), sizes.get(p) or None),
+                paths,
+            ))
+        return self._bundle_meta(splits)
+
+    def pull_apk(self, serial: str, package: str) -> Dict[str, Any] | None:
+        """Pull every APK of ``package`` from ``serial`` and return metadata.
+
+        Split APKs are pulled concurrently and logged one row each. The
+        returned dict describes the base APK and adds ``splits`` (metadata for
+        every file) and ``bundle_sha256`` (see :meth:`bundle_hash`). File
+        sizes are stat'ed first so that a streamed pull cut short falls back
+        to ``adb pull`` instead of being kept.
+
+        A file whose device hash is in ``known_hashes`` (and not in the store)
+        is not pulled: its metadata has ``skipped=True``, no ``local_path``
+        and only ``sha256``, since the other ``hash_algorithms`` need the file.
+        """
         print(f"[APKExtractor] Pulling {package} from {serial}")
         try:
             result = run_adb(["-s", serial, "shell", "pm", "path", package])
-            for line in result.stdout.splitlines():
-                if line.startswith("package:"):
-                    remote_path = line.replace("package:", "").strip()
-                    break
+            paths = self._apk_paths(result.stdout)
+            if not paths:
+                print(f"[APKExtractor] Failed to find path for {package}")
+                return None
+
+            hashes = self.device_hashes(serial, paths) if self._checks_device_hashes else {}
+            # Sizes let a streamed pull detect a stream that ended early.
+            sizes = self.device_sizes(serial, paths) if self.stream else {}
+            return self._pull_paths(serial, package, paths, hashes, sizes)
+        except Exception as exc:
+            print(f"[APKExtractor] Error pulling {package}: {exc}")
+            return None
+        finally:
+            self.flush_log()
+
+    def pull_apks(self, serial: str, packages: Iterable[str],
+                  order: str | None = None) -> Dict[str, Dict[str, Any] | None]:
+        """Pull several packages from one up-front plan.
+
+        Paths and sizes come from :func:`~analysis.manifest.pull_planner.plan_pulls`
+        instead of one ``pm path`` per package; all APKs are hashed on the
+        device at once and only unknown ones are transferred, in size
+        order (``largest`` or ``smallest`` first) with aggregate progress.
+        When the device has ``tar`` they are streamed through a single
+        ``exec-out tar c``; anything it fails to deliver is pulled per file.
+        """
+        plan = plan_pulls(serial, packages)
+        all_paths = [item.remote_path for item in plan.items]
+        hashes = self.device_hashes(serial, all_paths) if self._checks_device_hashes else {}
+        known = [i for i in plan.items if self._is_known(hashes.get(i.remote_path))]
+        todo = PullPlan(serial, [i for i in plan.items if i not in known])
+        print(f"[APKExtractor] {len(known)} of {len(plan.items)} APK(s) already known, "
+              f"pulling {len(todo.items)} ({todo.total_bytes / 1e6:.1f} MB)")
+
+        def pull(item: PlannedPull) -> Dict[str, str]:
+            # A size of 0 means the planner could not stat the file.
+            return self._pull_one(serial, item.package, item.remote_path,
+                                  hashes.get(item.remote_path), item.size or None)
+
+        done: Dict[Tuple[str, str], Any] = {}
+        for item in known:
+            try:
+                done[(item.package, item.remote_path)] = pull(item)
+            except Exception as exc:  # noqa: BLE001 - reported per package below
+                done[(item.package, item.remote_path)] = exc
+        queue = todo.ordered(order or self.pull_order)
+        if self._uses_tar(serial, queue):
+            done.update(self._tar_pull(serial, queue, hashes))
+            queue = [i for i in queue if (i.package, i.remote_path) not in done]
+            if queue:
+                print(f"[APKExtractor] {len(queue)} APK(s) missing from tar stream, "
+                      "pulling individually")
+        for item, result in run_plan(queue, pull, workers=self.split_workers):
+            done[(item.package, item.remote_path)] = result
+
+        results: Dict[str, Dict[str, Any] | None] = {}
+        for package in plan.missing:
+            print(f"[APKExtractor] Failed to find path for {package}")
+            results[package] = None
+        for package, paths in plan.paths_by_package().items():
+            splits = [done[(package, path)] for path in paths]
+            error = next((r for r in splits if isinstance(r, Exception)), None)
+            if error is not None:
+                print(f"[APKExtractor] Error pulling {package}: {error}")
+                results[package] = None
             else:
+                results[package] = self._bundle_meta(splits)
+        self.flush_log()
+        return results
+
+    async def pull_apk_async(self, serial: str, package: str) -> Dict[str, Any] | None:
+        """Async variant of :meth:`pull_apk` built on :mod:`utils.adb_async`."""
+        print(f"[APKExtractor] Pulling {package} from {serial}")
+        try:
+            output = await adb_async.adb_shell(serial, f"pm path {package}")
+            paths = self._apk_paths(output)
+            if not paths:
                 print(f"[APKExtractor] Failed to find path for {package}")
                 return None
 
-            pkg_dir = os.path.join(self.output_dir, package)
-            os.makedirs(pkg_dir, exist_ok=True)
-            local_path = os.path.join(pkg_dir, os.path.basename(remote_path))
-            print(f"[APKExtractor] Pulling from {remote_path} to {local_path}")
-            run_adb(["-s", serial, "pull", remote_path, local_path])
-
-            with open(local_path, "rb") as f:
-                sha256 = hashlib.sha256(f.read()).hexdigest()
-            print(f"[APKExtractor] SHA256 for {package}: {sha256}")
-
-            self._write_log([package, remote_path, local_path, sha256])
-            return {
-                "package": package,
-                "remote_path": remote_path,
-                "local_path": local_path,
-                "sha256": sha256,
-            }
+            hashes: Dict[str, str] = {}
+            if self._checks_device_hashes:
+                hashes = await self.device_hashes_async(serial, paths)
+            sizes = await self.device_sizes_async(serial, paths) if self.stream else {}
+
+            async def pull(remote_path: str) -> Dict[str, str]:
+                async with adb_async.device_slot(serial):
+                    return await asyncio.to_thread(
+                        self._pull_one, serial, package, remote_path,
+                        hashes.get(remote_path), sizes.get(remote_path) or None,
+                    )
+
+            splits = await asyncio.gather(*(pull(p) for p in paths))
+            return self._bundle_meta(list(splits))
         except Exception as exc:
             print(f"[APKExtractor] Error pulling {package}: {exc}")
             return None
+        finally:
+            self.flush_log()
 
     def pull_and_record(self, serial: str, package: str,
                          analyzer: "ManifestAnalyzer" | None = None,
                          tracker: "VersionTracker" | None = None) -> Dict[str, str] | None:
-        """Pull an APK and optionally record its version history."""
+        """Pull an APK and optionally record its version history.
+
+        With a store, package info is cached per APK hash, so an APK already
+        analyzed for another device is not parsed again.
+        """
         print(f"[APKExtractor] pull_and_record called for {package}")
         meta = self.pull_apk(serial, package)
         if not meta or not analyzer or not tracker:
             return meta
-        manifest = analyzer.parse(meta["local_path"])
-        if manifest:
-            info = analyzer.get_package_info(manifest)
-            print(
-                f"[APKExtractor] Recording version {info.get('version_code', '')} "
-                f"for {package}"
-            )
-            tracker.record(package, info.get("version_code", ""), meta["sha256"])
+        if meta.get("skipped"):
+            print(f"[APKExtractor] {package} was skipped as known, nothing to analyze")
+            return meta
+        info = None
+        if self.store is not None:
+            info = self.store.get_result(meta["sha256"], "package_info")
+        if info is None:
+            if getattr(analyzer, "cache", None) is not None:
+                info = analyzer.features(meta["local_path"], meta["sha256"]).get("package_info")
+            else:
+                manifest = analyzer.parse(meta["local_path"])
+                info = analyzer.get_package_info(manifest) if manifest else None
+            if not info:
+                return meta
+            if self.store is not None:
+                self.store.put_result(meta["sha256"], "package_info", info)
+        else:
+            print(f"[APKExtractor] Using cached package info for {meta['sha256'][:12]}")
+        version = info.get("version_code", "")
+        if self.store is not None:
+            self.store.set_version(serial, package, version)
+        print(f"[APKExtractor] Recording version {version} for {package}")
+        tracker.record(package, version, meta["sha256"])
         return meta
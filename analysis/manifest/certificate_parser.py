@@ -2,25 +2,26 @@
 
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Union
 
-import apkutils2
+from utils.apk_utils import ApkHandle, open_apk
 
 
 class CertificateParser:
     """Parse certificate information from APKs."""
 
-    def parse(self, apk_path: str) -> List[Dict[str, str]]:
-        """Return certificate subjects and MD5 digests."""
-        print(f"[CertificateParser] Parsing certificates from {apk_path}")
-        try:
-            apk = apkutils2.APK(apk_path)
-            certs = apk.get_certs() or []
-            results: List[Dict[str, str]] = []
-            for subject, md5 in certs:
-                results.append({"subject": subject, "md5": md5})
-            print(f"[CertificateParser] Found {len(results)} certificates")
-            return results
-        except Exception as exc:
-            print(f"[CertificateParser] Failed to parse certificates: {exc}")
-            return []
+    def parse(self, apk_path: Union[str, ApkHandle]) -> List[Dict[str, str]]:
+        """Return certificate subjects and MD5 digests.
+
+        Given an :class:`~utils.apk_utils.ApkHandle` the signature block is
+        read from the already opened archive.
+        """
+        with open_apk(apk_path) as handle:
+            print(f"[CertificateParser] Parsing certificates from {handle.path}")
+            try:
+                results = [{"subject": s, "md5": m} for s, m in handle.certificates]
+                print(f"[CertificateParser] Found {len(results)} certificates")
+                return results
+            except Exception as exc:
+                print(f"[CertificateParser] Failed to parse certificates: {exc}")
+                return []
@@ -2,9 +2,14 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Union
 
-import apkutils2
+from utils.apk_utils import ApkHandle, ApkSource, open_apk
+from utils.axml import ManifestModel
+from utils.pattern_matcher import PatternMatcher
+
+if TYPE_CHECKING:  # pragma: no cover
+    from database.manifest_cache import ManifestCache
 
 
 class ComponentScanner:
@@ -25,20 +30,44 @@ class ComponentScanner:
         "android.permission.SYSTEM_ALERT_WINDOW",
     }
 
-    def scan(self, manifest: apkutils2.Manifest) -> Dict[str, Any]:
-        """Return exported components, intents and risky permissions."""
-        print("[ComponentScanner] Scanning manifest")
+    COMPONENT_TYPES = ("activity", "provider", "receiver", "service")
+
+    def __init__(self, ioc_keywords: Iterable[str] = (),
+                 cache: "ManifestCache | None" = None) -> None:
+        # ``ioc_keywords`` flag any permission containing one of them.
+        self._risky: PatternMatcher[str] = PatternMatcher.from_rules(
+            exact=((perm, perm) for perm in self.RISKY_PERMISSIONS),
+            substrings=((key, key) for key in ioc_keywords),
+        )
+        # With a cache, scan_apk() reuses features stored per APK digest.
+        self.cache = cache
+
+    @classmethod
+    def list_components(cls, manifest: Any) -> List[Dict[str, Any]]:
+        """Return ``{type, name, exported, actions}`` for every component.
+
+        ``manifest`` is a :class:`~utils.axml.ManifestModel`, whose typed
+        components are read directly, or an ``apkutils2.Manifest``.
+        """
+        components: List[Dict[str, Any]] = []
+        if isinstance(manifest, ManifestModel):
+            for comp in manifest.components:
+                if comp.kind in cls.COMPONENT_TYPES:
+                    components.append({
+                        "type": comp.kind,
+                        "name": comp.name or None,
+                        "exported": comp.exported is True,
+                        "actions": comp.actions,
+                    })
+            return components
+
         data = manifest.json() or {}
-        exported: List[Dict[str, str]] = []
-        intent_actions: List[str] = []
         app = data.get("application", {})
-        for comp_type in ["activity", "provider", "receiver", "service"]:
+        for comp_type in cls.COMPONENT_TYPES:
             comps = app.get(comp_type, [])
             if isinstance(comps, dict):
                 comps = [comps]
             for comp in comps:
-                exported_flag = comp.get("@android:exported") == "true"
-                name = comp.get("@android:name")
                 filters = comp.get("intent-filter", [])
                 if isinstance(filters, dict):
                     filters = [filters]
@@ -51,10 +80,51 @@ class ComponentScanner:
                         act_name = a.get("@android:name")
                         if act_name:
                             actions.append(act_name)
-                if exported_flag:
-                    exported.append({"type": comp_type, "name": name})
-                intent_actions.extend(actions)
-        perms = [p for p in manifest.permissions if p in self.RISKY_PERMISSIONS]
+                components.append({
+                    "type": comp_type,
+                    "name": comp.get("@android:name"),
+                    "exported": comp.get("@android:exported") == "true",
+                    "actions": actions,
+                })
+        return components
+
+    def scan(self, manifest: Union[Any, ApkHandle]) -> Dict[str, Any]:
+        """Return exported components, intents and risky permissions.
+
+        ``manifest`` is a decoded manifest (see :meth:`list_components`) or
+        an :class:`~utils.apk_utils.ApkHandle`.
+        """
+        print("[ComponentScanner] Scanning manifest")
+        if isinstance(manifest, ApkHandle):
+            handle, manifest = manifest, manifest.manifest
+            if manifest is None:
+                print(f"[ComponentScanner] No manifest in {handle.path}")
+                return self._result([], [])
+        return self._result(self.list_components(manifest), manifest.permissions)
+
+    def scan_apk(self, apk: ApkSource, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """Scan an APK, reading its components from the cache when enabled.
+
+        ``sha256`` saves hashing the APK when the caller already knows it.
+        """
+        if self.cache is None:
+            with open_apk(apk) as handle:
+                return self.scan(handle)
+        from .manifest_analyzer import ManifestAnalyzer  # imported here to avoid a cycle
+
+        features = ManifestAnalyzer(cache=self.cache).features(apk, sha256)
+        if not features:
+            return self._result([], [])
+        print("[ComponentScanner] Using cached manifest features")
+        return self._result(features["components"], features["permissions"])
+
+    def _result(self, components: List[Dict[str, Any]],
+                permissions: Iterable[str]) -> Dict[str, Any]:
+        exported = [
+            {"type": c["type"], "name": c["name"]} for c in components if c["exported"]
+        ]
+        intent_actions = [a for c in components for a in c["actions"]]
+        perms = [p for p in permissions if self._risky.has_match(p)]
         print(f"[ComponentScanner] Exported components: {exported}")
         print(f"[ComponentScanner] Risky permissions: {perms}")
         print(f"[ComponentScanner] Intent actions: {intent_actions}")
@@ -0,0 +1,197 @@
+# filename: analysis/manifest/dumpsys_parser.py
+"""Streaming, typed parser for ``dumpsys package`` output."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Set
+
+_PACKAGE_HEADER_RE = re.compile(r"^  Package \[([^\]]+)\] \(")
+
+
+@dataclass
+class PermissionState:
+    """A permission entry from an install or runtime permission list."""
+
+    name: str
+    granted: bool = False
+    flags: List[str] = field(default_factory=list)
+
+
+@dataclass
+class DumpsysPackage:
+    """Typed view of one ``Package [name]`` block from ``dumpsys package``."""
+
+    name: str
+    version_code: str = ""
+    version_name: str = ""
+    first_install_time: str = ""
+    last_update_time: str = ""
+    installer: str = ""
+    pkg_flags: List[str] = field(default_factory=list)
+    requested_permissions: List[str] = field(default_factory=list)
+    install_permissions: Dict[str, PermissionState] = field(default_factory=dict)
+    # Runtime grants of the first user block (normally user 0).
+    runtime_permissions: Dict[str, PermissionState] = field(default_factory=dict)
+
+    @property
+    def granted_permissions(self) -> List[str]:
+        """Names of install-time and runtime permissions currently granted."""
+        granted = {
+            name
+            for perms in (self.install_permissions, self.runtime_permissions)
+            for name, state in perms.items()
+            if state.granted
+        }
+        return sorted(granted)
+
+    @property
+    def permissions(self) -> List[str]:
+        """Every permission the package requested or holds a grant entry for."""
+        names = set(self.requested_permissions)
+        names.update(self.install_permissions)
+        names.update(self.runtime_permissions)
+        return sorted(names)
+
+
+_SUBSECTIONS = {
+    "requested permissions:": "requested",
+    "install permissions:": "install",
+    "runtime permissions:": "runtime",
+}
+_FLAGS_RE = re.compile(r"flags=\[([^\]]*)\]")
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(" "))
+
+
+class DumpsysPackageParser:
+    """Incremental, line-oriented parser for ``dumpsys package`` output.
+
+    Lines are fed one at a time with :meth:`feed`; a finished
+    :class:`DumpsysPackage` is returned whenever a package block ends, and
+    :meth:`close` flushes the last one. No text is retained beyond the record
+    being built, so memory use does not grow with the size of the dump.
+
+    Only blocks under the top-level ``Packages:`` heading are parsed; later
+    blocks such as ``Hidden system packages:`` (factory copies of updated
+    system apps) are ignored. Packages not in ``wanted`` are skipped.
+    """
+
+    def __init__(self, wanted: Set[str] | None = None) -> None:
+        self.wanted = wanted
+        self._current: DumpsysPackage | None = None
+        self._in_packages = True
+        self._seen: Set[str] = set()
+        self._section: str | None = None
+        self._section_indent = 0
+        self._user_blocks = 0
+
+    def _finish(self) -> DumpsysPackage | None:
+        record, self._current = self._current, None
+        self._section = None
+        return record
+
+    def feed(self, raw: str) -> DumpsysPackage | None:
+        line = raw.rstrip("\r\n")
+        match = _PACKAGE_HEADER_RE.match(line)
+        if match:
+            done = self._finish()
+            name = match.group(1)
+            if self._in_packages and name not in self._seen and (
+                self.wanted is None or name in self.wanted
+            ):
+                self._seen.add(name)
+                self._current = DumpsysPackage(name)
+                self._user_blocks = 0
+            return done
+        if line and not line[0].isspace():
+            self._in_packages = line.startswith("Packages:")
+            return self._finish()
+
+        record = self._current
+        stripped = line.strip()
+        if record is None or not stripped:
+            return None
+
+        indent = _indent(line)
+        if self._section and indent <= self._section_indent:
+            self._section = None
+
+        if self._section is None:
+            self._parse_field(record, stripped, indent)
+        else:
+            self._parse_entry(record, stripped)
+        return None
+
+    def _parse_field(self, record: DumpsysPackage, stripped: str, indent: int) -> None:
+        section = _SUBSECTIONS.get(stripped)
+        if section == "runtime":
+            # Only the first user's runtime grants are kept.
+            if self._user_blocks > 1:
+                section = "skip"
+        if section or stripped.endswith("permissions:"):
+            self._section = section or "skip"
+            self._section_indent = indent
+            return
+        if stripped.startswith("User ") and ":" in stripped:
+            self._user_blocks += 1
+            return
+        if stripped.startswith("versionCode="):
+            record.version_code = stripped.split()[0].split("=", 1)[1]
+        elif stripped.startswith("versionName="):
+            record.version_name = stripped.split("=", 1)[1]
+        elif stripped.startswith("firstInstallTime="):
+            record.first_install_time = stripped.split("=", 1)[1]
+        elif stripped.startswith("lastUpdateTime="):
+            record.last_update_time = stripped.split("=", 1)[1]
+        elif stripped.startswith("installerPackageName="):
+            installer = stripped.split("=", 1)[1]
+            record.installer = "" if installer == "null" else installer
+        elif stripped.startswith("pkgFlags=["):
+            record.pkg_flags = stripped[len("pkgFlags=["):].rstrip("]").split()
+
+    def _parse_entry(self, record: DumpsysPackage, stripped: str) -> None:
+        if self._section == "skip":
+            return
+        name, _, rest = stripped.partition(":")
+        name = name.strip()
+        if self._section == "requested":
+            record.requested_permissions.append(name)
+            return
+        flags_match = _FLAGS_RE.search(rest)
+        state = PermissionState(
+            name=name,
+            granted="granted=true" in rest,
+            flags=flags_match.group(1).replace("|", " ").split() if flags_match else [],
+        )
+        target = (
+            record.install_permissions
+            if self._section == "install"
+            else record.runtime_permissions
+        )
+        target[name] = state
+
+    def close(self) -> DumpsysPackage | None:
+        """Return the final record, if any."""
+        return self._finish()
+
+
+def parse_dumpsys_packages(
+    lines: Iterable[str], wanted: Set[str] | None = None, complete_only: bool = False
+) -> Iterator[DumpsysPackage]:
+    """Yield a :class:`DumpsysPackage` for every package block in ``lines``.
+
+    With ``complete_only`` the last block is dropped unless a later package
+    header or section closed it, since a stream cut short would end inside it.
+    """
+    parser = DumpsysPackageParser(wanted)
+    for line in lines:
+        record = parser.feed(line)
+        if record is not None:
+            yield record
+    record = parser.close()
+    if record is not None and not complete_only:
+        yield record
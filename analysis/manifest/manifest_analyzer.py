@@ -3,42 +3,100 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Union
 
-import apkutils2
+from utils.apk_utils import ApkHandle, ApkSource, open_apk
+from utils.axml import ManifestModel
+from .component_scanner import ComponentScanner
+
+if TYPE_CHECKING:  # pragma: no cover
+    from database.hash_cache import HashCache
+    from database.manifest_cache import ManifestCache
+
+# ``Manifest`` is a ManifestModel from the built-in AXML decoder, or an
+# ``apkutils2.Manifest`` for the rare manifests only apkutils2 can read.
+Manifest = Any
 
 
 class ManifestAnalyzer:
     """Extract and parse manifest information."""
 
-    def parse(self, apk_path: str) -> apkutils2.Manifest | None:
-        """Return a ``Manifest`` object for ``apk_path`` if possible."""
+    def __init__(self, cache: "ManifestCache | None" = None,
+                 hash_cache: "HashCache | None" = None) -> None:
+        # With a cache, features() is served per APK digest across runs;
+        # a hash cache saves re-reading unchanged APKs to compute that digest.
+        self.cache = cache
+        self.hash_cache = hash_cache
+
+    def features(self, apk: ApkSource, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """Return every extracted manifest feature of ``apk`` as one dict.
+
+        The keys are ``package_info``, ``permissions``, ``sdk_info``,
+        ``components`` (see :meth:`ComponentScanner.list_components`) and
+        ``certificate_fingerprints``. With a cache they are looked up by the
+        APK's SHA-256 (``sha256`` if given, else hashed) before decoding.
+        The result is empty when the APK has no readable manifest.
+        """
+        with open_apk(apk, self.hash_cache) as handle:
+            if self.cache is None:
+                return self._extract_features(handle) or {}
+            key = sha256 or handle.sha256
+            if not key:
+                return {}
+            return self.cache.get_or_compute(key, lambda: self._extract_features(handle)) or {}
+
+    def _extract_features(self, handle: ApkHandle) -> Optional[Dict[str, Any]]:
+        manifest = self.parse(handle)
+        if manifest is None:
+            return None
+        return {
+            "package_info": self.get_package_info(manifest),
+            "permissions": self.get_permissions(manifest),
+            "sdk_info": self.get_sdk_info(manifest),
+            "components": ComponentScanner.list_components(manifest),
+            "certificate_fingerprints": dict(handle.certificate_fingerprints),
+        }
+
+    def parse(self, apk_path: Union[str, ApkHandle],
+              fields: Optional[Iterable[str]] = None) -> Manifest | None:
+        """Return the decoded manifest for ``apk_path`` if possible.
+
+        Manifests are decoded by :mod:`utils.axml`, without apkutils2.
+        ``fields`` (see :data:`utils.axml.FIELDS`) stops decoding once those
+        are known. Given an :class:`~utils.apk_utils.ApkHandle` the handle's
+        memoized manifest is returned, so repeated calls decode it only once.
+        """
+        if isinstance(apk_path, ApkHandle):
+            print(f"[ManifestAnalyzer] Parsing manifest from {apk_path.path}")
+            return apk_path.read_manifest(fields)
         if not os.path.isfile(apk_path):
             print(f"[ManifestAnalyzer] APK not found: {apk_path}")
             return None
         try:
             print(f"[ManifestAnalyzer] Parsing manifest from {apk_path}")
-            apk = apkutils2.APK(apk_path)
-            xml = apk.get_org_manifest()
-            if not xml:
-                print("[ManifestAnalyzer] get_org_manifest returned no data")
-                return None
-            return apkutils2.Manifest(xml)
+            with ApkHandle(apk_path) as handle:
+                manifest = handle.read_manifest(fields)
+            if manifest is None:
+                print("[ManifestAnalyzer] No manifest could be decoded")
+            return manifest
         except Exception as exc:
             print(f"[ManifestAnalyzer] Error parsing manifest: {exc}")
             return None
 
-    def to_dict(self, manifest: apkutils2.Manifest) -> Dict[str, Any]:
-        """Convert a Manifest object to a dictionary."""
+    def to_dict(self, manifest: Union[Manifest, ApkHandle]) -> Dict[str, Any]:
+        """Convert a Manifest object (or a handle's manifest) to a dictionary."""
         try:
-            data = manifest.json() or {}
+            if isinstance(manifest, ApkHandle):
+                data = manifest.manifest_dict
+            else:
+                data = manifest.json() or {}
             print(f"[ManifestAnalyzer] Manifest dictionary keys: {list(data.keys())}")
             return data
         except Exception as exc:
             print(f"[ManifestAnalyzer] Failed to convert manifest to dict: {exc}")
             return {}
 
-    def get_package_info(self, manifest: apkutils2.Manifest) -> Dict[str, str]:
+    def get_package_info(self, manifest: Manifest) -> Dict[str, str]:
         """Return basic package metadata."""
         info = {
             "package": manifest.package_name or "",
@@ -49,7 +107,7 @@ class ManifestAnalyzer:
         print(f"[ManifestAnalyzer] Package info: {info}")
         return info
 
-    def get_permissions(self, manifest: apkutils2.Manifest) -> List[str]:
+    def get_permissions(self, manifest: Manifest) -> List[str]:
         """Return all permissions requested by the app."""
         try:
             perms = list(manifest.permissions)
@@ -59,8 +117,14 @@ class ManifestAnalyzer:
             print(f"[ManifestAnalyzer] Failed to get permissions: {exc}")
             return []
 
-    def get_sdk_info(self, manifest: apkutils2.Manifest) -> Dict[str, str]:
+    def get_sdk_info(self, manifest: Union[Manifest, ApkHandle]) -> Dict[str, str]:
         """Return ``minSdk`` and ``targetSdk`` levels if declared."""
+        if isinstance(manifest, ApkHandle):
+            manifest = manifest.manifest
+        if isinstance(manifest, ManifestModel):
+            info = {"min_sdk": manifest.min_sdk, "target_sdk": manifest.target_sdk}
+            print(f"[ManifestAnalyzer] SDK info: {info}")
+            return info
         data = self.to_dict(manifest)
         uses_sdk = data.get("uses-sdk", {})
         if isinstance(uses_sdk, list):
@@ -4,10 +4,14 @@ from __future__ import annotations
 
 from typing import Dict, Optional
 
-from utils import apk_utils, hash_utils
+from utils import apk_utils
+from utils.apk_utils import ApkSource
 
+# Every function accepts a path or an ``ApkHandle``; with a handle the APK is
+# opened once and each artifact is computed once across all calls.
 
-def get_manifest_bytes(apk_path: str) -> Optional[bytes]:
+
+def get_manifest_bytes(apk_path: ApkSource) -> Optional[bytes]:
     """Return the raw manifest bytes from the APK."""
     print(f"[manifest_info] get_manifest_bytes: {apk_path}")
     data = apk_utils.extract_manifest(apk_path)
@@ -18,7 +22,7 @@ def get_manifest_bytes(apk_path: str) -> Optional[bytes]:
     return data
 
 
-def get_manifest_xml(apk_path: str) -> Optional[str]:
+def get_manifest_xml(apk_path: ApkSource) -> Optional[str]:
     """Return the decoded manifest XML string."""
     print(f"[manifest_info] get_manifest_xml: {apk_path}")
     xml = apk_utils.extract_manifest_xml(apk_path)
@@ -29,18 +33,14 @@ def get_manifest_xml(apk_path: str) -> Optional[str]:
     return xml
 
 
-def get_certificate_fingerprints(apk_path: str) -> Dict[str, str]:
+def get_certificate_fingerprints(apk_path: ApkSource) -> Dict[str, str]:
     """Return SHA-256, SHA-1 and MD5 fingerprints for the APK certificate."""
     print(f"[manifest_info] get_certificate_fingerprints: {apk_path}")
-    cert = apk_utils.extract_certificate(apk_path)
-    if not cert:
+    with apk_utils.open_apk(apk_path) as handle:
+        fingerprints = dict(handle.certificate_fingerprints)
+    if not fingerprints:
         print("[manifest_info] Certificate not found")
         return {}
-    fingerprints = {
-        "sha256": hash_utils.sha256_digest(cert),
-        "sha1": hash_utils.sha1_digest(cert),
-        "md5": hash_utils.md5_digest(cert),
-    }
     print(f"[manifest_info] Fingerprints: {fingerprints}")
     return fingerprints
 
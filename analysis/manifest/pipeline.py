@@ -3,20 +3,55 @@
 
 from __future__ import annotations
 
-from typing import List, Tuple, Dict
+from typing import TYPE_CHECKING, List, Mapping, Sequence, Tuple, Dict
 
 from .scanner import scan_packages
+from .scan_engine import DEFAULT_PER_DEVICE, DEFAULT_WORKERS, scan_fleet
 from .report_writer import write_json_report, write_csv_report
 
+if TYPE_CHECKING:  # pragma: no cover
+    from database.scan_cache import ScanCache
 
-def analyze_packages(serial: str, packages: List[str]) -> Tuple[str, str, List[Dict[str, List[str]]]]:
+
+def analyze_packages(serial: str, packages: List[str],
+                     workers: int = 1,
+                     cache: "ScanCache | None" = None) -> Tuple[str, str, List[Dict[str, List[str]]]]:
     """Scan packages and output JSON and CSV reports.
 
+    With a ``cache`` unchanged packages are taken from previous runs.
+
     Returns:
         Tuple[str, str]: Paths to the JSON and CSV reports.
     """
     print(f"[DEBUG] Starting manifest scan on {serial} for {len(packages)} packages")
-    results = scan_packages(serial, packages)
+    if cache is None:
+        results = scan_packages(serial, packages, workers=workers)
+    else:
+        results = scan_packages(serial, packages, workers=workers, cache=cache)
+        stats = cache.stats()
+        print(f"[DEBUG] Scan cache: {stats['hits']} hit(s), {stats['misses']} miss(es)")
+    print(f"[DEBUG] Finished scanning. Generating reports...")
+    json_path = write_json_report(results)
+    csv_path = write_csv_report(results)
+    print(f"[DEBUG] Reports written: JSON -> {json_path}, CSV -> {csv_path}")
+    return json_path, csv_path, results
+
+
+def analyze_fleet(targets: Mapping[str, Sequence[str]],
+                  workers: int = DEFAULT_WORKERS,
+                  per_device: int = DEFAULT_PER_DEVICE) -> Tuple[str, str, List[Dict[str, List[str]]]]:
+    """Scan ``{serial: packages}`` concurrently and write one combined report.
+
+    Each result carries a ``serial`` key; rows are grouped by device in the
+    order of ``targets`` and keep the package order within each device.
+    """
+    print(f"[DEBUG] Starting fleet manifest scan on {len(targets)} device(s)")
+    per_serial = scan_fleet(targets, workers=workers, per_device=per_device)
+    results = [
+        {"serial": serial, **item}
+        for serial in targets
+        for item in per_serial[serial]
+    ]
     print(f"[DEBUG] Finished scanning. Generating reports...")
     json_path = write_json_report(results)
     csv_path = write_csv_report(results)
@@ -0,0 +1,180 @@
+"""Plan bulk APK pulls: resolve every path and size up front, then schedule.
+
+A plan is built from one ``pm list packages -f`` (base APK paths) and one
+batched ``stat`` over the package directories, which also picks up split
+APKs. Pulls are then run from a size-ordered queue, largest first to avoid a
+single big APK straggling at the end, or smallest first for quick feedback,
+while aggregate throughput and an ETA are reported.
+"""
+
+from __future__ import annotations
+
+import os
+import posixpath
+import shlex
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from analysis.apps.inventory import parse_package_line
+from utils.adb_utils import adb_shell, batched_commands
+
+PULL_ORDERS = ("largest", "smallest")
+DEFAULT_PULL_ORDER = os.environ.get("NETHIRA_PULL_ORDER", "largest")
+
+
+@dataclass
+class PlannedPull:
+    """One APK file to transfer."""
+
+    package: str
+    remote_path: str
+    size: int = 0
+
+
+@dataclass
+class PullPlan:
+    """Every APK of the requested packages, in scheduling order."""
+
+    serial: str
+    items: List[PlannedPull] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(item.size for item in self.items)
+
+    def paths_by_package(self) -> Dict[str, List[str]]:
+        grouped: Dict[str, List[str]] = {}
+        for item in self.items:
+            grouped.setdefault(item.package, []).append(item.remote_path)
+        return grouped
+
+    def ordered(self, order: str = DEFAULT_PULL_ORDER) -> List[PlannedPull]:
+        if order not in PULL_ORDERS:
+            raise ValueError(f"unknown pull order {order!r}; expected one of {PULL_ORDERS}")
+        return sorted(self.items, key=lambda item: item.size, reverse=order == "largest")
+
+
+def _stat_targets(base_path: str) -> str:
+    # Split APKs live next to base.apk in a per-package directory; other
+    # layouts (e.g. /system/framework) share a directory, so stat only the file.
+    if posixpath.basename(base_path) == "base.apk":
+        return f"{shlex.quote(posixpath.dirname(base_path))}/*.apk"
+    return shlex.quote(base_path)
+
+
+def parse_stat_output(output: str) -> Dict[str, int]:
+    """Parse ``stat -c '%s %n'`` lines into ``{path: size}``."""
+    sizes: Dict[str, int] = {}
+    for line in output.splitlines():
+        size, _, path = line.strip().partition(" ")
+        if size.isdigit() and path:
+            sizes[path] = int(size)
+    return sizes
+
+
+def plan_pulls(serial: str, packages: Optional[Iterable[str]] = None) -> PullPlan:
+    """Resolve the APK paths and sizes of ``packages`` (all when ``None``)."""
+    wanted = None if packages is None else list(dict.fromkeys(packages))
+    bases: Dict[str, str] = {}
+    output = adb_shell(serial, "pm list packages -f")
+    if output != "N/A":
+        for line in output.splitlines():
+            record = parse_package_line(line)
+            if record and record.apk_path:
+                bases[record.name] = record.apk_path
+    names = list(bases) if wanted is None else wanted
+    plan = PullPlan(serial, missing=[name for name in names if name not in bases])
+
+    targets = list(dict.fromkeys(_stat_targets(bases[n]) for n in names if n in bases))
+    sizes: Dict[str, int] = {}
+    for cmd in batched_commands("stat -c '%s %n'", targets):
+        output = adb_shell(serial, cmd)
+        if output != "N/A":
+            sizes.update(parse_stat_output(output))
+
+    by_dir: Dict[str, List[str]] = {}
+    for path in sizes:
+        by_dir.setdefault(posixpath.dirname(path), []).append(path)
+    for name in names:
+        base = bases.get(name)
+        if base is None:
+            continue
+        if posixpath.basename(base) == "base.apk":
+            paths = sorted(by_dir.get(posixpath.dirname(base), [])) or [base]
+        else:
+            paths = [base]
+        for path in paths:
+            plan.items.append(PlannedPull(name, path, sizes.get(path, 0)))
+    print(f"[PullPlanner] {len(plan.items)} APK(s) for {len(names) - len(plan.missing)} "
+          f"package(s), {plan.total_bytes / 1e6:.1f} MB on {serial}")
+    return plan
+
+
+class PullProgress:
+    """Aggregate byte counter reporting throughput and ETA."""
+
+    def __init__(self, total_bytes: int, total_files: int,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.total_bytes = total_bytes
+        self.total_files = total_files
+        self.clock = clock
+        self.started = clock()
+        self.done_bytes = 0
+        self.done_files = 0
+        self._lock = threading.Lock()
+
+    def advance(self, size: int) -> str:
+        """Record a finished file and return the progress line."""
+        with self._lock:
+            self.done_bytes += size
+            self.done_files += 1
+            return self.report()
+
+    @property
+    def rate(self) -> float:
+        elapsed = self.clock() - self.started
+        return self.done_bytes / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> float | None:
+        rate = self.rate
+        if rate <= 0:
+            return None
+        return max(0, self.total_bytes - self.done_bytes) / rate
+
+    def report(self) -> str:
+        eta = self.eta
+        eta_text = "--" if eta is None else f"{eta:.0f}s"
+        return (
+            f"[PullPlanner] {self.done_files}/{self.total_files} files, "
+            f"{self.done_bytes / 1e6:.1f}/{self.total_bytes / 1e6:.1f} MB, "
+            f"{self.rate / 1e6:.1f} MB/s, ETA {eta_text}"
+        )
+
+
+def run_plan(items: List[PlannedPull], pull: Callable[[PlannedPull], Any],
+             workers: int = 4,
+             clock: Callable[[], float] = time.monotonic) -> List[Tuple[PlannedPull, Any]]:
+    """Pull ``items`` in the given order with ``workers`` threads.
+
+    ``pull`` is called per item; its return value (or the exception it
+    raised) is paired with the item. Results come back in ``items`` order.
+    """
+    progress = PullProgress(sum(i.size for i in items), len(items), clock)
+
+    def run(item: PlannedPull) -> Any:
+        try:
+            result: Any = pull(item)
+        except Exception as exc:  # noqa: BLE001 - reported per item
+            result = exc
+        print(progress.advance(item.size))
+        return result
+
+    # The executor consumes submissions in order, so the queue keeps the plan's order.
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(run, items))
+    return list(zip(items, results))
@@ -29,12 +29,16 @@ def write_json_report(results: List[Dict[str, List[str]]], prefix: str = "manife
 def write_csv_report(results: List[Dict[str, List[str]]], prefix: str = "manifest") -> str:
     """Write results to a CSV file and return the path."""
     path = _get_path(prefix, "csv")
+    # Fleet scans tag each row with the device it came from.
+    with_serial = any("serial" in item for item in results)
     with open(path, "w", newline="", encoding="utf-8") as csvfile:
         writer = csv.writer(csvfile)
-        writer.writerow(["package", "permissions", "suspicious"])
+        header = ["package", "permissions", "suspicious"]
+        writer.writerow(["serial", *header] if with_serial else header)
         for item in results:
             perms = ",".join(item.get("permissions", []))
             suspicious = ",".join(item.get("suspicious", []))
-            writer.writerow([item.get("package", ""), perms, suspicious])
+            row = [item.get("package", ""), perms, suspicious]
+            writer.writerow([item.get("serial", ""), *row] if with_serial else row)
     print(f"[DEBUG] CSV report saved to {path}")
     return path
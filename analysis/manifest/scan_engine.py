@@ -0,0 +1,122 @@
+# filename: analysis/manifest/scan_engine.py
+"""Concurrent permission scanning across packages and devices."""
+
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Deque, Dict, List, Mapping, Sequence, Tuple
+
+from . import scanner
+
+DEFAULT_WORKERS = int(os.environ.get("NETHIRA_SCAN_WORKERS", "16"))
+DEFAULT_PER_DEVICE = int(os.environ.get("NETHIRA_SCAN_PER_DEVICE", "4"))
+
+Result = Dict[str, List[str]]
+
+
+class ScanEngine:
+    """Scan many packages on many devices with a bounded worker pool.
+
+    ``workers`` caps the total number of concurrent scans and ``per_device``
+    caps how many run against any one device. Tasks for a device are only
+    submitted when one of its slots frees up, so a slow device never ties up
+    workers that other devices could use. Results keep the input order and a
+    failing package produces an ``error`` entry instead of aborting the run.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS,
+                 per_device: int = DEFAULT_PER_DEVICE,
+                 bulk: bool | None = None) -> None:
+        self.workers = max(1, workers)
+        self.per_device = max(1, per_device)
+        self.bulk = bulk
+
+    def _use_bulk(self, packages: Sequence[str]) -> bool:
+        if self.bulk is None:
+            return len(packages) > scanner.BULK_THRESHOLD
+        return self.bulk
+
+    @staticmethod
+    def _scan_one(serial: str, package: str) -> Result:
+        try:
+            return scanner.scan_app(serial, package)
+        except Exception as exc:  # noqa: BLE001 - isolate per-package failures
+            print(f"[ScanEngine] {package} on {serial} failed: {exc}")
+            return scanner.error_result(package, str(exc))
+
+    def scan(self, targets: Mapping[str, Sequence[str]]) -> Dict[str, List[Result]]:
+        """Scan ``{serial: packages}`` and return ``{serial: results}``."""
+        total = sum(len(p) for p in targets.values())
+        print(f"[ScanEngine] Scanning {total} package(s) on {len(targets)} device(s)")
+        concurrency = min(self.workers, self.per_device * len(targets))
+        if concurrency < self.workers:
+            print(f"[ScanEngine] Running at most {concurrency} scan(s) at once: "
+                  f"{self.per_device} per device caps {self.workers} worker(s)")
+        results: Dict[str, List[Result | None]] = {
+            serial: [None] * len(pkgs) for serial, pkgs in targets.items()
+        }
+        queues: Dict[str, Deque[Tuple[int, str]]] = {serial: deque() for serial in targets}
+        running: Dict[str, int] = {serial: 0 for serial in targets}
+        meta: Dict[Future, Tuple[str, str, object]] = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix="nethira-scan") as pool:
+
+            def fill(serial: str) -> None:
+                queue = queues[serial]
+                while queue and running[serial] < self.per_device:
+                    idx, pkg = queue.popleft()
+                    running[serial] += 1
+                    fut = pool.submit(self._scan_one, serial, pkg)
+                    meta[fut] = (serial, "package", idx)
+
+            for serial, pkgs in targets.items():
+                if pkgs and self._use_bulk(pkgs):
+                    running[serial] += 1
+                    fut = pool.submit(scanner.scan_bulk_dump, serial, list(pkgs))
+                    meta[fut] = (serial, "bulk", None)
+                else:
+                    queues[serial].extend(enumerate(pkgs))
+                    fill(serial)
+
+            while meta:
+                done, _ = wait(list(meta), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    serial, kind, idx = meta.pop(fut)
+                    running[serial] -= 1
+                    if kind == "package":
+                        results[serial][idx] = fut.result()
+                    else:
+                        self._merge_bulk(serial, targets[serial], fut, results, queues)
+                    fill(serial)
+
+        print("[ScanEngine] Scan complete")
+        return {serial: list(res) for serial, res in results.items()}  # type: ignore[misc]
+
+    @staticmethod
+    def _merge_bulk(serial: str, packages: Sequence[str], fut: Future,
+                    results: Dict[str, List[Result | None]],
+                    queues: Dict[str, Deque[Tuple[int, str]]]) -> None:
+        try:
+            found = fut.result()
+        except Exception as exc:  # noqa: BLE001 - fall back to per-package scans
+            print(f"[ScanEngine] Bulk dump failed on {serial}: {exc}")
+            found = {}
+        for idx, pkg in enumerate(packages):
+            if pkg in found:
+                results[serial][idx] = found[pkg]
+            else:
+                queues[serial].append((idx, pkg))
+        if queues[serial]:
+            print(f"[ScanEngine] {len(queues[serial])} package(s) on {serial} "
+                  f"need individual scans")
+
+
+def scan_fleet(targets: Mapping[str, Sequence[str]],
+               workers: int = DEFAULT_WORKERS,
+               per_device: int = DEFAULT_PER_DEVICE,
+               bulk: bool | None = None) -> Dict[str, List[Result]]:
+    """Convenience wrapper around :meth:`ScanEngine.scan`."""
+    return ScanEngine(workers, per_device, bulk).scan(targets)
@@ -3,10 +3,16 @@
 
 from __future__ import annotations
 
+import asyncio
 import re
-from typing import List, Dict
+from typing import TYPE_CHECKING, List, Dict, Tuple
 
-from utils import adb_shell
+from utils import adb_async, adb_shell, iter_shell_lines
+from utils.pattern_matcher import AhoCorasick
+from .dumpsys_parser import DumpsysPackage, parse_dumpsys_packages
+
+if TYPE_CHECKING:  # pragma: no cover
+    from database.scan_cache import ScanCache
 
 # Basic list of high-risk permissions for demonstration
 SUSPICIOUS_KEYWORDS = [
@@ -19,25 +25,184 @@ SUSPICIOUS_KEYWORDS = [
     "SYSTEM_ALERT_WINDOW",
 ]
 
+_SUSPICIOUS = AhoCorasick((key, key) for key in SUSPICIOUS_KEYWORDS)
+_PERMISSION_RE = re.compile(r"android.permission.[A-Z_\.]+")
+BULK_DUMPSYS_CMD = "dumpsys package packages"
+# Below this many packages one dumpsys per package is cheaper than the full dump.
+BULK_THRESHOLD = 8
+# Section headers are kept so the parser can tell live packages from hidden
+# ones; permission section and user headers keep the grant state parseable.
+VERSION_PROBE_CMD = (
+    'dumpsys package packages | grep -E "^[^ ]|^  Package \\[|versionCode=|lastUpdateTime='
+    '|permissions:$|granted=|^    User [0-9]"'
+)
+
 
 def scan_app(serial: str, package: str) -> Dict[str, List[str]]:
     """Return permission info for a single package."""
     print(f"[DEBUG] Scanning permissions for {package} on {serial}")
     output = adb_shell(serial, f"dumpsys package {package}")
-    perms = sorted(set(re.findall(r"android.permission.[A-Z_\.]+", output)))
-    suspicious = [p for p in perms if any(key in p for key in SUSPICIOUS_KEYWORDS)]
+    return _build_result(package, output)
+
+
+def _build_result(package: str, output: str) -> Dict[str, List[str]]:
+    # Only the parsed package block counts: the resolver tables and other
+    # packages' entries in the same output also mention permissions.
+    record = next(parse_dumpsys_packages(output.splitlines(), {package}), None)
+    if record is None:
+        return _result(package, [], None)
+    return _result_from_record(record)
+
+
+def _result(package: str, perms: List[str],
+            record: DumpsysPackage | None) -> Dict[str, List[str]]:
+    suspicious = [p for p in perms if _SUSPICIOUS.has_match(p)]
     return {
         "package": package,
         "permissions": perms,
         "suspicious": suspicious,
+        "requested": list(record.requested_permissions) if record else [],
+        "granted": record.granted_permissions if record else [],
+    }
+
+
+def _result_from_record(record: DumpsysPackage) -> Dict[str, List[str]]:
+    """Build a result from a parsed record; shared by per-package and bulk scans."""
+    perms = sorted({m for name in record.permissions for m in _PERMISSION_RE.findall(name)})
+    return _result(record.name, perms, record)
+
+
+def scan_bulk_dump(serial: str, packages: List[str]) -> Dict[str, Dict[str, List[str]]]:
+    """Return results for the ``packages`` found in one bulk dumpsys stream.
+
+    Packages absent from the output are simply missing from the mapping.
+    """
+    print(f"[DEBUG] Bulk scanning {len(packages)} package(s) on {serial}")
+    found: Dict[str, Dict[str, List[str]]] = {}
+    lines = iter_shell_lines(serial, BULK_DUMPSYS_CMD)
+    # A dropped stream must not pass off its last, partial block as complete.
+    for record in parse_dumpsys_packages(lines, set(packages), complete_only=True):
+        found[record.name] = _result_from_record(record)
+    return found
+
+
+def scan_packages_bulk(serial: str, packages: List[str]) -> List[Dict[str, List[str]]]:
+    """Scan packages from a single streamed ``dumpsys package packages``.
+
+    Packages missing from the bulk output (some devices truncate it) are
+    scanned individually with :func:`scan_app`, as is the last package when
+    nothing follows its block to show that the stream ended cleanly.
+    """
+    found = scan_bulk_dump(serial, packages)
+    missing = [pkg for pkg in dict.fromkeys(packages) if pkg not in found]
+    if missing:
+        print(f"[DEBUG] {len(missing)} package(s) missing from bulk dump, scanning individually")
+        for pkg in missing:
+            found[pkg] = scan_app(serial, pkg)
+    return [found[pkg] for pkg in packages]
+
+
+def _probe(serial: str, packages: List[str]) -> Dict[str, DumpsysPackage]:
+    lines = iter_shell_lines(serial, VERSION_PROBE_CMD)
+    records = parse_dumpsys_packages(lines, set(packages), complete_only=True)
+    return {record.name: record for record in records}
+
+
+def probe_versions(serial: str, packages: List[str]) -> Dict[str, Tuple[str, str]]:
+    """Return ``{package: (versionCode, lastUpdateTime)}`` from a filtered dump.
+
+    The dump is filtered on the device, so only a few lines per package cross
+    the wire.
+    """
+    return {
+        name: (record.version_code, record.last_update_time)
+        for name, record in _probe(serial, packages).items()
     }
 
 
-def scan_packages(serial: str, packages: List[str]) -> List[Dict[str, List[str]]]:
-    """Scan multiple packages on a device."""
+def _scan_with_cache(serial: str, packages: List[str], bulk: bool | None,
+                     workers: int, cache: "ScanCache") -> List[Dict[str, List[str]]]:
+    probed = _probe(serial, packages)
+    versions = {
+        name: (record.version_code, record.last_update_time) for name, record in probed.items()
+    }
+    found: Dict[str, Dict[str, List[str]]] = {}
+    stale: List[str] = []
+    for pkg in dict.fromkeys(packages):
+        # Unknown versions are looked up as ("", "") so they count as misses.
+        hit = cache.get(serial, pkg, *versions.get(pkg, ("", "")))
+        if hit is None:
+            stale.append(pkg)
+        else:
+            # Grants change without an update, so they come from this probe.
+            hit["granted"] = probed[pkg].granted_permissions
+            found[pkg] = hit
+    print(f"[scan_cache] {serial}: {len(found)} hit(s), {len(stale)} miss(es)")
+
+    if stale:
+        for result in scan_packages(serial, stale, bulk=bulk, workers=workers):
+            pkg = result["package"]
+            found[pkg] = result
+            version = versions.get(pkg)
+            if version and version[0] and "error" not in result:
+                cache.put(serial, pkg, *version,
+                          {k: v for k, v in result.items() if k != "granted"})
+    return [found[pkg] for pkg in packages]
+
+
+def error_result(package: str, error: str) -> Dict[str, List[str]]:
+    """Return an empty result recording why ``package`` could not be scanned."""
+    result = _result(package, [], None)
+    result["error"] = error
+    return result
+
+
+def scan_packages(serial: str, packages: List[str],
+                  bulk: bool | None = None,
+                  workers: int = 1,
+                  cache: "ScanCache | None" = None) -> List[Dict[str, List[str]]]:
+    """Scan multiple packages on a device.
+
+    ``bulk`` selects one streamed dumpsys for all packages; by default it is
+    used once more than :data:`BULK_THRESHOLD` packages are requested. With
+    ``workers`` above 1 up to that many packages are scanned concurrently by
+    :class:`~analysis.manifest.scan_engine.ScanEngine`; the engine's
+    per-device limit is raised to match, as there is only one device. Given a ``cache``,
+    packages whose versionCode and lastUpdateTime are unchanged since the
+    last run are served from it and only the rest are scanned; ``granted``
+    is never cached and always reflects the device's current grants.
+    """
+    if cache is not None:
+        return _scan_with_cache(serial, packages, bulk, workers, cache)
+    if workers > 1:
+        from .scan_engine import ScanEngine  # imported here to avoid a cycle
+
+        engine = ScanEngine(workers=workers, per_device=workers, bulk=bulk)
+        return engine.scan({serial: packages})[serial]
+
     print(f"[DEBUG] Beginning scan of {len(packages)} package(s)")
-    results = []
-    for pkg in packages:
-        results.append(scan_app(serial, pkg))
+    if bulk is None:
+        bulk = len(packages) > BULK_THRESHOLD
+    if bulk:
+        results = scan_packages_bulk(serial, packages)
+    else:
+        results = []
+        for pkg in packages:
+            results.append(scan_app(serial, pkg))
     print("[DEBUG] Package scan complete")
     return results
+
+
+async def scan_app_async(serial: str, package: str) -> Dict[str, List[str]]:
+    """Async variant of :func:`scan_app` built on :mod:`utils.adb_async`."""
+    print(f"[DEBUG] Scanning permissions for {package} on {serial}")
+    output = await adb_async.adb_shell(serial, f"dumpsys package {package}")
+    return _build_result(package, output)
+
+
+async def scan_packages_async(serial: str, packages: List[str]) -> List[Dict[str, List[str]]]:
+    """Scan packages concurrently; the per-device limit caps parallel dumpsys calls."""
+    print(f"[DEBUG] Beginning async scan of {len(packages)} package(s)")
+    results = await asyncio.gather(*(scan_app_async(serial, pkg) for pkg in packages))
+    print("[DEBUG] Package scan complete")
+    return list(results)
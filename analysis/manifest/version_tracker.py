@@ -7,35 +7,52 @@ import os
 from datetime import datetime
 from typing import List, Tuple
 
+from utils.csv_appender import BufferedCSVAppender
+
+HEADER = ["timestamp", "package", "version", "sha256"]
+
 
 class VersionTracker:
-    """Append version and hash details to a timeline CSV."""
+    """Append version and hash details to a timeline CSV.
+
+    By default every :meth:`record` is written (under the file lock) before
+    it returns, so other trackers on the same file see it immediately.
+    ``buffer_options`` (e.g. ``max_rows=500``) are passed to
+    :class:`~utils.csv_appender.BufferedCSVAppender` to batch writes instead;
+    callers that batch should call :meth:`flush` or :meth:`close` when done.
+    """
 
-    def __init__(self, timeline_file: str = "output/update_timeline.csv") -> None:
+    def __init__(self, timeline_file: str = "output/update_timeline.csv",
+                 **buffer_options) -> None:
         self.timeline_file = timeline_file
         os.makedirs(os.path.dirname(self.timeline_file), exist_ok=True)
+        buffer_options.setdefault("max_rows", 1)
+        self._appender = BufferedCSVAppender(self.timeline_file, HEADER, **buffer_options)
         print(f"[VersionTracker] Timeline file: {self.timeline_file}")
 
     def record(self, package: str, version: str, sha256: str) -> None:
         """Add an entry for the given package version."""
-        write_header = not os.path.exists(self.timeline_file)
-        with open(self.timeline_file, "a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            if write_header:
-                writer.writerow(["timestamp", "package", "version", "sha256"])
-                print("[VersionTracker] Writing header to timeline")
-            print(
-                f"[VersionTracker] Recording {package} version {version} sha256 {sha256}"
-            )
-            writer.writerow([
-                datetime.utcnow().isoformat(timespec="seconds"),
-                package,
-                version,
-                sha256,
-            ])
+        print(
+            f"[VersionTracker] Recording {package} version {version} sha256 {sha256}"
+        )
+        self._appender.append([
+            datetime.utcnow().isoformat(timespec="seconds"),
+            package,
+            version,
+            sha256,
+        ])
+
+    def flush(self) -> None:
+        """Write any buffered entries to the timeline."""
+        self._appender.flush()
+
+    def close(self) -> None:
+        """Flush buffered entries and release the appender."""
+        self._appender.close()
 
     def history(self, package: str) -> List[Tuple[str, str, str, str]]:
         """Return timeline rows for ``package``."""
+        self.flush()
         if not os.path.exists(self.timeline_file):
             return []
         rows: List[Tuple[str, str, str, str]] = []
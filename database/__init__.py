@@ -0,0 +1,8 @@
+"""Local SQLite storage used for caching analysis results."""
+
+from .apk_store import APKStore
+from .hash_cache import HashCache
+from .manifest_cache import ManifestCache
+from .scan_cache import ScanCache
+
+__all__ = ["APKStore", "HashCache", "ManifestCache", "ScanCache"]
@@ -0,0 +1,251 @@
+# Filename: apk_store.py
+"""Content-addressed store for pulled APKs.
+
+Each distinct APK is kept once under ``blobs/<aa>/<sha256>.apk``. The
+per-device copies under the extractor's output directory become hardlinks to
+that blob (falling back to a symlink or copy on filesystems without
+hardlinks), and a SQLite index maps ``(serial, package, remote path)`` and the
+package version to the blob. Analysis results can be cached against the blob
+hash so identical APKs from different devices are only analyzed once.
+:meth:`APKStore.gc` evicts least recently used blobs to keep the store under
+a size bound.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .db_config import APK_STORE_DIR
+from .db_conn import connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    serial TEXT NOT NULL,
+    package TEXT NOT NULL,
+    remote_path TEXT NOT NULL,
+    version TEXT NOT NULL DEFAULT '',
+    sha256 TEXT NOT NULL,
+    local_path TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (serial, package, remote_path)
+);
+CREATE INDEX IF NOT EXISTS refs_sha ON refs (sha256);
+CREATE TABLE IF NOT EXISTS results (
+    sha256 TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (sha256, kind)
+);
+"""
+
+
+class APKStore:
+    """Deduplicating blob store with an index of device references."""
+
+    def __init__(self, root: str = APK_STORE_DIR,
+                 index_path: Optional[str] = None) -> None:
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.index_path = index_path or os.path.join(root, "index.sqlite3")
+        self._conn = connect(self.index_path)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        print(f"[APKStore] Using {root}")
+
+    # -- blobs -----------------------------------------------------------
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.blob_dir, sha256[:2], f"{sha256}.apk")
+
+    def has_blob(self, sha256: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM blobs WHERE sha256=?", (sha256,)
+            ).fetchone()
+        return row is not None and os.path.exists(self.blob_path(sha256))
+
+    def known_hashes(self) -> set:
+        """Return the hashes of every blob currently in the store."""
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT sha256 FROM blobs")}
+
+    def touch(self, sha256: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE blobs SET last_access=? WHERE sha256=?", (time.time(), sha256)
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _link(blob: str, local_path: str) -> None:
+        if os.path.lexists(local_path):
+            os.remove(local_path)
+        try:
+            os.link(blob, local_path)
+        except OSError:
+            try:
+                os.symlink(os.path.abspath(blob), local_path)
+            except OSError:
+                shutil.copy2(blob, local_path)
+
+    def ingest(self, local_path: str, sha256: str) -> str:
+        """Move ``local_path`` into the store (or drop it as a duplicate).
+
+        ``local_path`` is replaced by a link to the blob, so callers can keep
+        using it. Returns the blob path.
+        """
+        blob = self.blob_path(sha256)
+        now = time.time()
+        with self._lock:
+            if os.path.exists(blob):
+                if not os.path.samefile(blob, local_path):
+                    self._link(blob, local_path)
+                print(f"[APKStore] Deduplicated {os.path.basename(local_path)} -> {sha256[:12]}")
+            else:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                os.replace(local_path, blob)
+                self._link(blob, local_path)
+                print(f"[APKStore] Stored new blob {sha256[:12]}")
+            self._conn.execute(
+                "INSERT INTO blobs VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(sha256) DO UPDATE SET last_access=excluded.last_access",
+                (sha256, os.path.getsize(blob), now, now),
+            )
+            self._conn.commit()
+        return blob
+
+    def materialize(self, sha256: str, local_path: str) -> bool:
+        """Link an existing blob to ``local_path``; ``False`` if it is missing."""
+        blob = self.blob_path(sha256)
+        if not os.path.exists(blob):
+            return False
+        os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+        with self._lock:
+            self._link(blob, local_path)
+        self.touch(sha256)
+        return True
+
+    # -- references --------------------------------------------------------
+    def record(self, serial: str, package: str, remote_path: str, sha256: str,
+               local_path: str, version: str = "") -> None:
+        """Index that ``serial`` has ``package`` at ``remote_path`` as ``sha256``.
+
+        ``local_path`` now links to ``sha256``, so rows from an earlier
+        version (e.g. under a remote path that changed on update) that still
+        name it are dropped.
+        """
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM refs WHERE local_path=? "
+                "AND NOT (serial=? AND package=? AND remote_path=?)",
+                (local_path, serial, package, remote_path),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO refs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (serial, package, remote_path, version, sha256, local_path, time.time()),
+            )
+            self._conn.commit()
+
+    def set_version(self, serial: str, package: str, version: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE refs SET version=? WHERE serial=? AND package=?",
+                (version, serial, package),
+            )
+            self._conn.commit()
+
+    def lookup(self, serial: str, package: str,
+               version: Optional[str] = None) -> List[Tuple[str, str]]:
+        """Return ``(remote_path, sha256)`` pairs indexed for a device package."""
+        query = "SELECT remote_path, sha256 FROM refs WHERE serial=? AND package=?"
+        args: Tuple[str, ...] = (serial, package)
+        if version is not None:
+            query += " AND version=?"
+            args += (version,)
+        with self._lock:
+            return [tuple(row) for row in self._conn.execute(query + " ORDER BY remote_path", args)]
+
+    # -- analysis results ----------------------------------------------------
+    def get_result(self, sha256: str, kind: str) -> Optional[Any]:
+        """Return a cached analysis result of ``kind`` for the blob, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM results WHERE sha256=? AND kind=?", (sha256, kind)
+            ).fetchone()
+        if row is None:
+            return None
+        self.touch(sha256)
+        return json.loads(row[0])
+
+    def put_result(self, sha256: str, kind: str, result: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                (sha256, kind, json.dumps(result)),
+            )
+            self._conn.commit()
+
+    # -- maintenance -----------------------------------------------------------
+    def total_size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def gc(self, max_bytes: int, dry_run: bool = False) -> Dict[str, int]:
+        """Evict least recently used blobs until the store fits ``max_bytes``.
+
+        Evicting a blob also removes its per-device links, index rows and
+        cached results, so the space is actually released. A recorded path
+        that has since been relinked to another blob is left in place.
+        """
+        total = self.total_size()
+        removed = freed = 0
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT sha256, size FROM blobs ORDER BY last_access, created_at"
+            ).fetchall()
+            for sha256, size in rows:
+                if total <= max_bytes:
+                    break
+                links = [r[0] for r in self._conn.execute(
+                    "SELECT local_path FROM refs WHERE sha256=?", (sha256,)
+                )]
+                print(f"[APKStore] Evicting {sha256[:12]} ({size} bytes, {len(links)} link(s))")
+                total -= size
+                freed += size
+                removed += 1
+                if dry_run:
+                    continue
+                blob = self.blob_path(sha256)
+                for path in links:
+                    if os.path.lexists(path) and self._links_to(path, blob):
+                        os.remove(path)
+                if os.path.lexists(blob):
+                    os.remove(blob)
+                for table in ("blobs", "refs", "results"):
+                    self._conn.execute(f"DELETE FROM {table} WHERE sha256=?", (sha256,))
+            self._conn.commit()
+        return {"removed": removed, "freed": freed, "remaining": total}
+
+    @staticmethod
+    def _links_to(path: str, blob: str) -> bool:
+        try:
+            return os.path.samefile(path, blob)
+        except OSError:
+            # A dangling symlink to the blob is still ours to remove.
+            return os.path.islink(path) and os.readlink(path) == os.path.abspath(blob)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
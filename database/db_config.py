@@ -1 +1,11 @@
 # Filename: db_config.py
+"""Locations of the local SQLite databases."""
+
+import os
+
+DB_DIR = os.environ.get("NETHIRA_DB_DIR", os.path.join("output", "db"))
+SCAN_CACHE_PATH = os.path.join(DB_DIR, "scan_cache.sqlite3")
+MANIFEST_CACHE_PATH = os.path.join(DB_DIR, "manifest_cache.sqlite3")
+HASH_CACHE_PATH = os.path.join(DB_DIR, "hash_cache.sqlite3")
+MANIFEST_CACHE_MAX_BYTES = int(os.environ.get("NETHIRA_MANIFEST_CACHE_MB", "256")) * 1024 * 1024
+APK_STORE_DIR = os.environ.get("NETHIRA_APK_STORE", os.path.join("output", "apk_store"))
@@ -1 +1,22 @@
 # Filename: db_conn.py
+"""SQLite connection helper shared by the local caches."""
+
+import os
+import sqlite3
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open ``path`` (creating its directory) with settings suited to caches.
+
+    Connections may be shared between threads; callers serialise access with
+    their own lock. WAL mode lets a nightly sweep and an interactive session
+    read the same file concurrently.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    if path != ":memory:":
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
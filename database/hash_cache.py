@@ -0,0 +1,172 @@
+# Filename: hash_cache.py
+"""Persistent cache of file digests keyed by stat.
+
+Rows are keyed by ``(path, device, inode, size, mtime_ns)``: while a file's
+stat is unchanged its stored digests are returned without reading it, and
+any rewrite, replacement or resize makes the row miss. A file modified
+within ``racy_window_ns`` of being hashed is not stored, because a second
+write inside the filesystem's timestamp granularity would leave its stat
+unchanged.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional
+
+from .db_config import HASH_CACHE_PATH
+from .db_conn import connect
+
+# Coarsest common mtime granularity (FAT, some network filesystems).
+DEFAULT_RACY_WINDOW_NS = 2_000_000_000
+# Rows written inside batch() are committed every this many stores.
+_BATCH_COMMIT_ROWS = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT NOT NULL,
+    algo TEXT NOT NULL,
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (path, algo)
+)
+"""
+
+
+def _key(st: os.stat_result) -> tuple:
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class HashCache:
+    """SQLite-backed store of file digests with hit and miss counters."""
+
+    def __init__(self, path: str = HASH_CACHE_PATH,
+                 racy_window_ns: int = DEFAULT_RACY_WINDOW_NS) -> None:
+        self.path = path
+        self.racy_window_ns = racy_window_ns
+        self._conn = connect(path)
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._batch_depth = 0
+        self._uncommitted = 0
+        self.hits = 0
+        self.misses = 0
+        print(f"[hash_cache] Using {path}")
+
+    def lookup(self, path: str, st: os.stat_result,
+               algos: Iterable[str]) -> Dict[str, str]:
+        """Return the stored digests of ``algos`` valid for ``st``.
+
+        Only digests recorded for exactly this stat are returned; the result
+        may cover a subset of ``algos``. It is a hit only if it covers all.
+        """
+        algos = tuple(algos)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT algo, digest FROM file_hashes WHERE path=? AND dev=? AND ino=? "
+                "AND size=? AND mtime_ns=?",
+                (os.path.abspath(path), *_key(st)),
+            ).fetchall()
+            digests = {algo: digest for algo, digest in rows if algo in algos}
+            if len(digests) == len(algos):
+                self.hits += 1
+            else:
+                self.misses += 1
+        return digests
+
+    def store(self, path: str, st: os.stat_result, digests: Dict[str, str],
+              hashed_ns: Optional[int] = None) -> bool:
+        """Record ``digests`` of ``path`` as read with stat ``st``.
+
+        ``hashed_ns`` is when reading started (default now). Returns ``False``
+        without storing if the file was modified too close to that moment.
+        """
+        if hashed_ns is None:
+            hashed_ns = time.time_ns()
+        if st.st_mtime_ns >= hashed_ns - self.racy_window_ns:
+            print(f"[hash_cache] Not caching recently modified {path}")
+            return False
+        path = os.path.abspath(path)
+        key = _key(st)
+        with self._lock:
+            # Digests recorded for an older version of the file are stale.
+            self._conn.execute(
+                "DELETE FROM file_hashes WHERE path=? AND NOT "
+                "(dev=? AND ino=? AND size=? AND mtime_ns=?)",
+                (path, *key),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(path, algo, *key, digest) for algo, digest in digests.items()],
+            )
+            self._uncommitted += 1
+            if self._batch_depth == 0 or self._uncommitted >= _BATCH_COMMIT_ROWS:
+                self._commit_locked()
+        return True
+
+    def _commit_locked(self) -> None:
+        self._conn.commit()
+        self._uncommitted = 0
+
+    @contextmanager
+    def batch(self) -> Iterator["HashCache"]:
+        """Group stores into periodic commits for bulk hashing."""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._commit_locked()
+
+    def prune(self, root: Optional[str] = None) -> int:
+        """Drop entries for files that no longer exist, under ``root`` if given."""
+        with self._lock:
+            if root is None:
+                rows = self._conn.execute("SELECT DISTINCT path FROM file_hashes").fetchall()
+            else:
+                prefix = os.path.join(os.path.abspath(root), "")
+                rows = self._conn.execute(
+                    "SELECT DISTINCT path FROM file_hashes WHERE substr(path, 1, ?) = ?",
+                    (len(prefix), prefix),
+                ).fetchall()
+            gone = [(path,) for (path,) in rows if not os.path.isfile(path)]
+            self._conn.executemany("DELETE FROM file_hashes WHERE path=?", gone)
+            self._commit_locked()
+        if gone:
+            print(f"[hash_cache] Pruned {len(gone)} missing file(s)")
+        return len(gone)
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Drop entries for ``path`` or the whole cache."""
+        with self._lock:
+            if path is None:
+                self._conn.execute("DELETE FROM file_hashes")
+            else:
+                self._conn.execute("DELETE FROM file_hashes WHERE path=?",
+                                   (os.path.abspath(path),))
+            self._commit_locked()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            files = self._conn.execute(
+                "SELECT COUNT(DISTINCT path) FROM file_hashes").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "files": files}
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._commit_locked()
+            self._conn.close()
@@ -0,0 +1,195 @@
+# Filename: manifest_cache.py
+"""Persistent cache of parsed manifest features.
+
+Rows are keyed by ``(APK sha256, parser version)``, so identical APKs are
+decoded once across runs and devices, and a decoder change simply stops
+matching old rows. A bounded in-process LRU sits in front of SQLite; the
+database is kept under a byte budget by evicting least recently used rows.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from utils.axml import DECODER_VERSION
+
+from .db_config import MANIFEST_CACHE_MAX_BYTES, MANIFEST_CACHE_PATH
+from .db_conn import connect
+
+PARSER_VERSION = f"axml-{DECODER_VERSION}"
+DEFAULT_MEMORY_ENTRIES = 512
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS manifest_features (
+    sha256 TEXT NOT NULL,
+    parser_version TEXT NOT NULL,
+    features TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (sha256, parser_version)
+);
+CREATE INDEX IF NOT EXISTS manifest_features_lru ON manifest_features (last_used);
+"""
+
+
+class ManifestCache:
+    """Two-tier (memory, SQLite) cache of manifest features by APK digest."""
+
+    def __init__(self, path: str = MANIFEST_CACHE_PATH,
+                 parser_version: str = PARSER_VERSION,
+                 memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 max_bytes: int = MANIFEST_CACHE_MAX_BYTES,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.path = path
+        self.parser_version = parser_version
+        self.memory_entries = max(0, memory_entries)
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._conn = connect(path)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._disk_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM manifest_features"
+        ).fetchone()[0]
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        print(f"[manifest_cache] Using {path} (parser {parser_version})")
+
+    def _remember(self, sha256: str, features: Dict[str, Any]) -> None:
+        if not self.memory_entries:
+            return
+        self._memory[sha256] = features
+        self._memory.move_to_end(sha256)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """Return the cached features for the APK with ``sha256``, if any."""
+        with self._lock:
+            features = self._memory.get(sha256)
+            if features is not None:
+                self._memory.move_to_end(sha256)
+                self.memory_hits += 1
+                return features
+            row = self._conn.execute(
+                "SELECT features FROM manifest_features WHERE sha256=? AND parser_version=?",
+                (sha256, self.parser_version),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE manifest_features SET last_used=? WHERE sha256=? AND parser_version=?",
+                (self.clock(), sha256, self.parser_version),
+            )
+            self._conn.commit()
+            self.disk_hits += 1
+            features = json.loads(row[0])
+            self._remember(sha256, features)
+            return features
+
+    def put(self, sha256: str, features: Dict[str, Any]) -> None:
+        """Store ``features`` for ``sha256``, evicting old rows if over budget."""
+        blob = json.dumps(features, separators=(",", ":"))
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM manifest_features WHERE sha256=? AND parser_version=?",
+                (sha256, self.parser_version),
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO manifest_features VALUES (?, ?, ?, ?, ?)",
+                (sha256, self.parser_version, blob, len(blob), self.clock()),
+            )
+            self._disk_bytes += len(blob) - (old[0] if old else 0)
+            if self._disk_bytes > self.max_bytes:
+                self._evict_locked(self.max_bytes)
+            self._conn.commit()
+            self._remember(sha256, features)
+
+    def get_or_compute(self, sha256: str,
+                       compute: Callable[[], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Return cached features or compute, store and return them.
+
+        ``None`` from ``compute`` (no manifest) is returned without caching.
+        """
+        features = self.get(sha256)
+        if features is None:
+            features = compute()
+            if features is not None:
+                self.put(sha256, features)
+        return features
+
+    def _evict_locked(self, max_bytes: int) -> int:
+        removed = 0
+        # Evict down to 90% of the budget so puts do not evict on every call.
+        target = int(max_bytes * 0.9)
+        rows = self._conn.execute(
+            "SELECT sha256, parser_version, size FROM manifest_features ORDER BY last_used"
+        ).fetchall()
+        for sha256, version, size in rows:
+            if self._disk_bytes <= target:
+                break
+            self._conn.execute(
+                "DELETE FROM manifest_features WHERE sha256=? AND parser_version=?",
+                (sha256, version),
+            )
+            self._memory.pop(sha256, None)
+            self._disk_bytes -= size
+            removed += 1
+        if removed:
+            print(f"[manifest_cache] Evicted {removed} entr{'y' if removed == 1 else 'ies'}")
+        return removed
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """Drop least recently used rows until the database fits ``max_bytes``."""
+        with self._lock:
+            removed = self._evict_locked(self.max_bytes if max_bytes is None else max_bytes)
+            self._conn.commit()
+            return removed
+
+    def invalidate(self, stale_only: bool = False) -> None:
+        """Drop every entry, or with ``stale_only`` those of other parser versions."""
+        with self._lock:
+            if stale_only:
+                self._conn.execute(
+                    "DELETE FROM manifest_features WHERE parser_version != ?",
+                    (self.parser_version,),
+                )
+            else:
+                self._conn.execute("DELETE FROM manifest_features")
+                self._memory.clear()
+            self._conn.commit()
+            self._disk_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM manifest_features"
+            ).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit counters per tier, overall hit rate and current sizes."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM manifest_features").fetchone()[0]
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "entries": entries,
+                "bytes": self._disk_bytes,
+            }
+
+    def reset_stats(self) -> None:
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
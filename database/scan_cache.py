@@ -0,0 +1,86 @@
+# Filename: scan_cache.py
+"""Persistent cache of manifest scan results.
+
+Rows are keyed by ``(device, package, versionCode, lastUpdateTime)``. Any
+update or reinstall of a package changes at least one of the two version
+fields, so a hit means the package is exactly what was scanned last time.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from typing import Dict, List, Optional
+
+from .db_config import SCAN_CACHE_PATH
+from .db_conn import connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scan_results (
+    device TEXT NOT NULL,
+    package TEXT NOT NULL,
+    version_code TEXT NOT NULL,
+    last_update_time TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (device, package)
+)
+"""
+
+
+class ScanCache:
+    """SQLite-backed store of scan results with hit and miss counters."""
+
+    def __init__(self, path: str = SCAN_CACHE_PATH) -> None:
+        self.path = path
+        self._conn = connect(path)
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        print(f"[scan_cache] Using {path}")
+
+    def get(self, device: str, package: str, version_code: str,
+            last_update_time: str) -> Optional[Dict[str, List[str]]]:
+        """Return the cached result if the package version is unchanged."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM scan_results WHERE device=? AND package=? "
+                "AND version_code=? AND last_update_time=?",
+                (device, package, version_code, last_update_time),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, device: str, package: str, version_code: str,
+            last_update_time: str, result: Dict[str, List[str]]) -> None:
+        """Store ``result``, replacing any entry for an older version."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scan_results VALUES (?, ?, ?, ?, ?)",
+                (device, package, version_code, last_update_time, json.dumps(result)),
+            )
+            self._conn.commit()
+
+    def invalidate(self, device: str | None = None) -> None:
+        """Drop entries for ``device`` or the whole cache."""
+        with self._lock:
+            if device is None:
+                self._conn.execute("DELETE FROM scan_results")
+            else:
+                self._conn.execute("DELETE FROM scan_results WHERE device=?", (device,))
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
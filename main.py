@@ -4,10 +4,11 @@
 import sys
 
 from analysis.device import device_enumeration, device_reporter
-from analysis.apps import list_installed_apps, social_media_detector
+from analysis.apps import get_inventory, list_installed_apps, social_media_detector
 from analysis.manifest import analyze_packages, format_results
+from database import ScanCache
 from models.device_info import DeviceInfo
-from utils import display_utils, list_packages
+from utils import display_utils
 
 
 def show_main_menu() -> None:
@@ -57,7 +58,7 @@ def handle_app_listing(devices: list[DeviceInfo]):
         return
 
     apps = list_installed_apps.categorize_installed_apps(
-        selected_device.serial,
+        get_inventory(selected_device.serial),
         selected_device.manufacturer
     )
 
@@ -80,7 +81,9 @@ def handle_social_media_scan(devices: list[DeviceInfo]) -> None:
     if not selected_device:
         return
 
-    results = social_media_detector.detect_social_media_apps(selected_device.serial)
+    results = social_media_detector.detect_social_media_apps(
+        get_inventory(selected_device.serial)
+    )
     print("============================================================")
     print(
         f" SOCIAL MEDIA APPS ON: {selected_device.model} ({selected_device.serial})"
@@ -105,7 +108,9 @@ def handle_device_report(devices: list[DeviceInfo]) -> None:
         return
 
     path = device_reporter.save_report(
-        selected_device.serial, selected_device.manufacturer
+        selected_device.serial,
+        selected_device.manufacturer,
+        inventory=get_inventory(selected_device.serial),
     )
     print(f"\nReport saved to {path}\n")
 
@@ -141,7 +146,7 @@ def handle_manifest_analysis(devices: list[DeviceInfo]) -> None:
     if not selected_device:
         return
 
-    pkgs = sorted(list_packages(selected_device.serial))
+    pkgs = get_inventory(selected_device.serial).package_names
     if not pkgs:
         display_utils.print_warning("No packages retrieved from device.")
         return
@@ -154,7 +159,13 @@ def handle_manifest_analysis(devices: list[DeviceInfo]) -> None:
         return
     print(f"[DEBUG] Packages chosen for analysis: {selected}")
 
-    json_path, csv_path, results = analyze_packages(selected_device.serial, selected)
+    cache = ScanCache()
+    try:
+        json_path, csv_path, results = analyze_packages(
+            selected_device.serial, selected, cache=cache
+        )
+    finally:
+        cache.close()
     print("\nScan Summary:")
     print(format_results(results))
     print(f"[DEBUG] Scanned {len(results)} package(s)")
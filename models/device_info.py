@@ -1,4 +1,4 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 
 @dataclass
 class DeviceInfo:
@@ -13,6 +13,9 @@ class DeviceInfo:
     fingerprint: str
     bootloader: str
     cpu_abi: str
+    # Set when the entry was built from cached properties after a timeout;
+    # a display hint only, so it is left out of to_dict() and comparisons.
+    stale: bool = field(default=False, compare=False)
 
     def __str__(self) -> str:
         return (
@@ -30,4 +33,6 @@ class DeviceInfo:
         )
 
     def to_dict(self) -> dict:
-        return asdict(self)
+        data = asdict(self)
+        del data["stale"]
+        return data
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Set
+
+
+@dataclass
+class PackageRecord:
+    name: str
+    apk_path: str = ""
+    version_code: str = ""
+    uid: str = ""
+    installer: str = ""
+    system: bool = False
+    third_party: bool = False
+
+
+@dataclass
+class DeviceInventory:
+    serial: str
+    packages: Dict[str, PackageRecord] = field(default_factory=dict)
+    fetched_at: float = 0.0
+
+    @property
+    def package_names(self) -> List[str]:
+        return sorted(self.packages)
+
+    @property
+    def all_packages(self) -> Set[str]:
+        return set(self.packages)
+
+    @property
+    def system_packages(self) -> Set[str]:
+        return {name for name, rec in self.packages.items() if rec.system}
+
+    @property
+    def third_party_packages(self) -> Set[str]:
+        return {name for name, rec in self.packages.items() if rec.third_party}
+
+    def get(self, name: str) -> PackageRecord | None:
+        return self.packages.get(name)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
@@ -0,0 +1,134 @@
+"""Encode small binary AXML documents for the decoder tests."""
+
+from __future__ import annotations
+
+import struct
+from typing import Dict, List, Sequence, Tuple, Union
+
+ANDROID_NS = "http://schemas.android.com/apk/res/android"
+ATTR_IDS = {
+    "label": 0x01010001,
+    "name": 0x01010003,
+    "exported": 0x01010010,
+    "versionCode": 0x0101021B,
+    "versionName": 0x0101021C,
+    "minSdkVersion": 0x0101020C,
+    "targetSdkVersion": 0x01010270,
+    "scheme": 0x01010027,
+}
+
+Value = Union[str, int, bool]
+# (tag, {attribute: value}, [children]); "android:" attributes use the android namespace.
+Element = Tuple[str, Dict[str, Value], Sequence["Element"]]
+
+
+def _chunk(chunk_type: int, header: bytes, body: bytes) -> bytes:
+    header_size = 8 + len(header)
+    return struct.pack("<HHI", chunk_type, header_size, header_size + len(body)) + header + body
+
+
+def _pool(strings: List[str], utf8: bool) -> bytes:
+    data = b""
+    offsets = []
+    for s in strings:
+        offsets.append(len(data))
+        if utf8:
+            raw = s.encode("utf-8")
+            assert len(s) < 0x80 and len(raw) < 0x80
+            data += bytes([len(s), len(raw)]) + raw + b"\x00"
+        else:
+            data += struct.pack("<H", len(s)) + s.encode("utf-16-le") + b"\x00\x00"
+    data += b"\x00" * (-len(data) % 4)
+    header = struct.pack("<IIIII", len(strings), 0, 0x100 if utf8 else 0,
+                         28 + 4 * len(strings), 0)
+    return _chunk(0x0001, header, struct.pack(f"<{len(strings)}I", *offsets) + data)
+
+
+def encode_axml(root: Element, utf8: bool = False, obfuscate: bool = False) -> bytes:
+    """Return binary XML for ``root``.
+
+    With ``obfuscate`` the android attribute names are blanked in the string
+    pool, leaving only the resource map to identify them.
+    """
+    android_attrs: List[str] = []
+
+    def collect(el: Element) -> None:
+        for key in el[1]:
+            if key.startswith("android:") and key[8:] not in android_attrs:
+                android_attrs.append(key[8:])
+        for child in el[2]:
+            collect(child)
+
+    collect(root)
+    # Resource-mapped attribute names must come first in the pool.
+    strings: List[str] = ["" if obfuscate else a for a in android_attrs]
+    index: Dict[str, int] = {}
+
+    def ref(s: str) -> int:
+        if s not in index:
+            index[s] = len(strings)
+            strings.append(s)
+        return index[s]
+
+    def attr_name(key: str) -> Tuple[int, int]:
+        if key.startswith("android:"):
+            return ref(ANDROID_NS), android_attrs.index(key[8:])
+        return 0xFFFFFFFF, ref(key)
+
+    ref("android")
+    ref(ANDROID_NS)
+    body: List[bytes] = []
+    line = struct.pack("<II", 1, 0xFFFFFFFF)
+    body.append(_chunk(0x0100, line, struct.pack("<II", ref("android"), ref(ANDROID_NS))))
+
+    def emit(el: Element) -> None:
+        tag, attrs, children = el
+        encoded = b""
+        for key, value in attrs.items():
+            ns, name = attr_name(key)
+            if isinstance(value, bool):
+                raw, vtype, data = 0xFFFFFFFF, 0x12, 0xFFFFFFFF if value else 0
+            elif isinstance(value, int):
+                raw, vtype, data = 0xFFFFFFFF, 0x10, value & 0xFFFFFFFF
+            else:
+                raw = ref(value)
+                vtype, data = 0x03, raw
+            encoded += struct.pack("<IIIHBBI", ns, name, raw, 8, 0, vtype, data)
+        ext = struct.pack("<IIHHHHHH", 0xFFFFFFFF, ref(tag), 20, 20, len(attrs), 0, 0, 0)
+        body.append(_chunk(0x0102, line, ext + encoded))
+        for child in children:
+            emit(child)
+        body.append(_chunk(0x0103, line, struct.pack("<II", 0xFFFFFFFF, ref(tag))))
+
+    emit(root)
+    body.append(_chunk(0x0101, line, struct.pack("<II", ref("android"), ref(ANDROID_NS))))
+    resource_map = _chunk(0x0180, b"", struct.pack(
+        f"<{len(android_attrs)}I", *(ATTR_IDS[a] for a in android_attrs)))
+    content = _pool(strings, utf8) + resource_map + b"".join(body)
+    return _chunk(0x0003, b"", content)
+
+
+def sample_manifest(package: str = "com.example.app", components: int = 2) -> Element:
+    """A representative manifest tree with a launcher activity."""
+    comps: List[Element] = [
+        ("activity", {"android:name": ".Main", "android:exported": True}, [
+            ("intent-filter", {}, [
+                ("action", {"android:name": "android.intent.action.MAIN"}, []),
+                ("category", {"android:name": "android.intent.category.LAUNCHER"}, []),
+            ]),
+        ]),
+    ]
+    for i in range(components - 1):
+        comps.append(("receiver", {"android:name": f".Recv{i}", "android:exported": i % 2 == 0}, [
+            ("intent-filter", {}, [
+                ("action", {"android:name": "android.intent.action.BOOT_COMPLETED"}, []),
+                ("data", {"android:scheme": "https"}, []),
+            ]),
+        ]))
+    return ("manifest", {"package": package, "android:versionCode": 42,
+                         "android:versionName": "4.2"}, [
+        ("uses-sdk", {"android:minSdkVersion": 24, "android:targetSdkVersion": 34}, []),
+        ("uses-permission", {"android:name": "android.permission.INTERNET"}, []),
+        ("uses-permission", {"android:name": "android.permission.READ_SMS"}, []),
+        ("application", {"android:label": "Example"}, comps),
+    ])
@@ -0,0 +1,72 @@
+import asyncio
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from analysis.manifest import scanner
+from utils import adb_async
+
+
+def test_per_device_concurrency_limit(monkeypatch):
+    active = {"A": 0, "B": 0}
+    peak = {"A": 0, "B": 0}
+
+    async def fake_exec(argv):
+        serial = argv[2]
+        active[serial] += 1
+        peak[serial] = max(peak[serial], active[serial])
+        await asyncio.sleep(0.01)
+        active[serial] -= 1
+        return subprocess.CompletedProcess(argv, 0, "package:x\n", "")
+
+    monkeypatch.setattr(adb_async, "_exec", fake_exec)
+    monkeypatch.setattr(adb_async, "_device_concurrency", 2)
+
+    async def main():
+        calls = [adb_async.list_packages(s) for s in ["A", "B"] for _ in range(6)]
+        return await asyncio.gather(*calls)
+
+    results = asyncio.run(main())
+    assert all(r == ["x"] for r in results)
+    assert peak == {"A": 2, "B": 2}
+
+
+def test_failures_match_sync_api(monkeypatch):
+    async def failing_exec(argv):
+        return subprocess.CompletedProcess(argv, 1, "", "error")
+
+    monkeypatch.setattr(adb_async, "_exec", failing_exec)
+    assert asyncio.run(adb_async.adb_shell("A", "getprop")) == "N/A"
+    assert asyncio.run(adb_async.list_packages("A")) == []
+
+
+def test_missing_adb_raises_runtime_error(monkeypatch):
+    monkeypatch.setattr(adb_async.adb_utils, "get_adb_path", lambda: "/nonexistent/adb")
+    with pytest.raises(RuntimeError):
+        asyncio.run(adb_async.run_adb(["devices"]))
+
+
+@pytest.mark.skipif(shutil.which("sh") is None, reason="needs sh")
+def test_subprocess_backend_with_fake_adb(monkeypatch, tmp_path):
+    fake_adb = tmp_path / "adb"
+    fake_adb.write_text('#!/bin/sh\nshift 3\nsh -c "$*"\n')
+    fake_adb.chmod(0o755)
+    monkeypatch.setattr(adb_async.adb_utils, "get_adb_path", lambda: str(fake_adb))
+    assert asyncio.run(adb_async.adb_shell("A", "echo ' hi '")) == "hi"
+
+
+def test_scan_packages_async(monkeypatch):
+    async def fake_shell(serial, cmd):
+        if not cmd.endswith("a"):
+            return ""
+        return "Packages:\n  Package [pkg.a] (1):\n    requested permissions:\n      android.permission.READ_SMS"
+
+    monkeypatch.setattr(scanner.adb_async, "adb_shell", fake_shell)
+    results = asyncio.run(scanner.scan_packages_async("S", ["pkg.a", "pkg.b"]))
+    assert [r["package"] for r in results] == ["pkg.a", "pkg.b"]
+    assert results[0]["suspicious"] == ["android.permission.READ_SMS"]
@@ -0,0 +1,123 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "tools"))
+
+from fake_adb_server import FakeAdbServer, FakeDevice
+from utils import adb_utils
+from utils.adb_protocol import AdbClient, AdbProtocolError, parse_devices_l
+
+
+@pytest.fixture
+def server():
+    with FakeAdbServer() as srv:
+        srv.add_device(FakeDevice("SER123", files={"/data/app/base.apk": b"x" * 200000}))
+        yield srv
+
+
+def test_parse_devices_l():
+    text = "ABC device product:p model:Pixel_7 transport_id:3\nXYZ unauthorized\n"
+    devices = parse_devices_l(text)
+    assert devices[0] == {
+        "serial": "ABC", "state": "device", "product": "p",
+        "model": "Pixel_7", "transport_id": "3",
+    }
+    assert devices[1] == {"serial": "XYZ", "state": "unauthorized"}
+
+
+def test_version_and_devices(server):
+    client = AdbClient(port=server.port)
+    assert client.version() == 41
+    devices = client.devices()
+    assert devices[0]["serial"] == "SER123"
+    assert devices[0]["model"] == "Fake_Phone"
+
+
+def test_unknown_device_raises(server):
+    client = AdbClient(port=server.port)
+    with pytest.raises(AdbProtocolError, match="not found"):
+        client.exec_out("missing", "echo hi")
+
+
+@pytest.mark.skipif(shutil.which("sh") is None, reason="needs sh")
+def test_shell_and_exec(server):
+    client = AdbClient(port=server.port)
+    assert client.shell("SER123", "echo hello") == (0, "hello\n")
+    status, _ = client.shell("SER123", "false")
+    assert status == 1
+    assert client.exec_out("SER123", "printf raw") == b"raw"
+
+
+def test_sync_pull_reuses_connection(server, tmp_path):
+    client = AdbClient(port=server.port)
+    try:
+        first = tmp_path / "one.apk"
+        second = tmp_path / "two.apk"
+        assert client.pull("SER123", "/data/app/base.apk", str(first)) == 200000
+        assert client.pull("SER123", "/data/app/base.apk", str(second)) == 200000
+        assert first.read_bytes() == b"x" * 200000
+        assert server.requests.count("sync:") == 1
+
+        with pytest.raises(AdbProtocolError):
+            client.pull("SER123", "/missing.apk", str(tmp_path / "missing"))
+        # a FAIL reply leaves the sync session usable
+        client.pull("SER123", "/data/app/base.apk", str(second))
+        assert server.requests.count("sync:") == 1
+    finally:
+        client.close()
+
+
+@pytest.mark.skipif(shutil.which("sh") is None, reason="needs sh")
+def test_socket_backend(server, monkeypatch, tmp_path):
+    monkeypatch.setattr(adb_utils, "_socket_client", AdbClient(port=server.port))
+    monkeypatch.setattr(adb_utils, "_backend", "socket")
+    assert adb_utils.list_connected_devices() == ["SER123"]
+    assert adb_utils.adb_shell("SER123", "echo ' value '") == "value"
+    assert adb_utils.adb_shell("SER123", "exit 2") == "N/A"
+    local = tmp_path / "base.apk"
+    adb_utils.adb_pull("SER123", "/data/app/base.apk", str(local))
+    assert local.stat().st_size == 200000
+    with pytest.raises(RuntimeError):
+        adb_utils.adb_pull("SER123", "/nope", str(local))
+
+
+@pytest.mark.skipif(shutil.which("sh") is None, reason="needs sh")
+def test_exec_out_stream_checks_expected_size(tmp_path, monkeypatch):
+    fake_adb = tmp_path / "adb"
+    fake_adb.write_text('#!/bin/sh\nshift 3\nsh -c "$*"\n')
+    fake_adb.chmod(0o755)
+    apk = tmp_path / "base.apk"
+    apk.write_bytes(b"y" * 5000)
+    monkeypatch.setattr(adb_utils, "get_adb_path", lambda: str(fake_adb))
+    monkeypatch.setattr(adb_utils, "_backend", "subprocess")
+
+    data = b"".join(adb_utils.stream_file("SER", str(apk), expected_size=5000))
+    assert data == b"y" * 5000
+    # A short or missing file just ends the stream; only the size gives it away.
+    with pytest.raises(RuntimeError, match="5000 of 6000"):
+        list(adb_utils.stream_file("SER", str(apk), expected_size=6000))
+    with pytest.raises(RuntimeError):
+        list(adb_utils.stream_file("SER", str(tmp_path / "missing.apk"), expected_size=10))
+
+
+def test_stream_file_over_sync(server, monkeypatch):
+    client = AdbClient(port=server.port)
+    monkeypatch.setattr(adb_utils, "_socket_client", client)
+    monkeypatch.setattr(adb_utils, "_backend", "socket")
+    try:
+        data = b"".join(adb_utils.stream_file("SER123", "/data/app/base.apk"))
+        assert data == b"x" * 200000
+        with pytest.raises(RuntimeError):
+            list(adb_utils.stream_file("SER123", "/nope"))
+        # abandoning a stream midway must not poison the next transfer
+        chunks = adb_utils.stream_file("SER123", "/data/app/base.apk")
+        next(chunks)
+        chunks.close()
+        assert len(b"".join(adb_utils.stream_file("SER123", "/data/app/base.apk"))) == 200000
+    finally:
+        client.close()
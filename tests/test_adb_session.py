@@ -0,0 +1,81 @@
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils import adb_utils
+from utils.adb_session import ShellSession, ShellSessionError, ShellSessionPool
+
+pytestmark = pytest.mark.skipif(shutil.which("sh") is None, reason="needs sh")
+
+
+def test_session_multiplexes_commands():
+    session = ShellSession(["sh"])
+    try:
+        assert session.run("echo one") == (0, "one\n")
+        assert session.run("printf two") == (0, "two")
+        assert session.run("echo a; echo b") == (0, "a\nb\n")
+        status, _ = session.run("exit 3")
+        assert status == 3
+        # ``exit`` runs in a subshell so the session survives it
+        assert session.run("echo still here") == (0, "still here\n")
+    finally:
+        session.close()
+
+
+def test_session_reconnects_after_drop():
+    session = ShellSession(["sh"])
+    try:
+        session.run("true")
+        session._proc.kill()
+        session._proc.wait()
+        assert session.run("echo back") == (0, "back\n")
+    finally:
+        session.close()
+
+
+def test_session_timeout_raises():
+    session = ShellSession(["sh"], timeout=0.2)
+    try:
+        with pytest.raises(ShellSessionError):
+            session.run("sleep 5")
+        assert not session.alive
+    finally:
+        session.close()
+
+
+def test_pool_backend_routes_adb_shell(monkeypatch):
+    pool = ShellSessionPool(lambda serial: ["sh"])
+    monkeypatch.setattr(adb_utils, "_shell_pool", pool)
+    monkeypatch.setattr(adb_utils, "_backend", "pool")
+    try:
+        assert adb_utils.adb_shell("serial", "echo '  hello  '") == "hello"
+        assert adb_utils.adb_shell("serial", "false") == "N/A"
+        assert len(pool._sessions) == 1
+    finally:
+        pool.close_all()
+
+
+def test_pool_backend_list_packages(monkeypatch, tmp_path):
+    fake_pm = tmp_path / "pm"
+    fake_pm.write_text("#!/bin/sh\necho \"$@\" > args.txt\nprintf 'package:a\\npackage:b\\n'\n")
+    fake_pm.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}:{os.environ['PATH']}")
+    monkeypatch.chdir(tmp_path)
+    pool = ShellSessionPool(lambda serial: ["sh"])
+    monkeypatch.setattr(adb_utils, "_shell_pool", pool)
+    monkeypatch.setattr(adb_utils, "_backend", "pool")
+    try:
+        assert adb_utils.list_packages("serial", ["-3"]) == ["a", "b"]
+        assert (tmp_path / "args.txt").read_text().strip() == "list packages -3"
+    finally:
+        pool.close_all()
+
+
+def test_set_adb_backend_rejects_unknown():
+    with pytest.raises(ValueError):
+        adb_utils.set_adb_backend("bogus")
@@ -0,0 +1,211 @@
+import csv
+import hashlib
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from analysis.manifest import apk_extractor, pull_planner  # noqa: E402
+
+APK = b"PK\x03\x04" + b"z" * 300000
+PM_PATH = SimpleNamespace(stdout="package:/data/app/com.x-1/base.apk\n")
+STAT = {"/data/app/com.x-1/base.apk": len(APK)}
+
+
+def _stat_shell(sizes):
+    # Answers the batched ``stat -c '%s %n'`` that pull_apk runs.
+    return lambda serial, cmd: "\n".join(f"{size} {path}" for path, size in sizes.items())
+
+
+def _extractor(tmp_path, **kwargs):
+    return apk_extractor.APKExtractor(
+        output_dir=str(tmp_path / "out"), log_file=str(tmp_path / "log.csv"), **kwargs
+    )
+
+
+def test_stream_pull_hashes_in_one_pass(tmp_path, monkeypatch):
+    pulled = []
+    monkeypatch.setattr(apk_extractor, "run_adb", lambda args: PM_PATH)
+    monkeypatch.setattr(
+        apk_extractor, "stream_file",
+        lambda serial, remote, **kw: (APK[i:i + 65536] for i in range(0, len(APK), 65536)),
+    )
+    monkeypatch.setattr(apk_extractor, "adb_pull", lambda *a: pulled.append(a))
+    monkeypatch.setattr(apk_extractor, "adb_shell", _stat_shell(STAT))
+
+    meta = _extractor(tmp_path, hash_algorithms=("md5",)).pull_apk("SER", "com.x")
+
+    assert pulled == []
+    assert Path(meta["local_path"]).read_bytes() == APK
+    assert meta["sha256"] == hashlib.sha256(APK).hexdigest()
+    assert meta["md5"] == hashlib.md5(APK).hexdigest()
+    assert not Path(meta["local_path"] + ".part").exists()
+    with open(tmp_path / "log.csv", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["package", "remote_path", "local_path", "sha256"]
+    assert rows[1][3] == meta["sha256"]
+
+
+def test_falls_back_to_pull_when_streaming_fails(tmp_path, monkeypatch):
+    def broken_stream(serial, remote, **kw):
+        yield b"partial"
+        raise RuntimeError("connection reset")
+
+    def fake_pull(serial, remote, local):
+        Path(local).write_bytes(APK)
+
+    monkeypatch.setattr(apk_extractor, "run_adb", lambda args: PM_PATH)
+    monkeypatch.setattr(apk_extractor, "stream_file", broken_stream)
+    monkeypatch.setattr(apk_extractor, "adb_pull", fake_pull)
+    monkeypatch.setattr(apk_extractor, "adb_shell", _stat_shell(STAT))
+
+    meta = _extractor(tmp_path).pull_apk("SER", "com.x")
+
+    assert meta["sha256"] == hashlib.sha256(APK).hexdigest()
+    assert set(meta) == {"package", "remote_path", "local_path", "sha256", "splits", "bundle_sha256"}
+    assert not Path(meta["local_path"] + ".part").exists()
+
+
+def test_planned_size_catches_truncated_stream(tmp_path, monkeypatch):
+    def planner_shell(serial, cmd):
+        if cmd.startswith("pm list packages"):
+            return "package:/data/app/com.x-1/base.apk=com.x\n"
+        return f"{len(APK)} /data/app/com.x-1/base.apk"
+
+    def short_stream(serial, remote, expected_size=None):
+        yield APK[:1000]
+        assert expected_size == len(APK)
+        raise RuntimeError(f"adb stream of {remote} returned 1000 of {expected_size} bytes")
+
+    pulled = []
+    monkeypatch.setattr(pull_planner, "adb_shell", planner_shell)
+    monkeypatch.setattr(apk_extractor, "stream_file", short_stream)
+    monkeypatch.setattr(apk_extractor, "adb_pull",
+                        lambda s, r, l: pulled.append(r) or Path(l).write_bytes(APK))
+
+    meta = _extractor(tmp_path, transfer="file").pull_apks("SER", ["com.x"])["com.x"]
+    assert pulled == ["/data/app/com.x-1/base.apk"]
+    assert meta["sha256"] == hashlib.sha256(APK).hexdigest()
+
+
+def test_empty_stream_counts_as_failure(tmp_path, monkeypatch):
+    monkeypatch.setattr(apk_extractor, "run_adb", lambda args: PM_PATH)
+    monkeypatch.setattr(apk_extractor, "stream_file", lambda serial, remote, **kw: iter(()))
+    monkeypatch.setattr(apk_extractor, "adb_pull", lambda s, r, l: Path(l).write_bytes(APK))
+    monkeypatch.setattr(apk_extractor, "adb_shell", _stat_shell(STAT))
+
+    meta = _extractor(tmp_path).pull_apk("SER", "com.x")
+    assert meta["sha256"] == hashlib.sha256(APK).hexdigest()
+
+
+def test_single_pull_catches_truncated_stream(tmp_path, monkeypatch):
+    def short_stream(serial, remote, expected_size=None):
+        yield APK[:1000]
+        if expected_size is not None and expected_size != 1000:
+            raise RuntimeError(f"adb stream of {remote} returned 1000 of {expected_size} bytes")
+
+    pulled = []
+    monkeypatch.setattr(apk_extractor, "run_adb", lambda args: PM_PATH)
+    monkeypatch.setattr(apk_extractor, "stream_file", short_stream)
+    monkeypatch.setattr(apk_extractor, "adb_shell", _stat_shell(STAT))
+    monkeypatch.setattr(apk_extractor, "adb_pull",
+                        lambda s, r, l: pulled.append(r) or Path(l).write_bytes(APK))
+
+    meta = _extractor(tmp_path).pull_apk("SER", "com.x")
+
+    assert pulled == ["/data/app/com.x-1/base.apk"]
+    assert meta["sha256"] == hashlib.sha256(APK).hexdigest()
+
+
+def test_split_apks_are_all_pulled(tmp_path, monkeypatch):
+    files = {
+        "/data/app/com.x-1/base.apk": b"base" * 1000,
+        "/data/app/com.x-1/split_config.arm64_v8a.apk": b"abi" * 1000,
+        "/data/app/com.x-1/split_config.en.apk": b"lang" * 1000,
+    }
+    pm_output = "".join(f"package:{p}\n" for p in reversed(list(files)))
+    monkeypatch.setattr(apk_extractor, "run_adb", lambda args: SimpleNamespace(stdout=pm_output))
+    monkeypatch.setattr(apk_extractor, "stream_file", lambda serial, remote, **kw: iter([files[remote]]))
+    monkeypatch.setattr(apk_extractor, "adb_shell",
+                        _stat_shell({path: len(data) for path, data in files.items()}))
+
+    extractor = _extractor(tmp_path)
+    meta = extractor.pull_apk("SER", "com.x")
+
+    assert meta["remote_path"] == "/data/app/com.x-1/base.apk"
+    assert meta["sha256"] == hashlib.sha256(files["/data/app/com.x-1/base.apk"]).hexdigest()
+    assert sorted(s["remote_path"] for s in meta["splits"]) == sorted(files)
+    for split in meta["splits"]:
+        assert Path(split["local_path"]).read_bytes() == files[split["remote_path"]]
+    with open(tmp_path / "log.csv", newline="") as f:
+        assert len(list(csv.reader(f))) == 1 + len(files)
+
+    # the bundle hash ignores pull order but tracks every split
+    assert meta["bundle_sha256"] == extractor.bundle_hash(list(reversed(meta["splits"])))
+    changed = [dict(s) for s in meta["splits"]]
+    changed[-1]["sha256"] = "0" * 64
+    assert extractor.bundle_hash(changed) != meta["bundle_sha256"]
+
+
+def test_device_hash_commands_and_parsing():
+    cmds = apk_extractor.device_hash_commands(["/data/app/a b/base.apk", "/system/app/X.apk"])
+    assert len(cmds) == 1
+    assert "'/data/app/a b/base.apk'" in cmds[0] and "toybox sha256sum" in cmds[0]
+    many = apk_extractor.device_hash_commands([f"/data/app/{'x' * 200}{i}.apk" for i in range(1000)])
+    assert len(many) > 1 and all(len(c) < 70 * 1024 for c in many)
+
+    output = f"{'A' * 64}  /data/app/a b/base.apk\nsha256sum: /nope: No such file\n"
+    assert apk_extractor.parse_device_hashes(output) == {"/data/app/a b/base.apk": "a" * 64}
+
+
+def test_known_hashes_skip_pulls(tmp_path, monkeypatch):
+    files = {"/system/app/Known/Known.apk": b"firmware" * 100, "/data/app/new/base.apk": b"fresh" * 100}
+    known_sha = hashlib.sha256(files["/system/app/Known/Known.apk"]).hexdigest()
+    hash_calls, streamed = [], []
+
+    def planner_shell(serial, cmd):
+        if cmd.startswith("pm list packages"):
+            return ("package:/system/app/Known/Known.apk=com.known\n"
+                    "package:/data/app/new/base.apk=com.new\n")
+        return "\n".join(f"{len(d)} {p}" for p, d in files.items())
+
+    def hash_shell(serial, cmd):
+        hash_calls.append(cmd)
+        return "\n".join(f"{hashlib.sha256(d).hexdigest()}  {p}" for p, d in files.items())
+
+    monkeypatch.setattr(pull_planner, "adb_shell", planner_shell)
+    monkeypatch.setattr(apk_extractor, "adb_shell", hash_shell)
+    monkeypatch.setattr(
+        apk_extractor, "stream_file", lambda serial, remote, **kw: streamed.append(remote) or iter([files[remote]])
+    )
+
+    extractor = _extractor(tmp_path, known_hashes=[known_sha])
+    results = extractor.pull_apks("SER", ["com.known", "com.new", "com.gone"])
+
+    assert len(hash_calls) == 1
+    assert streamed == ["/data/app/new/base.apk"]
+    assert results["com.known"]["sha256"] == known_sha
+    assert results["com.known"]["skipped"] and "local_path" not in results["com.known"]
+    assert "skipped" not in results["com.new"]
+    assert Path(results["com.new"]["local_path"]).read_bytes() == files["/data/app/new/base.apk"]
+    assert results["com.gone"] is None
+
+
+def test_skipped_known_apk_is_not_analyzed(tmp_path, monkeypatch):
+    sha = hashlib.sha256(APK).hexdigest()
+    monkeypatch.setattr(apk_extractor, "run_adb", lambda args: PM_PATH)
+    monkeypatch.setattr(apk_extractor, "adb_shell",
+                        lambda serial, cmd: f"{sha}  /data/app/com.x-1/base.apk")
+    monkeypatch.setattr(apk_extractor, "stream_file", lambda *a, **kw: iter([APK]))
+    extractor = _extractor(tmp_path, known_hashes=[sha], hash_algorithms=("sha256", "md5"))
+
+    def fail(*args):
+        raise AssertionError("a skipped APK must not be analyzed or recorded")
+
+    analyzer = SimpleNamespace(parse=fail, features=fail, cache=None)
+    meta = extractor.pull_and_record("SER", "com.x", analyzer, SimpleNamespace(record=fail))
+    assert meta["skipped"] and meta["sha256"] == sha
+    assert "local_path" not in meta and "md5" not in meta
+    with open(tmp_path / "log.csv", newline="") as f:
+        assert list(csv.reader(f))[1] == ["com.x", "/data/app/com.x-1/base.apk", "", sha]
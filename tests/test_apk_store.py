@@ -0,0 +1,168 @@
+import hashlib
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from analysis.manifest import apk_extractor  # noqa: E402
+from database.apk_store import APKStore  # noqa: E402
+
+
+def _write(path: Path, data: bytes) -> str:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return hashlib.sha256(data).hexdigest()
+
+
+def test_identical_apks_share_one_blob(tmp_path):
+    store = APKStore(str(tmp_path / "store"))
+    one, two = tmp_path / "A" / "base.apk", tmp_path / "B" / "base.apk"
+    sha = _write(one, b"same apk")
+    _write(two, b"same apk")
+
+    store.ingest(str(one), sha)
+    store.ingest(str(two), sha)
+
+    blob = store.blob_path(sha)
+    assert os.path.samefile(blob, one) and os.path.samefile(blob, two)
+    assert len(list((tmp_path / "store" / "blobs").rglob("*.apk"))) == 1
+    assert store.total_size() == len(b"same apk")
+
+
+def test_index_and_result_cache(tmp_path):
+    store = APKStore(str(tmp_path / "store"))
+    store.record("A", "com.x", "/data/app/base.apk", "ab" * 32, "/tmp/x", version="7")
+    assert store.lookup("A", "com.x") == [("/data/app/base.apk", "ab" * 32)]
+    assert store.lookup("A", "com.x", version="8") == []
+    store.set_version("A", "com.x", "8")
+    assert store.lookup("A", "com.x", version="8") == [("/data/app/base.apk", "ab" * 32)]
+
+    assert store.get_result("ab" * 32, "package_info") is None
+    store.put_result("ab" * 32, "package_info", {"version_code": "8"})
+    assert store.get_result("ab" * 32, "package_info") == {"version_code": "8"}
+
+
+def test_gc_evicts_least_recently_used(tmp_path):
+    store = APKStore(str(tmp_path / "store"))
+    hashes = []
+    for i in range(3):
+        path = tmp_path / f"dev{i}" / "base.apk"
+        sha = _write(path, bytes([i]) * 100)
+        store.ingest(str(path), sha)
+        store.record(f"dev{i}", "com.x", "/base.apk", sha, str(path))
+        hashes.append(sha)
+    store.touch(hashes[0])  # now the most recently used
+
+    stats = store.gc(max_bytes=150)
+
+    assert stats == {"removed": 2, "freed": 200, "remaining": 100}
+    assert store.has_blob(hashes[0])
+    assert not store.has_blob(hashes[1]) and not store.has_blob(hashes[2])
+    assert not (tmp_path / "dev1" / "base.apk").exists()
+    assert store.lookup("dev1", "com.x") == []
+
+
+def test_gc_keeps_paths_relinked_to_a_newer_blob(tmp_path):
+    store = APKStore(str(tmp_path / "store"))
+    local = tmp_path / "com.x" / "base.apk"
+    old = _write(local, b"v1" * 50)
+    store.ingest(str(local), old)
+    store.record("A", "com.x", "/data/app/~~abc/base.apk", old, str(local))
+    # The update installs under a new remote path but pulls to the same file.
+    local.unlink()
+    new = _write(local, b"v2" * 60)
+    store.ingest(str(local), new)
+    store.record("A", "com.x", "/data/app/~~def/base.apk", new, str(local))
+    store.touch(new)
+
+    store.gc(max_bytes=150)
+
+    assert not store.has_blob(old)
+    assert local.read_bytes() == b"v2" * 60
+    assert store.lookup("A", "com.x") == [("/data/app/~~def/base.apk", new)]
+
+
+def test_extractor_dedupes_and_caches_analysis(tmp_path, monkeypatch):
+    apk = b"PK" + b"q" * 5000
+    monkeypatch.setattr(
+        apk_extractor, "run_adb",
+        lambda args: SimpleNamespace(stdout="package:/data/app/com.x/base.apk\n"),
+    )
+    monkeypatch.setattr(apk_extractor, "stream_file", lambda serial, remote, **kw: iter([apk]))
+    monkeypatch.setattr(apk_extractor, "adb_shell", lambda serial, cmd: "N/A")
+    store = APKStore(str(tmp_path / "store"))
+    extractor = apk_extractor.APKExtractor(
+        output_dir=str(tmp_path / "out"), log_file=str(tmp_path / "log.csv"), store=store
+    )
+
+    parsed = []
+    analyzer = SimpleNamespace(
+        parse=lambda path: parsed.append(path) or object(),
+        get_package_info=lambda manifest: {"version_code": "42"},
+    )
+    recorded = []
+    tracker = SimpleNamespace(record=lambda *row: recorded.append(row))
+
+    extractor.output_dir = str(tmp_path / "out" / "A")
+    first = extractor.pull_and_record("A", "com.x", analyzer, tracker)
+    extractor.output_dir = str(tmp_path / "out" / "B")
+    second = extractor.pull_and_record("B", "com.x", analyzer, tracker)
+
+    assert first["sha256"] == second["sha256"]
+    assert os.path.samefile(first["local_path"], second["local_path"])
+    assert len(parsed) == 1
+    assert recorded == [("com.x", "42", first["sha256"])] * 2
+    assert store.lookup("B", "com.x", version="42") == [("/data/app/com.x/base.apk", first["sha256"])]
+
+
+def test_store_blobs_are_linked_instead_of_pulled(tmp_path, monkeypatch):
+    apk = b"PK" + b"g" * 4000
+    sha = hashlib.sha256(apk).hexdigest()
+    store = APKStore(str(tmp_path / "store"))
+    seed = tmp_path / "seed.apk"
+    seed.write_bytes(apk)
+    store.ingest(str(seed), sha)
+
+    monkeypatch.setattr(
+        apk_extractor, "run_adb",
+        lambda args: SimpleNamespace(stdout="package:/data/app/com.g/base.apk\n"),
+    )
+    monkeypatch.setattr(apk_extractor, "adb_shell", lambda s, c: f"{sha}  /data/app/com.g/base.apk")
+    monkeypatch.setattr(apk_extractor, "stream_file", lambda *a, **kw: (_ for _ in ()).throw(AssertionError))
+
+    extractor = apk_extractor.APKExtractor(
+        output_dir=str(tmp_path / "out"), log_file=str(tmp_path / "log.csv"), store=store
+    )
+    meta = extractor.pull_apk("C", "com.g")
+
+    assert meta["sha256"] == sha
+    assert os.path.samefile(meta["local_path"], store.blob_path(sha))
+    assert store.lookup("C", "com.g") == [("/data/app/com.g/base.apk", sha)]
+
+
+def test_repull_does_not_overwrite_linked_blob(tmp_path, monkeypatch):
+    versions = iter([b"PK" + b"1" * 3000, b"PK" + b"2" * 3000])
+    monkeypatch.setattr(
+        apk_extractor, "run_adb",
+        lambda args: SimpleNamespace(stdout="package:/data/app/com.r/base.apk\n"),
+    )
+    monkeypatch.setattr(apk_extractor, "adb_shell", lambda s, c: "N/A")
+    # Writes in place, like ``adb pull`` and the socket backend do.
+    monkeypatch.setattr(apk_extractor, "adb_pull",
+                        lambda s, r, local: Path(local).write_bytes(next(versions)))
+    store = APKStore(str(tmp_path / "store"))
+    extractor = apk_extractor.APKExtractor(
+        output_dir=str(tmp_path / "out"), log_file=str(tmp_path / "log.csv"),
+        store=store, stream=False,
+    )
+
+    first = extractor.pull_apk("A", "com.r")
+    second = extractor.pull_apk("A", "com.r")
+
+    assert first["sha256"] != second["sha256"]
+    old_blob = Path(store.blob_path(first["sha256"]))
+    assert hashlib.sha256(old_blob.read_bytes()).hexdigest() == first["sha256"]
+    assert not os.path.samefile(old_blob, store.blob_path(second["sha256"]))
+    assert not Path(second["local_path"] + ".part").exists()
@@ -1,3 +1,4 @@
+import hashlib
 import zipfile
 from pathlib import Path
 from types import SimpleNamespace
@@ -78,3 +79,54 @@ def test_extract_manifest_xml_decode_error(tmp_path, monkeypatch):
     monkeypatch.setattr(apk_utils, "AXML", BrokenAXML)
     assert apk_utils.extract_manifest_xml(str(apk_path)) is None
 
+
+
+def test_apk_handle_opens_once_and_memoizes(tmp_path, monkeypatch):
+    apk_path = tmp_path / "sample.apk"
+    create_sample_apk(apk_path)
+    opens, decodes = [], []
+    real_zip = apk_utils.MappedZip
+
+    def counting_zip(*args, **kwargs):
+        opens.append(args[0])
+        return real_zip(*args, **kwargs)
+
+    class DummyAXML:
+        def __init__(self, data: bytes) -> None:
+            decodes.append(data)
+
+        def get_xml(self) -> str:
+            return "<manifest package='com.x'></manifest>"
+
+    class DummyManifest:
+        def __init__(self, xml: str) -> None:
+            self.xml = xml
+
+        def json(self):
+            return {"@package": "com.x"}
+
+    monkeypatch.setattr(apk_utils, "MappedZip", counting_zip)
+    monkeypatch.setattr(apk_utils, "AXML", DummyAXML)
+    monkeypatch.setattr(apk_utils, "Manifest", DummyManifest)
+
+    with apk_utils.ApkHandle(str(apk_path)) as handle:
+        assert apk_utils.extract_manifest(handle) == b"<manifest></manifest>"
+        assert apk_utils.extract_manifest_xml(handle).startswith("<manifest")
+        assert apk_utils.extract_certificate(handle) == b"dummy-cert"
+        assert handle.manifest is handle.manifest
+        assert handle.manifest_dict == {"@package": "com.x"}
+        assert handle.certificate_fingerprints["sha1"] == hashlib.sha1(b"dummy-cert").hexdigest()
+        assert handle.hashes["sha256"] == hashlib.sha256(apk_path.read_bytes()).hexdigest()
+
+    assert len(opens) == 1
+    assert len(decodes) == 1
+
+
+def test_apk_handle_missing_file(tmp_path):
+    handle = apk_utils.ApkHandle(str(tmp_path / "missing.apk"))
+    assert handle.names == []
+    assert handle.manifest_bytes is None
+    assert handle.manifest is None
+    assert handle.manifest_dict == {}
+    assert handle.certificate_fingerprints == {}
+    assert handle.hashes == {}
@@ -0,0 +1,101 @@
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from axml_builder import encode_axml, sample_manifest  # noqa: E402
+from analysis.manifest.component_scanner import ComponentScanner  # noqa: E402
+from analysis.manifest.manifest_analyzer import ManifestAnalyzer  # noqa: E402
+from utils import axml  # noqa: E402
+from utils.apk_utils import ApkHandle  # noqa: E402
+
+
+@pytest.mark.parametrize("utf8", [False, True])
+@pytest.mark.parametrize("obfuscate", [False, True])
+def test_decodes_manifest_model(utf8, obfuscate):
+    model = axml.decode_manifest(encode_axml(sample_manifest(components=3), utf8, obfuscate))
+    assert model.complete
+    assert (model.package_name, model.version_code, model.version_name) == ("com.example.app", "42", "4.2")
+    assert (model.min_sdk, model.target_sdk) == ("24", "34")
+    assert model.permissions == ["android.permission.INTERNET", "android.permission.READ_SMS"]
+    assert model.main_activity == ".Main"
+    assert [(c.kind, c.name, c.exported) for c in model.components] == [
+        ("activity", ".Main", True), ("receiver", ".Recv0", True), ("receiver", ".Recv1", False),
+    ]
+    assert model.components[1].intent_filters[0].data == [{"android:scheme": "https"}]
+
+
+def test_json_matches_xmltodict_shape():
+    data = axml.decode_manifest(encode_axml(sample_manifest())).json()
+    assert data["@package"] == "com.example.app"
+    assert data["uses-sdk"] == {"@android:minSdkVersion": "24", "@android:targetSdkVersion": "34"}
+    activity = data["application"]["activity"][0]
+    assert activity["@android:exported"] == "true"
+    assert activity["intent-filter"][0]["action"] == [{"@android:name": "android.intent.action.MAIN"}]
+
+
+def test_early_stop_skips_components():
+    data = encode_axml(sample_manifest(components=50))
+    header = axml.decode_manifest(data, fields=["package", "version"])
+    assert header.package_name == "com.example.app" and header.version_code == "42"
+    assert not header.complete and header.components == [] and header.permissions == []
+    perms = axml.decode_manifest(data, fields=["permissions", "sdk"])
+    assert perms.permissions == ["android.permission.INTERNET", "android.permission.READ_SMS"]
+    assert perms.min_sdk == "24" and perms.complete
+    with pytest.raises(ValueError):
+        axml.decode_manifest(data, fields=["colour"])
+
+
+def test_permissions_after_application_are_not_missed():
+    root = ("manifest", {"package": "p"}, [
+        ("application", {}, [("service", {"android:name": ".S"}, [])]),
+        ("uses-permission", {"android:name": "android.permission.READ_SMS"}, []),
+        ("uses-sdk", {"android:minSdkVersion": 21}, []),
+    ])
+    data = encode_axml(root)
+    full = axml.decode_manifest(data)
+    assert full.permissions == ["android.permission.READ_SMS"]
+    for fields in (["permissions"], ["sdk"], ["permissions", "components"]):
+        partial = axml.decode_manifest(data, fields=fields)
+        assert partial.permissions == full.permissions
+        assert partial.min_sdk == "21"
+
+
+def test_typed_values_are_formatted_like_apkutils2():
+    root = ("manifest", {"package": "p", "android:versionCode": -1}, [])
+    assert axml.decode_manifest(encode_axml(root)).version_code == "-1"
+    assert axml._format_value(axml.TYPE_INT_HEX, 255, "") == "0x000000FF"
+    assert axml._format_value(axml.TYPE_REFERENCE, 0x7F040001, "") == "@7F040001"
+    assert axml._format_value(axml.TYPE_REFERENCE, 0x01040001, "") == "@android:01040001"
+
+
+@pytest.mark.parametrize("data", [b"", b"<manifest/>", b"\x03\x00\x08\x00\xff\x00\x00\x00" + b"\x01\x00"])
+def test_malformed_input_raises(data):
+    with pytest.raises(axml.AXMLError):
+        axml.decode_manifest(data)
+
+
+def test_analyzers_use_native_decoder_through_handle(tmp_path):
+    apk = tmp_path / "app.apk"
+    with zipfile.ZipFile(apk, "w") as z:
+        z.writestr("AndroidManifest.xml", encode_axml(sample_manifest(components=3)))
+
+    analyzer = ManifestAnalyzer()
+    with ApkHandle(str(apk)) as handle:
+        manifest = analyzer.parse(handle)
+        assert manifest is handle.manifest
+        assert analyzer.get_package_info(manifest)["main_activity"] == ".Main"
+        assert analyzer.get_sdk_info(handle) == {"min_sdk": "24", "target_sdk": "34"}
+        assert analyzer.to_dict(handle)["@package"] == "com.example.app"
+        result = ComponentScanner().scan(handle)
+    assert result["exported_components"] == [
+        {"type": "activity", "name": ".Main"}, {"type": "receiver", "name": ".Recv0"},
+    ]
+    assert result["risky_permissions"] == ["android.permission.READ_SMS"]
+    assert sorted(result["intent_actions"]) == [
+        "android.intent.action.BOOT_COMPLETED", "android.intent.action.MAIN",
+    ]
+    assert analyzer.parse(str(apk), fields=["package"]).package_name == "com.example.app"
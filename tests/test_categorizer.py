@@ -0,0 +1,98 @@
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List, Set
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from analysis.apps import app_category_keywords as kw  # noqa: E402
+from analysis.apps import categorizer, category_rules, list_installed_apps  # noqa: E402
+
+
+def _matches_any(pkg: str, keywords: List[str]) -> bool:
+    pkg_lower = pkg.lower()
+    return any(pkg_lower.startswith(k.lower()) for k in keywords)
+
+
+def reference_categorize(all_apps: Set[str], system_apps: Set[str],
+                         user_apps: Set[str], manufacturer: str) -> Dict[str, List[str]]:
+    """The original multi-pass implementation, kept as the behavioural spec."""
+    rules = [
+        ("android", kw.ANDROID_PACKAGES), ("google", kw.GOOGLE_PACKAGES),
+        ("facebook", kw.FACEBOOK_PACKAGES), ("tiktok", kw.TIKTOK_PACKAGES),
+        ("twitter", kw.TWITTER_PACKAGES), ("instagram", kw.INSTAGRAM_PACKAGES),
+        ("parler", kw.PARLER_PACKAGES), ("reddit", kw.REDDIT_PACKAGES),
+        ("vendor", kw.VENDOR_KEYWORDS),
+    ]
+    out: Dict[str, List[str]] = {"manufacturer": []}
+    out.update({name: [] for name, _ in rules})
+    out.update({"user": [], "system": [], "uncategorized": []})
+    assigned = set()
+    for pkg in sorted(all_apps):
+        if manufacturer.lower() in pkg.lower() or pkg.startswith(f"com.{manufacturer.lower()}"):
+            out["manufacturer"].append(pkg)
+            assigned.add(pkg)
+    for name, keywords in rules:
+        for pkg in sorted(all_apps - assigned):
+            if _matches_any(pkg, keywords):
+                out[name].append(pkg)
+                assigned.add(pkg)
+    for pkg in sorted(all_apps - assigned):
+        if pkg in user_apps:
+            out["user"].append(pkg)
+            assigned.add(pkg)
+    for pkg in sorted(all_apps - assigned):
+        if pkg in system_apps:
+            out["system"].append(pkg)
+            assigned.add(pkg)
+    for pkg in sorted(all_apps - assigned):
+        out["uncategorized"].append(pkg)
+    return {k: sorted(v) for k, v in out.items()}
+
+
+PREFIXES = [
+    "com.google.android.", "com.google.", "com.android.", "android.", "Android",
+    "com.facebook.", "com.FACEBOOK.orca", "com.zhiliaoapp.", "com.ss.android.ugc.",
+    "com.bytedance.", "com.twitter.android", "com.instagram.android", "com.parler.",
+    "com.reddit.", "com.samsung.", "com.Motorola.", "att.", "com.verizon.",
+    "org.example.", "net.lgsvc.", "ironsrc.", "com.sec.", "io.", "",
+]
+
+
+def _random_device(rng: random.Random):
+    names = {rng.choice(PREFIXES) + "".join(rng.choices("abcdefgsamung", k=rng.randint(0, 8)))
+             for _ in range(200)}
+    names.discard("")
+    pool = sorted(names)
+    user = set(rng.sample(pool, len(pool) // 3))
+    system = set(rng.sample(pool, len(pool) // 3))
+    return names, system, user
+
+
+def test_matches_reference_on_random_inventories():
+    rng = random.Random(7)
+    matcher = categorizer.CategoryMatcher(category_rules.default_rules())
+    for manufacturer in ["samsung", "Motorola", "google", "lg", "N/A", ""]:
+        for _ in range(20):
+            all_apps, system, user = _random_device(rng)
+            expected = reference_categorize(all_apps, system, user, manufacturer)
+            assert matcher.categorize(all_apps, system, user, manufacturer) == expected
+
+
+def test_highest_priority_prefix_wins():
+    matcher = categorizer.CategoryMatcher(category_rules.default_rules())
+    # "com.google.android" (android) beats the shorter "com.google" (google)
+    assert matcher.match("com.google.android.gms") == "android"
+    assert matcher.match("com.google.maps") == "google"
+    assert matcher.match("COM.Reddit.frontpage") == "reddit"
+    assert matcher.match("org.example") is None
+
+
+def test_categorize_packages_output(capsys):
+    result = list_installed_apps.categorize_packages(
+        {"com.samsung.x", "com.android.settings", "org.example"}, set(), {"org.example"}, "samsung"
+    )
+    assert list(result) == categorizer.CategoryMatcher(category_rules.default_rules()).categories
+    assert result["manufacturer"] == ["com.samsung.x"]
+    assert result["user"] == ["org.example"]
+    assert "APP CATEGORY SUMMARY" in capsys.readouterr().out
@@ -0,0 +1,95 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from analysis.apps import categorizer, category_rules  # noqa: E402
+
+TOML_RULES = """
+[[rules]]
+category = "adware"
+priority = 5
+substring = ["inmobi", "ironsrc"]
+
+[[rules]]
+category = "manufacturer"
+priority = 10
+manufacturer = true
+
+[[rules]]
+category = "google"
+priority = 20
+prefix = ["com.google"]
+exact = ["com.android.vending"]
+"""
+
+
+def test_toml_rules_priorities(tmp_path):
+    path = tmp_path / "rules.toml"
+    path.write_text(TOML_RULES)
+    matcher = categorizer.CategoryMatcher(category_rules.load_rules(str(path)))
+
+    assert matcher.categories == ["adware", "manufacturer", "google", "user", "system", "uncategorized"]
+    result = matcher.categorize(
+        {"com.samsung.inmobi", "com.samsung.notes", "COM.Android.Vending", "com.google.maps", "org.x"},
+        {"org.x"}, set(), "samsung",
+    )
+    assert result["adware"] == ["com.samsung.inmobi"]
+    assert result["manufacturer"] == ["com.samsung.notes"]
+    assert result["google"] == ["COM.Android.Vending", "com.google.maps"]
+    assert result["system"] == ["org.x"]
+
+
+def test_invalid_rules_rejected(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": [{"prefix": ["a"]}]}))
+    try:
+        category_rules.load_rules(str(path))
+    except ValueError as exc:
+        assert "category" in str(exc)
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_compiled_rules_are_reused_by_hash(tmp_path, monkeypatch):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": [{"category": "x", "prefix": ["com.x"]}]}))
+    copy = tmp_path / "copy.json"
+    copy.write_bytes(path.read_bytes())
+    monkeypatch.setattr(category_rules, "_compiled", category_rules.OrderedDict())
+
+    compiled = []
+    real_init = categorizer.CategoryMatcher.__init__
+    monkeypatch.setattr(
+        categorizer.CategoryMatcher, "__init__",
+        lambda self, rules: compiled.append(1) or real_init(self, rules),
+    )
+    first = category_rules.compile_rules_file(str(path))
+    second = category_rules.compile_rules_file(str(copy))
+
+    assert len(compiled) == 1
+    assert second is first and first.match("com.x.app") == "x"
+    assert sorted(os.listdir(tmp_path)) == ["copy.json", "rules.json"]
+
+
+def test_watch_reloads_changed_file(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": [{"category": "old", "prefix": ["com."]}]}))
+    now = [0.0]
+    loader = category_rules.RulesLoader(
+        str(path), watch=True, poll_interval=1.0, clock=lambda: now[0],
+    )
+    assert loader.matcher().match("com.a") == "old"
+
+    path.write_text(json.dumps({"rules": [{"category": "new", "prefix": ["com."]}]}))
+    os.utime(path, ns=(1, 10**18))
+    assert loader.matcher().match("com.a") == "old"  # poll interval not reached
+    now[0] = 2.0
+    assert loader.matcher().match("com.a") == "new"
+
+    path.write_text("{broken")
+    os.utime(path, ns=(1, 2 * 10**18))
+    now[0] = 4.0
+    assert loader.matcher().match("com.a") == "new"
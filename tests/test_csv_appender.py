@@ -0,0 +1,141 @@
+import csv
+import gc
+import multiprocessing
+import sys
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from analysis.manifest.version_tracker import VersionTracker  # noqa: E402
+from utils import csv_appender  # noqa: E402
+from utils.csv_appender import BufferedCSVAppender  # noqa: E402
+
+
+def _rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_flushes_on_row_threshold(tmp_path):
+    path = tmp_path / "log.csv"
+    appender = BufferedCSVAppender(str(path), ["a", "b"], max_rows=3, flush_interval=1e9)
+    appender.append([1, "x,y"])
+    appender.append([2, "z"])
+    assert not path.exists()
+    appender.append([3, "w"])
+    assert appender.pending == 0
+    assert _rows(path) == [["a", "b"], ["1", "x,y"], ["2", "z"], ["3", "w"]]
+
+
+def test_flushes_on_interval(tmp_path):
+    now = [0.0]
+    path = tmp_path / "log.csv"
+    appender = BufferedCSVAppender(str(path), ["a"], max_rows=100,
+                                   flush_interval=5, clock=lambda: now[0])
+    appender.append(["first"])
+    assert appender.pending == 1
+    now[0] = 6
+    appender.append(["second"])
+    assert _rows(path) == [["a"], ["first"], ["second"]]
+
+
+def test_header_written_once_across_appenders(tmp_path):
+    path = tmp_path / "log.csv"
+    for i in range(3):
+        with BufferedCSVAppender(str(path), ["n"]) as appender:
+            appender.append([i])
+    assert _rows(path) == [["n"], ["0"], ["1"], ["2"]]
+
+
+def test_threads_share_one_appender(tmp_path):
+    path = tmp_path / "log.csv"
+    appender = BufferedCSVAppender(str(path), ["t", "i"], max_rows=7)
+
+    def work(t):
+        for i in range(200):
+            appender.append([t, i])
+
+    threads = [threading.Thread(target=work, args=(t,)) for t in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    appender.flush()
+    rows = _rows(path)
+    assert rows[0] == ["t", "i"]
+    assert len(rows) == 1601
+
+
+def _process_writer(path, worker):
+    with BufferedCSVAppender(path, ["worker", "i", "pad"], max_rows=50) as appender:
+        for i in range(500):
+            appender.append([worker, i, "x" * 200])
+
+
+def test_processes_do_not_interleave_lines(tmp_path):
+    path = str(tmp_path / "shared.csv")
+    ctx = multiprocessing.get_context("spawn" if sys.platform == "win32" else "fork")
+    procs = [ctx.Process(target=_process_writer, args=(path, w)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    rows = _rows(path)
+    assert rows[0] == ["worker", "i", "pad"]
+    assert len(rows) == 2001
+    assert all(len(r) == 3 and r[2] == "x" * 200 for r in rows[1:])
+
+
+def test_version_tracker_history_sees_buffered_rows(tmp_path):
+    tracker = VersionTracker(str(tmp_path / "timeline.csv"))
+    tracker.record("com.a", "1", "aa")
+    tracker.record("com.b", "2", "bb")
+    history = tracker.history("com.a")
+    assert [row[1:] for row in history] == [("com.a", "1", "aa")]
+
+
+def test_version_tracker_records_are_durable(tmp_path):
+    path = tmp_path / "timeline.csv"
+
+    def record_and_drop():
+        VersionTracker(str(path)).record("com.a", "1", "aa")
+
+    record_and_drop()
+    gc.collect()
+    assert _rows(path)[1][1:] == ["com.a", "1", "aa"]
+    # A second tracker on the file sees the first one's rows.
+    writer, reader = VersionTracker(str(path)), VersionTracker(str(path))
+    writer.record("com.a", "2", "bb")
+    assert [row[2] for row in reader.history("com.a")] == ["1", "2"]
+
+
+def test_dropped_appender_is_flushed_at_exit(tmp_path):
+    path = tmp_path / "log.csv"
+
+    def append_and_drop():
+        BufferedCSVAppender(str(path), ["n"], max_rows=100, flush_interval=1e9).append([1])
+
+    append_and_drop()
+    gc.collect()
+    assert not path.exists()
+    csv_appender.flush_all()
+    assert _rows(path) == [["n"], ["1"]]
+
+
+def test_failed_write_keeps_the_batch(tmp_path):
+    path = tmp_path / "missing" / "log.csv"
+    appender = BufferedCSVAppender(str(path), ["n"], max_rows=100, flush_interval=1e9)
+    appender.extend([[1], [2]])
+    path.parent.rmdir()
+    try:
+        appender.flush()
+    except OSError:
+        pass
+    else:
+        raise AssertionError("flush should fail without its directory")
+    assert appender.pending == 2
+    path.parent.mkdir()
+    appender.append([3])
+    assert appender.flush() == 3
+    assert _rows(path) == [["n"], ["1"], ["2"], ["3"]]
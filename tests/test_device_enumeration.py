@@ -0,0 +1,77 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from analysis.device import device_enumeration, device_info_fetcher
+from models.device_info import DeviceInfo
+
+
+def _info(serial: str) -> DeviceInfo:
+    return DeviceInfo(serial, "Model", "Maker", "14", "34", "dev",
+                      "build", "2024-01-01", "fp", "boot", "arm64")
+
+
+def test_wedged_device_returns_stale(monkeypatch):
+    release = threading.Event()
+
+    def fake_get(serial, refresh=False):
+        if serial == "WEDGED":
+            release.wait(5)
+        return _info(serial)
+
+    monkeypatch.setattr(device_info_fetcher, "get_device_info", fake_get)
+    monkeypatch.setattr(device_info_fetcher, "get_connected_devices",
+                        lambda: ["A", "WEDGED", "B"])
+    start = time.monotonic()
+    try:
+        devices = device_info_fetcher.fetch_all_device_info(workers=2, deadline=0.2)
+    finally:
+        release.set()
+    assert time.monotonic() - start < 2
+    assert [d.serial for d in devices] == ["A", "WEDGED", "B"]
+    assert [d.stale for d in devices] == [False, True, False]
+    assert devices[1].model == "N/A"
+
+
+def test_worker_limit(monkeypatch):
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def fake_get(serial, refresh=False):
+        with lock:
+            active.append(serial)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.remove(serial)
+        return _info(serial)
+
+    monkeypatch.setattr(device_info_fetcher, "get_device_info", fake_get)
+    serials = [f"S{i}" for i in range(10)]
+    found = list(device_info_fetcher.iter_device_info(serials, workers=3, deadline=5))
+    assert sorted(d.serial for d in found) == sorted(serials)
+    assert max(peak) <= 3
+
+
+def test_failed_device_is_stale(monkeypatch):
+    def fake_get(serial, refresh=False):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(device_info_fetcher, "get_device_info", fake_get)
+    (info,) = device_info_fetcher.iter_device_info(["X"], deadline=5)
+    assert info.stale and info.serial == "X"
+    # The flag is for display only and stays out of reports.
+    assert "stale" not in info.to_dict() and info.to_dict()["serial"] == "X"
+
+
+def test_enumerate_and_display_progressive(monkeypatch, capsys):
+    monkeypatch.setattr(device_info_fetcher, "get_device_info", lambda s, refresh=False: _info(s))
+    monkeypatch.setattr(device_info_fetcher, "get_connected_devices", lambda: ["A"])
+    devices = device_enumeration.enumerate_and_display_devices()
+    out = capsys.readouterr().out
+    assert "Connected Devices" in out
+    assert [d.serial for d in devices] == ["A"]
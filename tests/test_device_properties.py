@@ -0,0 +1,93 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from analysis.device import device_info_fetcher, property_cache
+
+GETPROP = """[ro.product.model]: [Pixel 7]
+[ro.product.manufacturer]: [Google]
+[ro.build.fingerprint]: [google/panther:14/UQ1A/1:user/release-keys]
+[ro.build.version.sdk]: [34]
+[persist.multi.line]: [first
+second]
+"""
+BOOT_ID = "a1b2c3"
+
+
+class FakeDevice:
+    def __init__(self):
+        self.calls = []
+        self.fingerprint = "google/panther:14/UQ1A/1:user/release-keys"
+        self.boot_id = BOOT_ID
+
+    def __call__(self, serial, cmd):
+        self.calls.append(cmd)
+        marker = property_cache._BOOT_MARKER
+        if cmd.startswith("getprop;"):
+            return f"{GETPROP}{marker}\n{self.boot_id}"
+        return f"{self.fingerprint}\n{marker}\n{self.boot_id}"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_getprop_multiline():
+    props = property_cache.parse_getprop(GETPROP)
+    assert props["ro.product.model"] == "Pixel 7"
+    assert props["persist.multi.line"] == "first\nsecond"
+
+
+def test_snapshot_cached_within_ttl(monkeypatch):
+    device = FakeDevice()
+    monkeypatch.setattr(property_cache, "adb_shell", device)
+    cache = property_cache.PropertyCache(ttl=60, clock=FakeClock())
+    snap = cache.snapshot("SER")
+    assert snap.boot_id == BOOT_ID
+    assert cache.get("SER", "ro.build.version.sdk") == "34"
+    assert cache.get("SER", "ro.missing") == ""
+    assert len(device.calls) == 1
+
+
+def test_snapshot_revalidated_after_ttl(monkeypatch):
+    device = FakeDevice()
+    clock = FakeClock()
+    monkeypatch.setattr(property_cache, "adb_shell", device)
+    cache = property_cache.PropertyCache(ttl=60, clock=clock)
+    cache.snapshot("SER")
+
+    clock.now = 61
+    cache.snapshot("SER")
+    # identity probe only, no full refetch
+    assert [c.split()[0] for c in device.calls] == ["getprop;", "getprop"]
+
+    clock.now = 200
+    device.boot_id = "rebooted"
+    snap = cache.snapshot("SER")
+    assert snap.boot_id == "rebooted"
+    assert device.calls[-1].startswith("getprop;")
+
+
+def test_unreachable_device(monkeypatch):
+    monkeypatch.setattr(property_cache, "adb_shell", lambda s, c: "N/A")
+    cache = property_cache.PropertyCache()
+    assert cache.snapshot("SER") is None
+    assert cache.get("SER", "ro.product.model") == "N/A"
+
+
+def test_get_device_info_single_round_trip(monkeypatch):
+    device = FakeDevice()
+    monkeypatch.setattr(property_cache, "adb_shell", device)
+    monkeypatch.setattr(property_cache, "_default_cache", property_cache.PropertyCache())
+    info = device_info_fetcher.get_device_info("SER")
+    again = device_info_fetcher.get_device_info("SER")
+    assert info == again
+    assert info.model == "Pixel 7"
+    assert info.manufacturer == "Google"
+    assert info.bootloader == ""
+    assert len(device.calls) == 1
@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from analysis.manifest import dumpsys_parser
+
+DUMP = """Packages:
+  Package [com.example.app] (a1b2c3):
+    userId=10123
+    pkg=Package{d4e5 com.example.app}
+    versionCode=4200 minSdk=24 targetSdk=34
+    versionName=4.2.0
+    flags=[ HAS_CODE ALLOW_CLEAR_USER_DATA ]
+    pkgFlags=[ HAS_CODE ALLOW_CLEAR_USER_DATA ALLOW_BACKUP ]
+    firstInstallTime=2024-01-01 10:00:00
+    lastUpdateTime=2024-03-05 12:30:00
+    installerPackageName=com.android.vending
+    declared permissions:
+      com.example.app.permission.C2D_MESSAGE: prot=signature, INSTALLED
+    requested permissions:
+      android.permission.INTERNET
+      android.permission.CAMERA
+      android.permission.ACCESS_FINE_LOCATION: restricted=true
+    install permissions:
+      android.permission.INTERNET: granted=true
+    User 0: ceDataInode=123 installed=true hidden=false
+      gids=[3003]
+      runtime permissions:
+        android.permission.CAMERA: granted=true, flags=[ USER_SET|USER_SENSITIVE_WHEN_GRANTED ]
+        android.permission.ACCESS_FINE_LOCATION: granted=false, flags=[ USER_SET ]
+    User 10: ceDataInode=456 installed=true hidden=false
+      runtime permissions:
+        android.permission.CAMERA: granted=false
+  Package [com.other] (f00):
+    versionCode=1 minSdk=21 targetSdk=30
+    installerPackageName=null
+
+Hidden system packages:
+  Package [com.example.app] (beef):
+    versionCode=1
+"""
+
+
+def test_parse_typed_record():
+    records = list(dumpsys_parser.parse_dumpsys_packages(DUMP.splitlines(True)))
+    assert [r.name for r in records] == ["com.example.app", "com.other"]
+    app = records[0]
+    assert app.version_code == "4200"
+    assert app.version_name == "4.2.0"
+    assert app.last_update_time == "2024-03-05 12:30:00"
+    assert app.first_install_time == "2024-01-01 10:00:00"
+    assert app.installer == "com.android.vending"
+    assert app.pkg_flags == ["HAS_CODE", "ALLOW_CLEAR_USER_DATA", "ALLOW_BACKUP"]
+    assert app.requested_permissions == [
+        "android.permission.INTERNET",
+        "android.permission.CAMERA",
+        "android.permission.ACCESS_FINE_LOCATION",
+    ]
+    assert app.install_permissions["android.permission.INTERNET"].granted
+    camera = app.runtime_permissions["android.permission.CAMERA"]
+    assert camera.granted  # user 10's denial is ignored
+    assert camera.flags == ["USER_SET", "USER_SENSITIVE_WHEN_GRANTED"]
+    assert app.granted_permissions == ["android.permission.CAMERA", "android.permission.INTERNET"]
+    assert "com.example.app.permission.C2D_MESSAGE" not in app.permissions
+    assert records[1].installer == ""
+
+
+def test_wanted_filter_and_incremental_feed():
+    parser = dumpsys_parser.DumpsysPackageParser({"com.other"})
+    emitted = [r for line in DUMP.splitlines(True) if (r := parser.feed(line))]
+    assert parser.close() is None
+    assert [r.name for r in emitted] == ["com.other"]
+    assert emitted[0].version_code == "1"
+
+
+def test_complete_only_drops_unterminated_last_block():
+    cut = DUMP.split("  Package [com.other]")[0] + "  Package [com.other] (f00):\n    versionCode=1\n"
+    assert [r.name for r in dumpsys_parser.parse_dumpsys_packages(cut.splitlines(True))] == [
+        "com.example.app", "com.other"]
+    kept = dumpsys_parser.parse_dumpsys_packages(cut.splitlines(True), complete_only=True)
+    assert [r.name for r in kept] == ["com.example.app"]
+    whole = dumpsys_parser.parse_dumpsys_packages(DUMP.splitlines(True), complete_only=True)
+    assert [r.name for r in whole] == ["com.example.app", "com.other"]
@@ -0,0 +1,90 @@
+import hashlib
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from database.hash_cache import HashCache  # noqa: E402
+from utils import hash_utils  # noqa: E402
+
+
+def _old_file(path, data):
+    path.write_bytes(data)
+    past = time.time_ns() - 3600 * 10**9
+    os.utime(path, ns=(past, past))
+    return str(path)
+
+
+def _count_reads(monkeypatch):
+    reads = []
+    real = hash_utils._file_chunks
+    monkeypatch.setattr(hash_utils, "_file_chunks",
+                        lambda path, *a: reads.append(path) or real(path, *a))
+    return reads
+
+
+def test_unchanged_file_is_not_reread(tmp_path, monkeypatch):
+    path = _old_file(tmp_path / "a.apk", b"apk bytes")
+    reads = _count_reads(monkeypatch)
+    cache = HashCache(str(tmp_path / "hashes.sqlite3"))
+    expected = hashlib.sha256(b"apk bytes").hexdigest()
+    assert hash_utils.sha256_of_file(path, cache=cache) == expected
+    assert hash_utils.sha256_of_file(path, cache=cache) == expected
+    cache.close()
+
+    reopened = HashCache(str(tmp_path / "hashes.sqlite3"))
+    assert hash_utils.sha256_of_file(path, cache=reopened) == expected
+    assert len(reads) == 1
+    # Only the missing digest is computed.
+    both = hash_utils.hashes_of_file(path, ("sha256", "md5"), cache=reopened)
+    assert both == {"sha256": expected, "md5": hashlib.md5(b"apk bytes").hexdigest()}
+    assert len(reads) == 2
+    assert hash_utils.md5_of_file(path, cache=reopened) == both["md5"]
+    assert len(reads) == 2
+    assert reopened.stats() == {"hits": 2, "misses": 1, "files": 1}
+
+
+def test_changed_or_recent_files_are_rehashed(tmp_path, monkeypatch):
+    cache = HashCache(str(tmp_path / "hashes.sqlite3"))
+    path = _old_file(tmp_path / "a.apk", b"v1")
+    hash_utils.sha1_of_file(path, cache=cache)
+    _old_file(tmp_path / "a.apk", b"v2!")
+    reads = _count_reads(monkeypatch)
+    assert hash_utils.sha1_of_file(path, cache=cache) == hashlib.sha1(b"v2!").hexdigest()
+    assert len(reads) == 1
+
+    # A file modified just now may change again within the mtime granularity.
+    fresh = tmp_path / "fresh.apk"
+    fresh.write_bytes(b"new")
+    hash_utils.sha256_of_file(str(fresh), cache=cache)
+    hash_utils.sha256_of_file(str(fresh), cache=cache)
+    assert len(reads) == 3
+    assert cache.stats()["files"] == 1
+
+
+def test_hash_tree_uses_cache_and_prunes(tmp_path, monkeypatch):
+    root = tmp_path / "corpus"
+    (root / "sub").mkdir(parents=True)
+    files = {
+        _old_file(root / "one.apk", b"1"): b"1",
+        _old_file(root / "sub" / "two.APK", b"2"): b"2",
+    }
+    _old_file(root / "notes.txt", b"skip")
+    cache = HashCache(str(tmp_path / "hashes.sqlite3"))
+    first = hash_utils.hash_tree(str(root), ("sha256", "md5"), cache=cache,
+                                 suffixes=(".apk",), workers=2)
+    assert first == {
+        path: {"sha256": hashlib.sha256(data).hexdigest(), "md5": hashlib.md5(data).hexdigest()}
+        for path, data in files.items()
+    }
+    reads = _count_reads(monkeypatch)
+    assert hash_utils.hash_tree(str(root), ("sha256", "md5"), cache=cache,
+                                suffixes=(".apk",)) == first
+    assert reads == []
+
+    os.remove(root / "one.apk")
+    assert cache.prune(str(root / "sub")) == 0
+    assert cache.prune(str(root)) == 1
+    assert cache.stats()["files"] == 1
@@ -32,3 +32,14 @@ def test_chunked_file_hash(tmp_path):
 
     assert hash_utils.sha256_of_file(str(path)) == hashlib.sha256(data).hexdigest()
 
+
+
+def test_multi_hasher_matches_file_hashes(tmp_path):
+    path = tmp_path / "multi.bin"
+    data = bytes(range(256)) * 5000
+    path.write_bytes(data)
+    digests = hash_utils.hashes_of_file(str(path), ("sha256", "md5"))
+    assert digests == {
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "md5": hashlib.md5(data).hexdigest(),
+    }
@@ -0,0 +1,91 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from analysis.apps import inventory, list_installed_apps, social_media_detector
+from analysis.device import device_reporter
+from models.device_info import DeviceInfo
+
+OUTPUT = """package:/data/app/~~Ab==/com.facebook.katana-Xy==/base.apk=com.facebook.katana versionCode:1234  installer=com.android.vending uid:10201
+package:/system/priv-app/Settings/Settings.apk=com.android.settings versionCode:34  installer=null uid:1000
+package:/product/app/Maps/Maps.apk=com.google.android.apps.maps versionCode:99  installer=null uid:10150
+package:/data/app/~~Cd==/org.example.notes-Zz==/base.apk=org.example.notes versionCode:7  installer=com.android.vending uid:10222
+__NETHIRA_SYSTEM__
+package:com.android.settings
+package:com.google.android.apps.maps
+__NETHIRA_THIRD_PARTY__
+package:com.facebook.katana
+package:org.example.notes
+"""
+
+
+def test_parse_package_line():
+    rec = inventory.parse_package_line(
+        "package:/data/app/~~Ab==/com.x-Y==/base.apk=com.x versionCode:5 uid:10001 installer=null"
+    )
+    assert rec.name == "com.x"
+    assert rec.apk_path == "/data/app/~~Ab==/com.x-Y==/base.apk"
+    assert rec.version_code == "5"
+    assert rec.uid == "10001"
+    assert rec.installer == ""
+    assert inventory.parse_package_line("package:com.plain").name == "com.plain"
+    assert inventory.parse_package_line("garbage") is None
+
+
+def test_parse_inventory_flags():
+    inv = inventory.parse_inventory("SER", OUTPUT)
+    assert inv.package_names == [
+        "com.android.settings",
+        "com.facebook.katana",
+        "com.google.android.apps.maps",
+        "org.example.notes",
+    ]
+    assert inv.system_packages == {"com.android.settings", "com.google.android.apps.maps"}
+    assert inv.third_party_packages == {"com.facebook.katana", "org.example.notes"}
+    assert inv.get("com.facebook.katana").installer == "com.android.vending"
+
+
+def test_report_uses_one_listing(monkeypatch):
+    calls = []
+
+    def fake_shell(serial, cmd):
+        calls.append(cmd)
+        return OUTPUT
+
+    monkeypatch.setattr(inventory, "adb_shell", fake_shell)
+    monkeypatch.setattr(
+        device_reporter.device_info_fetcher,
+        "get_device_info",
+        lambda serial: DeviceInfo(serial, *["x"] * 10),
+    )
+    report = device_reporter.build_report("SER", "samsung")
+    assert calls == [inventory.INVENTORY_CMD]
+    assert report["app_categories"]["facebook"] == ["com.facebook.katana"]
+    assert report["app_categories"]["user"] == ["org.example.notes"]
+    assert report["social_media"] == {"facebook": ["com.facebook.katana"]}
+
+
+def test_modules_accept_inventory():
+    inv = inventory.parse_inventory("SER", OUTPUT)
+    apps = list_installed_apps.categorize_installed_apps(inv, "samsung")
+    # com.google.android.* is claimed by the higher-priority android rule
+    assert apps["android"] == ["com.android.settings", "com.google.android.apps.maps"]
+    assert apps["google"] == []
+    assert social_media_detector.detect_social_media_apps(inv) == {
+        "facebook": ["com.facebook.katana"]
+    }
+
+
+def test_get_inventory_caches(monkeypatch):
+    calls = []
+    monkeypatch.setattr(inventory, "adb_shell", lambda s, c: calls.append(c) or OUTPUT)
+    inventory.invalidate()
+    try:
+        first = inventory.get_inventory("SER")
+        assert inventory.get_inventory("SER") is first
+        assert len(calls) == 1
+        inventory.get_inventory("SER", refresh=True)
+        assert len(calls) == 2
+    finally:
+        inventory.invalidate()
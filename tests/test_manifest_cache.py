@@ -0,0 +1,77 @@
+import sys
+import zipfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from axml_builder import encode_axml, sample_manifest  # noqa: E402
+from analysis.manifest.component_scanner import ComponentScanner  # noqa: E402
+from analysis.manifest.manifest_analyzer import ManifestAnalyzer  # noqa: E402
+from database.manifest_cache import ManifestCache  # noqa: E402
+from utils import apk_utils  # noqa: E402
+
+
+def _cache(tmp_path, **kwargs):
+    return ManifestCache(str(tmp_path / "manifests.sqlite3"), **kwargs)
+
+
+def test_memory_and_disk_tiers(tmp_path):
+    cache = _cache(tmp_path)
+    assert cache.get("aa") is None
+    cache.put("aa", {"package_info": {"package": "com.a"}})
+    assert cache.get("aa")["package_info"]["package"] == "com.a"
+    cache.close()
+
+    reopened = _cache(tmp_path)
+    assert reopened.get("aa") == {"package_info": {"package": "com.a"}}
+    assert reopened.get("aa") is not None
+    stats = reopened.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 0)
+    assert stats["hit_rate"] == 1.0 and stats["entries"] == 1
+
+    other = _cache(tmp_path, parser_version="axml-999")
+    assert other.get("aa") is None
+    other.invalidate(stale_only=True)
+    assert reopened.get("aa") is not None  # served from memory
+    assert other.stats()["entries"] == 0
+
+
+def test_evicts_least_recently_used(tmp_path):
+    now = [0.0]
+    cache = _cache(tmp_path, max_bytes=250, memory_entries=0, clock=lambda: now[0])
+    for i, sha in enumerate(["a", "b", "c"]):
+        now[0] = i
+        cache.put(sha, {"pad": "x" * 60})
+    now[0] = 10
+    assert cache.get("a") is not None  # refresh "a"
+    cache.put("d", {"pad": "x" * 60})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("d") is not None
+    assert cache.stats()["bytes"] <= 250
+
+
+def test_analyzers_read_features_from_cache(tmp_path, monkeypatch):
+    apk = tmp_path / "app.apk"
+    with zipfile.ZipFile(apk, "w") as z:
+        z.writestr("AndroidManifest.xml", encode_axml(sample_manifest(components=3)))
+        z.writestr("META-INF/CERT.RSA", b"cert")
+    decodes = []
+    real_decode = apk_utils.decode_manifest
+    monkeypatch.setattr(apk_utils, "decode_manifest",
+                        lambda data, fields=None: decodes.append(1) or real_decode(data, fields))
+
+    uncached = ComponentScanner().scan_apk(str(apk))
+    cache = _cache(tmp_path)
+    first = ManifestAnalyzer(cache=cache).features(str(apk))
+    assert first["package_info"]["main_activity"] == ".Main"
+    assert first["sdk_info"] == {"min_sdk": "24", "target_sdk": "34"}
+    assert set(first["certificate_fingerprints"]) == {"sha256", "sha1", "md5"}
+    decoded = len(decodes)
+
+    assert ManifestAnalyzer(cache=cache).features(str(apk)) == first
+    cached = ComponentScanner(cache=cache).scan_apk(str(apk), sha256="unused-key-not-cached")
+    assert ComponentScanner(cache=cache).scan_apk(str(apk)) == uncached
+    # only the lookup under the unknown digest decoded again
+    assert len(decodes) == decoded + 1
+    assert cached == uncached
+    assert cache.stats()["memory_hits"] >= 2
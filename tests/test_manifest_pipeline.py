@@ -36,11 +36,19 @@ def test_format_results():
 
 
 def test_scan_app_parses_permissions():
-    adb_output = """
-        package: com.example
-        permission: android.permission.READ_SMS
-        permission: android.permission.WRITE_CONTACTS
-    """
+    adb_output = """Activity Resolver Table:
+  Non-Data Actions:
+      android.intent.action.MAIN:
+        1a2b com.example/.Main filter 3c4d
+          Action: "android.intent.action.MAIN"
+          mRequiredPermission=android.permission.SEND_SMS
+
+Packages:
+  Package [com.example] (1a2b):
+    requested permissions:
+      android.permission.READ_SMS
+      android.permission.WRITE_CONTACTS
+"""
     with patch("analysis.manifest.scanner.adb_shell", return_value=adb_output):
         result = scanner.scan_app("serial", "com.example")
     assert result["package"] == "com.example"
@@ -48,12 +56,20 @@ def test_scan_app_parses_permissions():
     assert "android.permission.WRITE_CONTACTS" in result["permissions"]
     assert "android.permission.READ_SMS" in result["suspicious"]
     assert "android.permission.WRITE_CONTACTS" not in result["suspicious"]
+    # permissions outside the package block are not the package's
+    assert "android.permission.SEND_SMS" not in result["permissions"]
 
 
 def test_scan_app_no_permissions():
     with patch("analysis.manifest.scanner.adb_shell", return_value=""):
         result = scanner.scan_app("serial", "pkg")
-    assert result == {"package": "pkg", "permissions": [], "suspicious": []}
+    assert result == {
+        "package": "pkg",
+        "permissions": [],
+        "suspicious": [],
+        "requested": [],
+        "granted": [],
+    }
 
 
 def test_scan_packages_calls_scan_app(monkeypatch):
@@ -70,10 +86,81 @@ def test_scan_packages_calls_scan_app(monkeypatch):
     assert len(results) == 2
 
 
+BULK_DUMP = """Packages:
+  Package [com.example] (1a2b):
+    userId=10100
+    requested permissions:
+      android.permission.READ_SMS
+  Package [com.other] (3c4d):
+    install permissions:
+      android.permission.INTERNET: granted=true
+
+Hidden system packages:
+  Package [com.example] (5e6f):
+    requested permissions:
+      android.permission.CAMERA
+"""
+
+
+def test_scan_packages_bulk_single_dump(monkeypatch):
+    commands = []
+
+    def fake_lines(serial, cmd):
+        commands.append(cmd)
+        return iter(BULK_DUMP.splitlines(keepends=True))
+
+    scanned = []
+    monkeypatch.setattr(scanner, "iter_shell_lines", fake_lines)
+    monkeypatch.setattr(
+        scanner, "scan_app",
+        lambda serial, pkg: scanned.append(pkg) or {"package": pkg, "permissions": [], "suspicious": []},
+    )
+    results = scanner.scan_packages("serial", ["com.other", "com.example", "com.gone"], bulk=True)
+
+    assert commands == [scanner.BULK_DUMPSYS_CMD]
+    assert [r["package"] for r in results] == ["com.other", "com.example", "com.gone"]
+    assert results[0]["permissions"] == ["android.permission.INTERNET"]
+    # the hidden factory copy must not leak CAMERA into the live package
+    assert results[1]["permissions"] == ["android.permission.READ_SMS"]
+    assert results[1]["suspicious"] == ["android.permission.READ_SMS"]
+    assert results[1]["requested"] == ["android.permission.READ_SMS"]
+    assert results[0]["granted"] == ["android.permission.INTERNET"]
+    assert scanned == ["com.gone"]
+
+
+def test_truncated_bulk_dump_rescans_last_package(monkeypatch):
+    # The stream drops inside com.other's block, before its grants arrive.
+    cut = BULK_DUMP.split("      android.permission.INTERNET")[0]
+    monkeypatch.setattr(scanner, "iter_shell_lines",
+                        lambda serial, cmd: iter(cut.splitlines(keepends=True)))
+    scanned = []
+    monkeypatch.setattr(
+        scanner, "scan_app",
+        lambda serial, pkg: scanned.append(pkg) or {"package": pkg, "permissions": [], "suspicious": []},
+    )
+    results = scanner.scan_packages("serial", ["com.example", "com.other"], bulk=True)
+
+    assert scanned == ["com.other"]
+    assert results[0]["permissions"] == ["android.permission.READ_SMS"]
+
+
+def test_single_and_bulk_scans_agree(monkeypatch):
+    monkeypatch.setattr(scanner, "iter_shell_lines",
+                        lambda serial, cmd: iter(BULK_DUMP.splitlines(keepends=True)))
+    bulk = scanner.scan_packages("serial", ["com.example", "com.other"], bulk=True)
+    single = []
+    for pkg in ["com.example", "com.other"]:
+        block = BULK_DUMP.split("  Package [")[1 if pkg == "com.example" else 2]
+        output = "Receiver Resolver Table:\n  android.permission.SEND_SMS\n\nPackages:\n  Package [" + block
+        with patch("analysis.manifest.scanner.adb_shell", return_value=output):
+            single.append(scanner.scan_app("serial", pkg))
+    assert single == bulk
+
+
 def test_analyze_packages_pipeline(monkeypatch, tmp_path):
     fake_results = [{"package": "pkg", "permissions": [], "suspicious": []}]
 
-    monkeypatch.setattr(pipeline, "scan_packages", lambda s, p: fake_results)
+    monkeypatch.setattr(pipeline, "scan_packages", lambda s, p, **kw: fake_results)
     json_called = []
     csv_called = []
 
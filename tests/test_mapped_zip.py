@@ -0,0 +1,125 @@
+import os
+import struct
+import sys
+import zipfile
+import zlib
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils.apk_utils import ApkHandle, MappedZip  # noqa: E402
+
+BIG = os.urandom(50000) + b"x" * 200000
+
+
+def _sample(path: Path, comment: bytes = b"") -> None:
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("res/AndroidManifest.xml", b"decoy")
+        z.writestr("AndroidManifest.xml", b"manifest" * 100, zipfile.ZIP_DEFLATED)
+        z.writestr("assets/big.obb", BIG, zipfile.ZIP_STORED)
+        z.writestr("classes.dex", BIG, zipfile.ZIP_DEFLATED)
+        z.writestr("META-INF/CERT.SF", b"sf")
+        z.writestr("META-INF/CERT.RSA", b"rsa")
+        z.comment = comment
+
+
+def _zip64(path: Path, name: str, data: bytes) -> None:
+    """Write a one-entry archive using ZIP64 sizes, offset and end records."""
+    raw_name, crc, n = name.encode(), zlib.crc32(data), len(data)
+    local = struct.pack("<4s5H3L2H", b"PK\x03\x04", 45, 0, 0, 0, 0, crc,
+                        0xFFFFFFFF, 0xFFFFFFFF, len(raw_name), 20)
+    local += raw_name + struct.pack("<HHQQ", 1, 16, n, n) + data
+    central = struct.pack("<4s6H3L5H2L", b"PK\x01\x02", 45, 45, 0, 0, 0, 0, crc,
+                          0xFFFFFFFF, 0xFFFFFFFF, len(raw_name), 28, 0, 0, 0, 0, 0xFFFFFFFF)
+    central += raw_name + struct.pack("<HHQQQ", 1, 24, n, n, 0)
+    eocd64_at = len(local) + len(central)
+    tail = struct.pack("<4sQ2H2L4Q", b"PK\x06\x06", 44, 45, 45, 0, 0, 1, 1, len(central), len(local))
+    tail += struct.pack("<4sLQL", b"PK\x06\x07", 0, eocd64_at, 1)
+    tail += struct.pack("<4s4H2LH", b"PK\x05\x06", 0, 0, 0xFFFF, 0xFFFF,
+                        0xFFFFFFFF, 0xFFFFFFFF, 0)
+    path.write_bytes(local + central + tail)
+
+
+def test_reads_match_zipfile(tmp_path):
+    apk = tmp_path / "a.apk"
+    _sample(apk, comment=b"release build")
+    with MappedZip(str(apk)) as mz, zipfile.ZipFile(apk) as z:
+        assert [e.name for e in mz.iter_entries()] == z.namelist()
+        for name in z.namelist():
+            assert mz.read(name) == z.read(name)
+        assert mz.find("missing.txt") is None
+        assert mz.find("AndroidManifest.xml").name == "AndroidManifest.xml"
+        assert [e.name for e in mz.find_prefix("META-INF/")] == ["META-INF/CERT.SF", "META-INF/CERT.RSA"]
+
+
+def test_signature_inside_comment(tmp_path):
+    apk = tmp_path / "a.apk"
+    _sample(apk, comment=b"PK\x05\x06 looks like an end record")
+    with MappedZip(str(apk)) as mz:
+        assert mz.count == 6
+        assert mz.read("META-INF/CERT.RSA") == b"rsa"
+
+
+def test_duplicate_entry_names_are_rejected(tmp_path):
+    apk = tmp_path / "dup.apk"
+    with pytest.warns(UserWarning):
+        with zipfile.ZipFile(apk, "w") as z:
+            z.writestr("AndroidManifest.xml", b"first")
+            z.writestr("classes.dex", b"dex")
+            z.writestr("AndroidManifest.xml", b"second")
+    with MappedZip(str(apk)) as mz:
+        with pytest.raises(zipfile.BadZipFile, match="duplicate"):
+            mz.read("AndroidManifest.xml")
+        assert mz.read("classes.dex") == b"dex"
+    with ApkHandle(str(apk)) as handle:
+        assert handle.manifest_bytes is None
+
+
+def test_stored_view_is_zero_copy_and_deflate_streams(tmp_path):
+    apk = tmp_path / "a.apk"
+    _sample(apk)
+    mz = MappedZip(str(apk))
+    entry = mz.find("assets/big.obb")
+    with mz.view(entry) as view:
+        assert isinstance(view.obj, type(mz._map))
+        assert view == BIG
+    dex = mz.find("classes.dex")
+    with pytest.raises(ValueError):
+        mz.view(dex)
+    chunks = list(mz.iter_chunks(dex, chunk_size=4096))
+    assert max(len(c) for c in chunks) <= 4096
+    assert b"".join(chunks) == BIG
+    mz.close()
+
+
+def test_zip64_records(tmp_path):
+    apk = tmp_path / "z64.apk"
+    _zip64(apk, "AndroidManifest.xml", b"hello zip64")
+    with MappedZip(str(apk)) as mz:
+        (entry,) = mz.iter_entries()
+        assert (entry.size, entry.header_offset) == (11, 0)
+        assert mz.read("AndroidManifest.xml") == b"hello zip64"
+    with zipfile.ZipFile(apk) as z:
+        assert z.read("AndroidManifest.xml") == b"hello zip64"
+
+
+def test_rejects_non_zip(tmp_path):
+    bad, empty = tmp_path / "bad.apk", tmp_path / "empty.apk"
+    bad.write_bytes(b"not a zip" * 100)
+    empty.write_bytes(b"")
+    for path in (bad, empty):
+        with pytest.raises(zipfile.BadZipFile):
+            MappedZip(str(path))
+    assert ApkHandle(str(bad)).manifest_bytes is None
+
+
+def test_handle_finds_certificates_without_walking(tmp_path, monkeypatch):
+    apk = tmp_path / "a.apk"
+    _sample(apk)
+    monkeypatch.setattr(MappedZip, "iter_entries", lambda self: pytest.fail("walked directory"))
+    with ApkHandle(str(apk)) as handle:
+        assert handle.certificate_names == ["META-INF/CERT.RSA"]
+        assert handle.certificate == b"rsa"
+        assert handle.manifest_bytes == b"manifest" * 100
@@ -0,0 +1,73 @@
+import random
+import sys
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils.pattern_matcher import AhoCorasick, PatternMatcher, PrefixTrie  # noqa: E402
+
+
+def test_aho_corasick_finds_overlapping_matches():
+    ac = AhoCorasick([("he", "he"), ("she", "she"), ("his", "his"), ("hers", "hers")])
+    assert sorted(ac.iter_matches("ushers")) == [(3, "he"), (3, "she"), (5, "hers")]
+    assert ac.matches("ahishers") == ["his", "she", "he", "hers"]
+    assert not ac.has_match("xyz")
+
+
+def test_aho_corasick_matches_naive_search():
+    rng = random.Random(3)
+    patterns = {"".join(rng.choices("abc", k=rng.randint(1, 4))) for _ in range(40)}
+    ac = AhoCorasick((p, p) for p in patterns)
+    for _ in range(200):
+        text = "".join(rng.choices("abcd", k=rng.randint(0, 20)))
+        assert set(ac.matches(text)) == {p for p in patterns if p in text}
+
+
+def test_patterns_added_after_search_are_found():
+    ac = AhoCorasick([("abc", 1)])
+    assert ac.matches("xabcx") == [1]
+    ac.add("bcx", 2)
+    assert ac.matches("xabcx") == [1, 2]
+
+
+def test_first_searches_from_many_threads_agree(monkeypatch):
+    patterns = [(f"perm{i:04d}x", i) for i in range(2000)]
+    ac = AhoCorasick(patterns)
+    builds = []
+    real_build = ac._build
+    monkeypatch.setattr(ac, "_build", lambda: builds.append(1) or real_build())
+    barrier = threading.Barrier(8)
+    results = []
+
+    def search():
+        barrier.wait()
+        results.append(ac.matches("..perm1999x..perm0007x.."))
+
+    threads = [threading.Thread(target=search) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert builds == [1]
+    assert results == [[1999, 7]] * 8
+
+
+def test_prefix_trie_shortest_first_and_case():
+    trie = PrefixTrie(ignore_case=True)
+    trie.add("com.google", "google")
+    trie.add("com.google.android", "android")
+    assert trie.matches("COM.Google.Android.gms") == ["google", "android"]
+    assert trie.matches("com.goo") == []
+
+
+def test_pattern_matcher_combines_rule_kinds():
+    matcher = PatternMatcher.from_rules(
+        exact=[("android.permission.CAMERA", "exact")],
+        prefixes=[("android.permission.", "platform")],
+        substrings=[("SMS", "sms")],
+    )
+    assert matcher.matches("android.permission.CAMERA") == ["exact", "platform"]
+    assert matcher.matches("com.x.permission.READ_SMS") == ["sms"]
+    assert not matcher.has_match("com.x.permission.C2D")
+    assert len(matcher) == 3
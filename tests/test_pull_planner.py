@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from analysis.manifest import pull_planner  # noqa: E402
+
+PM_LIST = """package:/data/app/~~a==/com.game-x==/base.apk=com.game
+package:/system/framework/framework-res.apk=android
+package:/system/app/Clock/Clock.apk=com.clock
+"""
+STAT = """150000000 /data/app/~~a==/com.game-x==/base.apk
+900000000 /data/app/~~a==/com.game-x==/split_assets.apk
+30000000 /system/framework/framework-res.apk
+2000000 /system/app/Clock/Clock.apk
+"""
+
+
+def test_plan_resolves_splits_and_sizes_in_two_calls(monkeypatch):
+    calls = []
+
+    def fake_shell(serial, cmd):
+        calls.append(cmd)
+        return PM_LIST if cmd.startswith("pm list") else STAT
+
+    monkeypatch.setattr(pull_planner, "adb_shell", fake_shell)
+    plan = pull_planner.plan_pulls("SER", ["com.game", "android", "com.clock", "com.none"])
+
+    assert len(calls) == 2
+    # the directory is quoted but the glob is left for the device shell
+    assert "'/data/app/~~a==/com.game-x=='/*.apk" in calls[1]
+    assert "/system/framework/framework-res.apk" in calls[1]
+    assert plan.missing == ["com.none"]
+    assert plan.paths_by_package()["com.game"] == [
+        "/data/app/~~a==/com.game-x==/base.apk",
+        "/data/app/~~a==/com.game-x==/split_assets.apk",
+    ]
+    assert plan.total_bytes == 1082000000
+    assert [i.size for i in plan.ordered("largest")] == [900000000, 150000000, 30000000, 2000000]
+    assert [i.size for i in plan.ordered("smallest")][0] == 2000000
+
+
+def test_progress_reports_rate_and_eta():
+    now = [0.0]
+    progress = pull_planner.PullProgress(total_bytes=100_000_000, total_files=4, clock=lambda: now[0])
+    now[0] = 2.0
+    line = progress.advance(50_000_000)
+    assert "1/4 files" in line and "25.0 MB/s" in line and "ETA 2s" in line
+
+
+def test_run_plan_isolates_errors_and_keeps_order():
+    items = [pull_planner.PlannedPull("p", f"/{i}.apk", i) for i in range(5)]
+
+    def pull(item):
+        if item.size == 3:
+            raise RuntimeError("boom")
+        return item.size * 10
+
+    results = pull_planner.run_plan(items, pull, workers=3)
+    assert [item.size for item, _ in results] == [0, 1, 2, 3, 4]
+    assert isinstance(results[3][1], RuntimeError)
+    assert results[4][1] == 40
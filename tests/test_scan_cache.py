@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from analysis.manifest import scanner  # noqa: E402
+from database.scan_cache import ScanCache  # noqa: E402
+
+PROBE = """Packages:
+  Package [com.a] (1):
+    versionCode=10 minSdk=24 targetSdk=34
+    lastUpdateTime=2024-01-01 10:00:00
+    User 0: ceDataInode=1 installed=true hidden=false
+      runtime permissions:
+        android.permission.CAMERA: granted={camera}, flags=[ USER_SET ]
+  Package [com.b] (2):
+    versionCode={b_version} minSdk=24 targetSdk=34
+    lastUpdateTime=2024-01-01 10:00:00
+
+Hidden system packages:
+  Package [com.a] (3):
+    versionCode=1 minSdk=24 targetSdk=34
+"""
+
+
+def _setup(monkeypatch, b_version="5", camera="true"):
+    scanned = []
+    probe = PROBE.format(b_version=b_version, camera=camera)
+    monkeypatch.setattr(
+        scanner, "iter_shell_lines",
+        lambda serial, cmd: iter(probe.splitlines(keepends=True)),
+    )
+    monkeypatch.setattr(
+        scanner, "scan_app",
+        lambda serial, pkg: scanned.append(pkg) or {"package": pkg, "permissions": [pkg],
+                                                    "suspicious": [], "granted": []},
+    )
+    return scanned
+
+
+def test_probe_versions_ignores_hidden_packages(monkeypatch):
+    _setup(monkeypatch)
+    versions = scanner.probe_versions("serial", ["com.a", "com.b"])
+    assert versions == {
+        "com.a": ("10", "2024-01-01 10:00:00"),
+        "com.b": ("5", "2024-01-01 10:00:00"),
+    }
+
+
+def test_unchanged_packages_are_served_from_cache(monkeypatch, tmp_path):
+    cache = ScanCache(str(tmp_path / "cache.sqlite3"))
+    packages = ["com.b", "com.a", "com.missing"]
+
+    scanned = _setup(monkeypatch)
+    first = scanner.scan_packages("serial", packages, bulk=False, cache=cache)
+    assert scanned == packages
+    assert cache.stats() == {"hits": 0, "misses": 3}
+
+    cache.reset_stats()
+    scanned = _setup(monkeypatch, b_version="6")
+    second = scanner.scan_packages("serial", packages, bulk=False, cache=cache)
+    # com.a is unchanged; com.b was updated and com.missing has no version
+    assert scanned == ["com.b", "com.missing"]
+    assert cache.stats() == {"hits": 1, "misses": 2}
+    assert second[1]["granted"] == ["android.permission.CAMERA"]
+    assert [dict(r, granted=[]) for r in second] == first
+
+
+def test_cache_is_scoped_per_device(monkeypatch, tmp_path):
+    cache = ScanCache(str(tmp_path / "cache.sqlite3"))
+    _setup(monkeypatch)
+    scanner.scan_packages("one", ["com.a"], bulk=False, cache=cache)
+    scanned = _setup(monkeypatch)
+    scanner.scan_packages("two", ["com.a"], bulk=False, cache=cache)
+    assert scanned == ["com.a"]
+
+
+def test_grant_changes_are_not_served_from_cache(monkeypatch, tmp_path):
+    cache = ScanCache(str(tmp_path / "cache.sqlite3"))
+    _setup(monkeypatch)
+    scanner.scan_packages("serial", ["com.a"], bulk=False, cache=cache)
+    scanned = _setup(monkeypatch, camera="true")
+    [hit] = scanner.scan_packages("serial", ["com.a"], bulk=False, cache=cache)
+    assert scanned == [] and hit["granted"] == ["android.permission.CAMERA"]
+    # Revoked without an update: still a hit, but with the current grants.
+    _setup(monkeypatch, camera="false")
+    [hit] = scanner.scan_packages("serial", ["com.a"], bulk=False, cache=cache)
+    assert hit["granted"] == []
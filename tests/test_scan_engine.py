@@ -0,0 +1,107 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from analysis.manifest import scan_engine, scanner  # noqa: E402
+
+
+def _fake_result(pkg):
+    return {"package": pkg, "permissions": [], "suspicious": []}
+
+
+def test_results_keep_input_order(monkeypatch):
+    def slow_scan(serial, pkg):
+        # later packages finish first
+        time.sleep(0.01 * (5 - int(pkg[-1])))
+        return _fake_result(pkg)
+
+    monkeypatch.setattr(scanner, "scan_app", slow_scan)
+    engine = scan_engine.ScanEngine(workers=8, per_device=4, bulk=False)
+    packages = [f"pkg{i}" for i in range(5)]
+    results = engine.scan({"A": packages, "B": packages[::-1]})
+
+    assert [r["package"] for r in results["A"]] == packages
+    assert [r["package"] for r in results["B"]] == packages[::-1]
+
+
+def test_per_device_cap(monkeypatch):
+    lock = threading.Lock()
+    running = {}
+    peak = {}
+
+    def tracked_scan(serial, pkg):
+        with lock:
+            running[serial] = running.get(serial, 0) + 1
+            peak[serial] = max(peak.get(serial, 0), running[serial])
+        time.sleep(0.01)
+        with lock:
+            running[serial] -= 1
+        return _fake_result(pkg)
+
+    monkeypatch.setattr(scanner, "scan_app", tracked_scan)
+    engine = scan_engine.ScanEngine(workers=16, per_device=2, bulk=False)
+    packages = [f"pkg{i}" for i in range(10)]
+    engine.scan({"A": packages, "B": packages, "C": packages})
+
+    assert peak == {"A": 2, "B": 2, "C": 2}
+
+
+def test_scan_packages_workers_are_not_capped_per_device(monkeypatch, capsys):
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def tracked_scan(serial, pkg):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.02)
+        with lock:
+            state["running"] -= 1
+        return _fake_result(pkg)
+
+    monkeypatch.setattr(scanner, "scan_app", tracked_scan)
+    scanner.scan_packages("A", [f"pkg{i}" for i in range(12)], bulk=False, workers=6)
+    assert state["peak"] == 6
+    scan_engine.ScanEngine(workers=8, per_device=2, bulk=False).scan({"A": ["p"]})
+    assert "at most 2 scan(s) at once" in capsys.readouterr().out
+
+
+def test_errors_isolated_per_package(monkeypatch):
+    def flaky_scan(serial, pkg):
+        if pkg == "bad":
+            raise RuntimeError("device went away")
+        return _fake_result(pkg)
+
+    monkeypatch.setattr(scanner, "scan_app", flaky_scan)
+    results = scan_engine.scan_fleet({"A": ["ok", "bad", "ok2"]}, workers=2, bulk=False)["A"]
+
+    assert [r["package"] for r in results] == ["ok", "bad", "ok2"]
+    assert results[1]["error"] == "device went away"
+    assert results[1]["permissions"] == []
+    assert "error" not in results[0]
+
+
+def test_bulk_requeues_missing_packages(monkeypatch):
+    bulk_calls = []
+    scanned = []
+
+    def fake_bulk(serial, packages):
+        bulk_calls.append(serial)
+        return {"a": _fake_result("a")}
+
+    monkeypatch.setattr(scanner, "scan_bulk_dump", fake_bulk)
+    monkeypatch.setattr(scanner, "scan_app", lambda s, p: scanned.append(p) or _fake_result(p))
+    results = scan_engine.ScanEngine(workers=4, bulk=True).scan({"A": ["b", "a", "c"]})
+
+    assert bulk_calls == ["A"]
+    assert sorted(scanned) == ["b", "c"]
+    assert [r["package"] for r in results["A"]] == ["b", "a", "c"]
+
+
+def test_scan_packages_delegates_to_engine(monkeypatch):
+    monkeypatch.setattr(scanner, "scan_app", lambda s, p: _fake_result(p))
+    results = scanner.scan_packages("A", ["x", "y"], bulk=False, workers=4)
+    assert [r["package"] for r in results] == ["x", "y"]
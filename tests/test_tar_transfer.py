@@ -0,0 +1,129 @@
+import csv
+import hashlib
+import io
+import sys
+import tarfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from analysis.manifest import apk_extractor, pull_planner, tar_transfer  # noqa: E402
+
+FILES = {
+    "/data/app/~~a==/com.game-x==/base.apk": b"base" * 5000,
+    "/data/app/~~a==/com.game-x==/split_assets.apk": b"assets" * 20000,
+    "/system/app/Clock/Clock.apk": b"clock" * 300,
+}
+PM_LIST = ("package:/data/app/~~a==/com.game-x==/base.apk=com.game\n"
+           "package:/system/app/Clock/Clock.apk=com.clock\n")
+
+
+def _tar_bytes(paths, gzip=False):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz" if gzip else "w") as archive:
+        for path in paths:
+            info = tarfile.TarInfo(path.lstrip("/"))
+            info.size = len(FILES[path])
+            archive.addfile(info, io.BytesIO(FILES[path]))
+    data = buf.getvalue()
+    return [data[i:i + 7000] for i in range(0, len(data), 7000)]
+
+
+def _setup(monkeypatch, probe="tar\ngzip\n", served=None, gzip=False):
+    commands = []
+
+    def fake_exec(serial, cmd):
+        commands.append(cmd)
+        return iter(_tar_bytes(served if served is not None else list(FILES), gzip))
+
+    def planner_shell(serial, cmd):
+        if cmd.startswith("pm list"):
+            return PM_LIST
+        return "\n".join(f"{len(d)} {p}" for p, d in FILES.items())
+
+    monkeypatch.setattr(tar_transfer, "_tar_support", {})
+    monkeypatch.setattr(tar_transfer, "adb_shell", lambda serial, cmd: probe)
+    monkeypatch.setattr(tar_transfer, "iter_exec_out", fake_exec)
+    monkeypatch.setattr(pull_planner, "adb_shell", planner_shell)
+    return commands
+
+
+def _extractor(tmp_path, **kwargs):
+    return apk_extractor.APKExtractor(
+        output_dir=str(tmp_path / "out"), log_file=str(tmp_path / "log.csv"), **kwargs
+    )
+
+
+def test_tar_commands_use_relative_quoted_paths():
+    (cmd,) = tar_transfer.tar_commands(["/data/app/a b/base.apk", "/system/app/C.apk"])
+    assert cmd.startswith("tar -cf - -C / ")
+    assert "'data/app/a b/base.apk' system/app/C.apk" in cmd
+    assert tar_transfer.tar_commands(["/x.apk"], compress=True)[0].startswith("tar -czf -")
+
+
+def test_bulk_pull_streams_one_tar(tmp_path, monkeypatch):
+    commands = _setup(monkeypatch)
+    monkeypatch.setattr(apk_extractor, "stream_file", lambda *a, **kw: (_ for _ in ()).throw(AssertionError))
+
+    results = _extractor(tmp_path, hash_algorithms=("md5",)).pull_apks("SER", ["com.game", "com.clock"])
+
+    assert len(commands) == 1
+    game = results["com.game"]
+    assert [Path(s["local_path"]).read_bytes() for s in game["splits"]] == [
+        FILES[s["remote_path"]] for s in game["splits"]
+    ]
+    assert game["sha256"] == hashlib.sha256(FILES["/data/app/~~a==/com.game-x==/base.apk"]).hexdigest()
+    assert game["md5"] == hashlib.md5(FILES["/data/app/~~a==/com.game-x==/base.apk"]).hexdigest()
+    with open(tmp_path / "log.csv", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["package", "remote_path", "local_path", "sha256"]
+    assert len(rows) == 4
+    assert not list((tmp_path / "out").rglob("*.part"))
+
+
+def test_gzip_stream_is_detected(tmp_path, monkeypatch):
+    commands = _setup(monkeypatch, gzip=True)
+    results = _extractor(tmp_path, tar_gzip=True).pull_apks("SER", ["com.game", "com.clock"])
+    assert "-czf" in commands[0]
+    assert Path(results["com.clock"]["local_path"]).read_bytes() == FILES["/system/app/Clock/Clock.apk"]
+
+
+def test_files_missing_from_tar_are_pulled_individually(tmp_path, monkeypatch):
+    _setup(monkeypatch, served=["/system/app/Clock/Clock.apk"])
+    streamed = []
+    monkeypatch.setattr(
+        apk_extractor, "stream_file",
+        lambda serial, remote, **kw: streamed.append(remote) or iter([FILES[remote]]),
+    )
+    results = _extractor(tmp_path).pull_apks("SER", ["com.game", "com.clock"])
+    assert sorted(streamed) == sorted(p for p in FILES if p.startswith("/data"))
+    assert len(results["com.game"]["splits"]) == 2
+
+
+def test_devices_without_tar_use_file_pulls(tmp_path, monkeypatch):
+    commands = _setup(monkeypatch, probe="")
+    streamed = []
+    monkeypatch.setattr(
+        apk_extractor, "stream_file",
+        lambda serial, remote, **kw: streamed.append(remote) or iter([FILES[remote]]),
+    )
+    results = _extractor(tmp_path).pull_apks("SER", ["com.game", "com.clock"])
+    assert commands == []
+    assert len(streamed) == 3
+    assert results["com.clock"]["sha256"] == hashlib.sha256(FILES["/system/app/Clock/Clock.apk"]).hexdigest()
+
+
+def test_stream_error_inside_member_leaves_no_partial_file(tmp_path, monkeypatch):
+    chunks = _tar_bytes(["/data/app/~~a==/com.game-x==/split_assets.apk"])
+
+    def dropped_exec(serial, cmd):
+        yield from chunks[:3]
+        raise OSError("connection reset")
+
+    monkeypatch.setattr(tar_transfer, "iter_exec_out", dropped_exec)
+    received = tar_transfer.stream_tar(
+        "SER", ["/data/app/~~a==/com.game-x==/split_assets.apk"],
+        lambda remote: str(tmp_path / "split_assets.apk"),
+    )
+    assert received == {}
+    assert list(tmp_path.iterdir()) == []
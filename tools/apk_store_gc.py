@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Evict least recently used APK blobs until the store fits a size bound."""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from database.apk_store import APKStore  # noqa: E402
+from database.db_config import APK_STORE_DIR  # noqa: E402
+
+_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(text: str) -> int:
+    """Parse sizes such as ``500M`` or ``20G`` into bytes."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*", text, re.I)
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid size: {text}")
+    return int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-size", type=parse_size, required=True,
+                        help="size bound for the blob store, e.g. 20G")
+    parser.add_argument("--root", default=APK_STORE_DIR, help="store directory")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be evicted")
+    args = parser.parse_args()
+
+    store = APKStore(args.root)
+    try:
+        before = store.total_size()
+        stats = store.gc(args.max_size, dry_run=args.dry_run)
+    finally:
+        store.close()
+    action = "Would evict" if args.dry_run else "Evicted"
+    print(f"[apk_store_gc] {action} {stats['removed']} blob(s), "
+          f"{stats['freed'] / 1e6:.1f} MB; store {before / 1e6:.1f} MB -> "
+          f"{stats['remaining'] / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
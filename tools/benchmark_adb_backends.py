@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Compare adb backends on device listing and getprop round trips.
+
+By default a local fake adb server is started and every backend is pointed at
+it, so the numbers reflect client-side overhead only. Pass ``--real`` to use
+the adb server already running on this machine and a connected device.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from fake_adb_server import FakeAdbServer, FakeDevice  # noqa: E402
+from utils import adb_utils  # noqa: E402
+from utils.adb_protocol import AdbClient  # noqa: E402
+
+
+def _fake_shell(cmd: str) -> bytes:
+    # Echo the marker line the socket backend appends so it sees status 0.
+    out = b"Fake_Phone\n"
+    if "__NETHIRA_RC__" in cmd:
+        out += b"\n__NETHIRA_RC__ 0\n"
+    return out
+
+
+def _time(label: str, func: Callable[[], object], iterations: int) -> float:
+    func()  # warm up connections and sessions
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    per_call = elapsed / iterations * 1000
+    print(f"  {label:<28} {per_call:8.3f} ms/call")
+    return per_call
+
+
+def run(backends: list[str], serial: str, iterations: int) -> None:
+    for backend in backends:
+        adb_utils.set_adb_backend(backend)
+        print(f"[{backend}]")
+        _time("list_connected_devices", adb_utils.list_connected_devices, iterations)
+        _time(
+            "adb_shell getprop",
+            lambda: adb_utils.adb_shell(serial, "getprop ro.product.model"),
+            iterations,
+        )
+    adb_utils.set_adb_backend("subprocess")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--iterations", type=int, default=50)
+    parser.add_argument("--real", action="store_true", help="use the running adb server")
+    parser.add_argument("--serial", default="emulator-5554")
+    args = parser.parse_args()
+
+    have_adb = shutil.which("adb") is not None or os.path.isfile(adb_utils.get_adb_path())
+    backends = ["socket"]
+    if have_adb:
+        backends = ["subprocess", "pool", "socket"]
+    else:
+        print("[benchmark] adb binary not found; only the socket backend will run")
+
+    if args.real:
+        run(backends, args.serial, args.iterations)
+        return
+
+    with FakeAdbServer() as server:
+        server.add_device(FakeDevice(args.serial, shell=_fake_shell))
+        # The adb binary honours this variable, so all backends hit the fake.
+        os.environ["ANDROID_ADB_SERVER_PORT"] = str(server.port)
+        adb_utils._socket_client = AdbClient(port=server.port)
+        print(f"[benchmark] Fake adb server on port {server.port}, "
+              f"{args.iterations} iterations")
+        run(backends, args.serial, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Benchmark the prefix-trie categorizer against the legacy multi-pass loop.
+
+Generates 50,000 synthetic package names spread across 1,000 devices (each
+device sees a random subset of the names) and categorizes every device with
+both implementations, checking that the outputs are identical. With
+``--rule-prefixes`` it also times compiling a large generated rules file
+against loading its cached compilation.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Set
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from analysis.apps import app_category_keywords as kw  # noqa: E402
+from analysis.apps.categorizer import CategoryMatcher  # noqa: E402
+from analysis.apps.category_rules import compile_rules_file, default_rules  # noqa: E402
+
+PREFIXES = [
+    "com.google.android.", "com.google.", "com.android.", "android.", "com.facebook.",
+    "com.zhiliaoapp.", "com.ss.android.ugc.", "com.twitter.android.", "com.reddit.",
+    "com.samsung.", "com.motorola.", "com.qualcomm.", "com.verizon.", "com.ironsrc.",
+    "org.example.", "net.app.", "io.tools.", "de.firma.", "com.game.",
+]
+LEGACY_RULES = [
+    ("android", kw.ANDROID_PACKAGES), ("google", kw.GOOGLE_PACKAGES),
+    ("facebook", kw.FACEBOOK_PACKAGES), ("tiktok", kw.TIKTOK_PACKAGES),
+    ("twitter", kw.TWITTER_PACKAGES), ("instagram", kw.INSTAGRAM_PACKAGES),
+    ("parler", kw.PARLER_PACKAGES), ("reddit", kw.REDDIT_PACKAGES),
+    ("vendor", kw.VENDOR_KEYWORDS),
+]
+
+
+def legacy_categorize(all_apps: Set[str], system_apps: Set[str],
+                      user_apps: Set[str], manufacturer: str) -> Dict[str, List[str]]:
+    """The original 13-pass implementation."""
+    def matches_any(pkg: str, keywords: List[str]) -> bool:
+        return any(pkg.lower().startswith(k.lower()) for k in keywords)
+
+    out: Dict[str, List[str]] = {"manufacturer": []}
+    out.update({name: [] for name, _ in LEGACY_RULES})
+    out.update({"user": [], "system": [], "uncategorized": []})
+    assigned: Set[str] = set()
+    for pkg in sorted(all_apps):
+        if manufacturer.lower() in pkg.lower() or pkg.startswith(f"com.{manufacturer.lower()}"):
+            out["manufacturer"].append(pkg)
+            assigned.add(pkg)
+    for name, keywords in LEGACY_RULES:
+        for pkg in sorted(all_apps - assigned):
+            if matches_any(pkg, keywords):
+                out[name].append(pkg)
+                assigned.add(pkg)
+    for label, members in (("user", user_apps), ("system", system_apps)):
+        for pkg in sorted(all_apps - assigned):
+            if pkg in members:
+                out[label].append(pkg)
+                assigned.add(pkg)
+    out["uncategorized"].extend(sorted(all_apps - assigned))
+    return {k: sorted(v) for k, v in out.items()}
+
+
+def synthetic_fleet(names: int, devices: int, per_device: int, seed: int = 1):
+    rng = random.Random(seed)
+    universe = [f"{rng.choice(PREFIXES)}app{i}" for i in range(names)]
+    fleet = []
+    for _ in range(devices):
+        installed = set(rng.sample(universe, per_device))
+        pool = sorted(installed)
+        user = set(pool[: len(pool) // 3])
+        system = set(pool[len(pool) // 3:])
+        fleet.append((installed, system, user, rng.choice(["samsung", "motorola", "google"])))
+    return fleet
+
+
+def bench_rules_file(prefixes: int) -> None:
+    """Time a cold compile and a reload of an unchanged generated rules file."""
+    rng = random.Random(2)
+    rules = [
+        {"category": f"vendor{c}", "priority": c,
+         "prefix": [f"com.v{c}.{rng.getrandbits(40):x}" for _ in range(prefixes // 10)]}
+        for c in range(10)
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "rules.json"
+        path.write_text(json.dumps({"rules": rules}))
+        for label in ("cold compile", "unchanged reload"):
+            start = time.perf_counter()
+            compile_rules_file(str(path))
+            print(f"  {label:<20} {(time.perf_counter() - start) * 1000:9.1f} ms  ({prefixes} prefixes)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--names", type=int, default=50_000)
+    parser.add_argument("--devices", type=int, default=1_000)
+    parser.add_argument("--per-device", type=int, default=300, help="packages installed per device")
+    parser.add_argument("--rule-prefixes", type=int, default=0,
+                        help="also benchmark loading a rules file with this many prefixes")
+    args = parser.parse_args()
+
+    if args.rule_prefixes:
+        bench_rules_file(args.rule_prefixes)
+
+    fleet = synthetic_fleet(args.names, args.devices, args.per_device)
+    print(f"[benchmark] {args.names} names, {args.devices} devices, {args.per_device} packages each")
+
+    start = time.perf_counter()
+    matcher = CategoryMatcher(default_rules())
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    trie_out = [matcher.categorize(*device) for device in fleet]
+    trie_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    legacy_out = [legacy_categorize(*device) for device in fleet]
+    legacy_s = time.perf_counter() - start
+
+    assert trie_out == legacy_out, "trie categorizer output differs from legacy"
+    print(f"  pattern matcher      {trie_s * 1000:9.1f} ms  (compile {compile_ms:.2f} ms)")
+    print(f"  legacy 13-pass       {legacy_s * 1000:9.1f} ms")
+    print(f"  speedup              {legacy_s / trie_s:9.1f}x  (outputs identical)")
+
+
+if __name__ == "__main__":
+    main()
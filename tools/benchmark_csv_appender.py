@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Benchmark CSV log throughput: per-row open/append versus buffered batches.
+
+Writes the same synthetic APK pull log rows with the legacy pattern (open the
+file, check for the header, write one row, close) and with
+:class:`utils.csv_appender.BufferedCSVAppender`, optionally from several
+threads sharing one appender.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils.csv_appender import BufferedCSVAppender  # noqa: E402
+
+HEADER = ["package", "remote_path", "local_path", "sha256"]
+
+
+def _row(i: int) -> list:
+    pkg = f"com.vendor{i % 50}.app{i}"
+    return [pkg, f"/data/app/{pkg}-1/base.apk", f"output/app_static_profiles/{pkg}/base.apk",
+            f"{i:064x}"]
+
+
+def legacy(path: str, rows: int) -> None:
+    for i in range(rows):
+        write_header = not os.path.exists(path)
+        with open(path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if write_header:
+                writer.writerow(HEADER)
+            writer.writerow(_row(i))
+
+
+def buffered(path: str, rows: int, threads: int, max_rows: int) -> None:
+    appender = BufferedCSVAppender(path, HEADER, max_rows=max_rows)
+
+    def work(start: int) -> None:
+        for i in range(start, rows, threads):
+            appender.append(_row(i))
+
+    workers = [threading.Thread(target=work, args=(t,)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    appender.close()
+
+
+def _measure(label: str, path: str, rows: int, func) -> None:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    with open(path, encoding="utf-8") as f:
+        written = sum(1 for _ in f) - 1
+    print(f"  {label:<24} {elapsed * 1000:9.1f} ms  {rows / elapsed:12,.0f} rows/s  ({written} rows)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=500, help="rows per flush")
+    args = parser.parse_args()
+
+    print(f"[benchmark] {args.rows} rows")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f"log{i}.csv") for i in range(3)]
+        _measure("legacy per-row append", paths[0], args.rows,
+                 lambda: legacy(paths[0], args.rows))
+        _measure("buffered (1 thread)", paths[1], args.rows,
+                 lambda: buffered(paths[1], args.rows, 1, args.batch))
+        _measure(f"buffered ({args.threads} threads)", paths[2], args.rows,
+                 lambda: buffered(paths[2], args.rows, args.threads, args.batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Benchmark the streaming dumpsys parser on a synthetic 1,000-package dump.
+
+Compares the typed line-oriented parser (fed from a generator, so the dump is
+never held in memory) with the legacy approach of joining the whole dump and
+running the permission regex over it. Reports wall time (including generating
+the synthetic lines) and peak traced memory for each.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Iterator
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from analysis.manifest.dumpsys_parser import parse_dumpsys_packages  # noqa: E402
+
+PERMISSIONS = [
+    "INTERNET", "CAMERA", "RECORD_AUDIO", "READ_SMS", "SEND_SMS", "READ_CONTACTS",
+    "ACCESS_FINE_LOCATION", "ACCESS_COARSE_LOCATION", "READ_PHONE_STATE",
+    "WRITE_SETTINGS", "SYSTEM_ALERT_WINDOW", "WAKE_LOCK", "VIBRATE",
+    "RECEIVE_BOOT_COMPLETED", "FOREGROUND_SERVICE", "POST_NOTIFICATIONS",
+    "BLUETOOTH_CONNECT", "NFC", "READ_CALENDAR", "WRITE_CALENDAR",
+]
+
+
+def synthetic_dump(packages: int, perms_per_pkg: int, seed: int = 1) -> Iterator[str]:
+    """Yield the lines of a synthetic ``dumpsys package packages`` output."""
+    rng = random.Random(seed)
+    yield "Packages:\n"
+    for i in range(packages):
+        name = f"com.vendor{i % 50}.app{i}"
+        perms = [f"android.permission.{p}" for p in rng.sample(PERMISSIONS, min(perms_per_pkg, len(PERMISSIONS)))]
+        perms += [f"com.vendor{i % 50}.permission.EXTRA_{n}" for n in range(max(0, perms_per_pkg - len(PERMISSIONS)))]
+        yield f"  Package [{name}] ({i:x}):\n"
+        yield f"    userId={10000 + i}\n"
+        yield f"    pkg=Package{{{i:x} {name}}}\n"
+        yield f"    codePath=/data/app/~~{i:x}==/{name}-{i:x}==\n"
+        yield f"    versionCode={i * 7} minSdk=24 targetSdk=34\n"
+        yield f"    versionName=1.{i}.0\n"
+        yield "    pkgFlags=[ HAS_CODE ALLOW_CLEAR_USER_DATA ALLOW_BACKUP ]\n"
+        yield "    firstInstallTime=2024-01-01 10:00:00\n"
+        yield "    lastUpdateTime=2024-03-05 12:30:00\n"
+        yield "    installerPackageName=com.android.vending\n"
+        yield "    requested permissions:\n"
+        for perm in perms:
+            yield f"      {perm}\n"
+        yield "    install permissions:\n"
+        for perm in perms[: len(perms) // 2]:
+            yield f"      {perm}: granted=true\n"
+        yield f"    User 0: ceDataInode={i} installed=true hidden=false\n"
+        yield "      runtime permissions:\n"
+        for perm in perms[len(perms) // 2:]:
+            yield f"        {perm}: granted={str(rng.random() < 0.5).lower()}, flags=[ USER_SET ]\n"
+
+
+def _measure(label: str, func: Callable[[], int]) -> None:
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    # Memory is traced in a separate run since tracing slows execution.
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<22} {elapsed * 1000:9.1f} ms  peak {peak / 1024:9.1f} KiB  ({count} packages)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packages", type=int, default=1000)
+    parser.add_argument("--perms", type=int, default=60, help="permissions per package")
+    args = parser.parse_args()
+
+    size = sum(len(line) for line in synthetic_dump(args.packages, args.perms))
+    print(f"[benchmark] {args.packages} packages, {size / 1e6:.2f} MB of dumpsys text")
+
+    def streaming() -> int:
+        return sum(1 for _ in parse_dumpsys_packages(synthetic_dump(args.packages, args.perms)))
+
+    def legacy() -> int:
+        blob = "".join(synthetic_dump(args.packages, args.perms))
+        headers = re.findall(r"^  Package \[([^\]]+)\]", blob, re.M)
+        re.findall(r"android.permission.[A-Z_\.]+", blob)
+        return len(headers)
+
+    _measure("streaming parser", streaming)
+    _measure("legacy regex (blob)", legacy)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Benchmark how the shared pattern matcher scales with pattern count.
+
+Matches a fixed set of synthetic permission/package strings against growing
+IOC keyword lists, using Aho–Corasick for substrings and the prefix trie for
+prefixes, and compares with the naive ``any(k in text ...)`` loops they
+replaced. The naive loops are skipped above ``--naive-max`` patterns.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils.pattern_matcher import AhoCorasick, PrefixTrie  # noqa: E402
+
+
+def _word(rng: random.Random, low: int, high: int) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(low, high)))
+
+
+def synthetic_texts(count: int, rng: random.Random) -> List[str]:
+    return [f"com.{_word(rng, 3, 8)}.{_word(rng, 3, 10)}.permission.{_word(rng, 4, 12).upper()}"
+            for _ in range(count)]
+
+
+def _time(func: Callable[[], int]) -> tuple[float, int]:
+    start = time.perf_counter()
+    hits = func()
+    return time.perf_counter() - start, hits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", type=int, default=10_000)
+    parser.add_argument("--patterns", type=int, nargs="+", default=[10, 100, 1_000, 10_000, 50_000])
+    parser.add_argument("--naive-max", type=int, default=1_000)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    texts = synthetic_texts(args.texts, rng)
+    print(f"[benchmark] {args.texts} inputs, {sum(map(len, texts)) / 1e3:.0f} KB of text")
+    print(f"  {'patterns':>9}  {'build':>9}  {'aho-corasick':>12}  {'prefix trie':>12}  {'naive substr':>12}  {'naive prefix':>12}")
+    for count in args.patterns:
+        keywords = [_word(rng, 5, 12) for _ in range(count)]
+        prefixes = [f"com.{_word(rng, 3, 8)}" for _ in range(count)]
+
+        start = time.perf_counter()
+        ac = AhoCorasick((k, k) for k in keywords)
+        trie: PrefixTrie[str] = PrefixTrie()
+        for p in prefixes:
+            trie.add(p, p)
+        ac.has_match("")  # force the automaton build
+        build = time.perf_counter() - start
+
+        ac_s, ac_hits = _time(lambda: sum(ac.has_match(t) for t in texts))
+        trie_s, trie_hits = _time(lambda: sum(trie.has_match(t) for t in texts))
+        row = f"  {count:>9}  {build * 1000:7.1f}ms  {ac_s * 1000:10.1f}ms  {trie_s * 1000:10.1f}ms"
+        if count <= args.naive_max:
+            sub_s, sub_hits = _time(lambda: sum(any(k in t for k in keywords) for t in texts))
+            pre_s, pre_hits = _time(lambda: sum(any(t.startswith(p) for p in prefixes) for t in texts))
+            assert (sub_hits, pre_hits) == (ac_hits, trie_hits), "matcher disagrees with naive loop"
+            row += f"  {sub_s * 1000:10.1f}ms  {pre_s * 1000:10.1f}ms"
+        else:
+            row += f"  {'-':>12}  {'-':>12}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
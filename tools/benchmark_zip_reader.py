@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Benchmark metadata extraction from a large synthetic APK.
+
+Builds an APK with many small entries and a big stored OBB-style asset, then
+reads ``AndroidManifest.xml`` and the signature block with
+:class:`zipfile.ZipFile` (which builds an object per entry) and with the
+memory-mapped :class:`utils.apk_utils.MappedZip`. Reports wall time and peak
+traced memory for each.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+from typing import Callable
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utils.apk_utils import CERT_SUFFIXES, MANIFEST_NAME, MappedZip  # noqa: E402
+
+_CHUNK = b"\0" * (1024 * 1024)
+
+
+def build_apk(path: str, entries: int, obb_mb: int) -> None:
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr(MANIFEST_NAME, os.urandom(8192), zipfile.ZIP_DEFLATED)
+        for i in range(entries):
+            z.writestr(f"res/drawable-{i % 7}/icon_{i}.png", b"\x89PNG" + i.to_bytes(4, "little"))
+        with z.open("assets/main.obb", "w", force_zip64=True) as f:
+            for _ in range(obb_mb):
+                f.write(_CHUNK)
+        z.writestr("META-INF/CERT.SF", b"sf" * 100)
+        z.writestr("META-INF/CERT.RSA", os.urandom(1500))
+
+
+def with_zipfile(path: str) -> int:
+    with zipfile.ZipFile(path) as z:
+        total = len(z.read(MANIFEST_NAME))
+        for name in z.namelist():
+            if name.startswith("META-INF/") and name.lower().endswith(CERT_SUFFIXES):
+                total += len(z.read(name))
+        return total
+
+
+def with_mapped(path: str) -> int:
+    with MappedZip(path) as mz:
+        total = len(mz.read(MANIFEST_NAME))
+        for entry in mz.find_prefix("META-INF/"):
+            if entry.name.lower().endswith(CERT_SUFFIXES):
+                total += len(mz.read(entry.name))
+        return total
+
+
+def _measure(label: str, func: Callable[[], int]) -> None:
+    start = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<12} {elapsed * 1000:9.2f} ms  peak {peak / 1024:10.1f} KiB  ({size} bytes read)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--obb-mb", type=int, default=512, help="size of the stored asset")
+    parser.add_argument("--apk", help="benchmark an existing APK instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.apk
+        if not path:
+            path = os.path.join(tmp, "synthetic.apk")
+            build_apk(path, args.entries, args.obb_mb)
+        print(f"[benchmark] {path}: {os.path.getsize(path) / 1e6:.1f} MB")
+        _measure("zipfile", lambda: with_zipfile(path))
+        _measure("MappedZip", lambda: with_mapped(path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Local stand-in for the adb server used by tests and benchmarks.
+
+It speaks enough of the host protocol (``host:version``, ``host:devices-l``,
+``host:transport:SERIAL``) and device services (``shell:``, ``exec:``,
+``sync:`` STAT/RECV) for Nethira's socket backend to be exercised without
+hardware. Shell commands are run with the local ``sh`` by default.
+"""
+
+from __future__ import annotations
+
+import argparse
+import socketserver
+import struct
+import subprocess
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+ADB_SERVER_VERSION = 41
+
+
+def run_local_shell(cmd: str) -> bytes:
+    """Run ``cmd`` with the host ``sh`` and return stdout and stderr."""
+    result = subprocess.run(["sh", "-c", cmd], capture_output=True)
+    return result.stdout + result.stderr
+
+
+@dataclass
+class FakeDevice:
+    """A fake device with a shell handler and an in-memory filesystem."""
+
+    serial: str
+    model: str = "Fake_Phone"
+    files: Dict[str, bytes] = field(default_factory=dict)
+    shell: Callable[[str], bytes] = run_local_shell
+    state: str = "device"
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    server: "_TCPServer"
+
+    def _read_exact(self, size: int) -> bytes:
+        buf = bytearray()
+        while len(buf) < size:
+            chunk = self.request.recv(size - len(buf))
+            if not chunk:
+                raise ConnectionError("client closed")
+            buf.extend(chunk)
+        return bytes(buf)
+
+    def _read_request(self) -> str:
+        length = int(self._read_exact(4), 16)
+        return self._read_exact(length).decode("utf-8")
+
+    def _okay(self, payload: bytes | None = None) -> None:
+        data = b"OKAY"
+        if payload is not None:
+            data += b"%04x" % len(payload) + payload
+        self.request.sendall(data)
+
+    def _fail(self, message: str) -> None:
+        data = message.encode("utf-8")
+        self.request.sendall(b"FAIL" + b"%04x" % len(data) + data)
+
+    def handle(self) -> None:
+        fake: FakeAdbServer = self.server.fake
+        fake.connections += 1
+        try:
+            request = self._read_request()
+            fake.requests.append(request)
+            if request == "host:version":
+                self._okay(b"%04x" % ADB_SERVER_VERSION)
+            elif request in ("host:devices", "host:devices-l"):
+                self._okay(fake.devices_text(long=request.endswith("-l")).encode())
+            elif request == "host:features" or request.endswith(":features"):
+                self._okay(b"")
+            elif request.startswith("host:transport:") or request.startswith("host:tport:serial:"):
+                serial = request.rsplit(":", 1)[1]
+                device = fake.devices.get(serial)
+                if device is None:
+                    self._fail(f"device '{serial}' not found")
+                    return
+                if request.startswith("host:tport:"):
+                    self.request.sendall(b"OKAY" + struct.pack("<Q", 1))
+                else:
+                    self._okay()
+                self._device_service(device, self._read_request())
+            else:
+                self._fail(f"unsupported request: {request}")
+        except ConnectionError:
+            pass
+
+    def _device_service(self, device: FakeDevice, service: str) -> None:
+        self.server.fake.requests.append(service)
+        if service.startswith("shell:") or service.startswith("exec:"):
+            cmd = service.split(":", 1)[1]
+            self._okay()
+            if cmd:
+                self.request.sendall(device.shell(cmd))
+            else:
+                self._interactive_shell()
+        elif service == "sync:":
+            self._okay()
+            self._sync(device)
+        else:
+            self._fail(f"unsupported service: {service}")
+
+    def _interactive_shell(self) -> None:
+        proc = subprocess.Popen(
+            ["sh"], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, bufsize=0,
+        )
+
+        def pump_out() -> None:
+            for chunk in iter(lambda: proc.stdout.read1(65536), b""):
+                self.request.sendall(chunk)
+            self.request.close()
+
+        threading.Thread(target=pump_out, daemon=True).start()
+        try:
+            for chunk in iter(lambda: self.request.recv(65536), b""):
+                proc.stdin.write(chunk)
+        except OSError:
+            pass
+        finally:
+            proc.kill()
+
+    def _sync(self, device: FakeDevice) -> None:
+        while True:
+            header = self._read_exact(8)
+            ident, length = header[:4], struct.unpack("<I", header[4:])[0]
+            if ident == b"QUIT":
+                return
+            path = self._read_exact(length).decode("utf-8")
+            data = device.files.get(path)
+            if ident == b"STAT":
+                if data is None:
+                    self.request.sendall(b"STAT" + struct.pack("<III", 0, 0, 0))
+                else:
+                    self.request.sendall(b"STAT" + struct.pack("<III", 0o100644, len(data), 0))
+            elif ident == b"RECV":
+                if data is None:
+                    msg = b"No such file or directory"
+                    self.request.sendall(b"FAIL" + struct.pack("<I", len(msg)) + msg)
+                    continue
+                for start in range(0, len(data), 64 * 1024):
+                    chunk = data[start:start + 64 * 1024]
+                    self.request.sendall(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+                self.request.sendall(b"DONE" + struct.pack("<I", 0))
+            else:
+                return
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    fake: "FakeAdbServer"
+
+
+class FakeAdbServer:
+    """Threaded fake adb server bound to ``127.0.0.1``."""
+
+    def __init__(self, port: int = 0) -> None:
+        self.devices: Dict[str, FakeDevice] = {}
+        self.requests: list[str] = []
+        self.connections = 0
+        self._server = _TCPServer(("127.0.0.1", port), _Handler)
+        self._server.fake = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def add_device(self, device: FakeDevice) -> FakeDevice:
+        self.devices[device.serial] = device
+        return device
+
+    def devices_text(self, long: bool = False) -> str:
+        lines = []
+        for dev in self.devices.values():
+            if long:
+                lines.append(
+                    f"{dev.serial:<22} {dev.state} product:fake "
+                    f"model:{dev.model} device:fake transport_id:1"
+                )
+            else:
+                lines.append(f"{dev.serial}\t{dev.state}")
+        return "".join(f"{line}\n" for line in lines)
+
+    def start(self) -> "FakeAdbServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeAdbServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=5037)
+    parser.add_argument("--serial", action="append", default=[])
+    args = parser.parse_args()
+
+    server = FakeAdbServer(args.port)
+    for serial in args.serial or ["emulator-5554"]:
+        server.add_device(FakeDevice(serial))
+    print(f"[fake_adb_server] Listening on 127.0.0.1:{server.port}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Hash every file in a directory tree, reusing digests of unchanged files."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from database.db_config import HASH_CACHE_PATH  # noqa: E402
+from database.hash_cache import HashCache  # noqa: E402
+from utils.hash_utils import hash_tree  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("root", help="directory to index")
+    parser.add_argument("--algos", default="sha256", help="comma-separated digests, e.g. sha256,md5")
+    parser.add_argument("--suffix", action="append", help="only hash files ending in this (repeatable)")
+    parser.add_argument("--workers", type=int, default=4, help="files hashed concurrently")
+    parser.add_argument("--cache", default=HASH_CACHE_PATH, help="hash cache database")
+    parser.add_argument("--prune", action="store_true", help="drop entries for deleted files")
+    args = parser.parse_args()
+
+    cache = HashCache(args.cache)
+    try:
+        start = time.perf_counter()
+        digests = hash_tree(args.root, args.algos.split(","), cache=cache,
+                            suffixes=args.suffix, workers=args.workers)
+        elapsed = time.perf_counter() - start
+        pruned = cache.prune(args.root) if args.prune else 0
+        stats = cache.stats()
+    finally:
+        cache.close()
+    print(f"[reindex_hashes] {len(digests)} file(s) in {elapsed:.2f}s: "
+          f"{stats['hits']} cached, {stats['misses']} hashed, {pruned} pruned")
+
+
+if __name__ == "__main__":
+    main()
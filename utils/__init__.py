@@ -6,6 +6,13 @@ from .adb_utils import (
     adb_shell,
     list_packages,
     list_connected_devices,
+    get_adb_backend,
+    set_adb_backend,
+    get_adb_client,
+    adb_pull,
+    iter_shell_lines,
+    stream_file,
+    iter_exec_out,
 )
 from .file_utils import get_timestamped_log_path, save_text_to_file
 from .hash_utils import (
@@ -15,16 +22,27 @@ from .hash_utils import (
     sha256_of_file,
     sha1_of_file,
     md5_of_file,
+    hashes_of_file,
+    hash_tree,
+    MultiHasher,
 )
 from .apk_utils import (
+    ApkHandle,
+    MappedZip,
+    open_apk,
     extract_manifest,
     extract_certificate,
     extract_manifest_xml,
 )
+from .axml import AXMLError, ManifestModel, decode_manifest
+from .csv_appender import BufferedCSVAppender
+from .pattern_matcher import AhoCorasick, PatternMatcher, PrefixTrie
 from .display_utils import (
     clear_screen,
     print_banner,
     print_device_table,
+    print_device_table_header,
+    print_device_row,
     print_device_details,
     format_key_values,
     print_key_values,
@@ -44,6 +62,13 @@ __all__ = [
     "adb_shell",
     "list_packages",
     "list_connected_devices",
+    "get_adb_backend",
+    "set_adb_backend",
+    "get_adb_client",
+    "adb_pull",
+    "iter_shell_lines",
+    "stream_file",
+    "iter_exec_out",
     "get_timestamped_log_path",
     "save_text_to_file",
     "sha256_digest",
@@ -52,12 +77,27 @@ __all__ = [
     "sha256_of_file",
     "sha1_of_file",
     "md5_of_file",
+    "hashes_of_file",
+    "hash_tree",
+    "MultiHasher",
+    "ApkHandle",
+    "MappedZip",
+    "open_apk",
     "extract_manifest",
     "extract_certificate",
     "extract_manifest_xml",
+    "AXMLError",
+    "ManifestModel",
+    "decode_manifest",
+    "BufferedCSVAppender",
+    "AhoCorasick",
+    "PatternMatcher",
+    "PrefixTrie",
     "clear_screen",
     "print_banner",
     "print_device_table",
+    "print_device_table_header",
+    "print_device_row",
     "print_device_details",
     "format_key_values",
     "print_key_values",
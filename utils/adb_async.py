@@ -0,0 +1,138 @@
+"""Asyncio versions of the adb helpers with per-device concurrency limits.
+
+Every call that targets a serial first takes a slot from that device's
+semaphore, so many devices can be driven at once without flooding any single
+adbd. With the default ``subprocess`` backend commands run through
+``asyncio.create_subprocess_exec``; the ``pool`` and ``socket`` backends are
+blocking clients and are run in worker threads instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import subprocess
+import weakref
+from typing import Dict, List
+
+from . import adb_utils
+
+DEFAULT_DEVICE_CONCURRENCY = int(os.environ.get("NETHIRA_ADB_PER_DEVICE", "4"))
+
+_device_concurrency = DEFAULT_DEVICE_CONCURRENCY
+# Semaphores are bound to an event loop, so keep one set per running loop.
+_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def set_device_concurrency(limit: int) -> None:
+    """Set how many adb commands may run at once against one device."""
+    global _device_concurrency
+    if limit < 1:
+        raise ValueError("concurrency limit must be at least 1")
+    _device_concurrency = limit
+    _slots.clear()
+
+
+def device_slot(serial: str) -> asyncio.Semaphore:
+    """Return the semaphore guarding commands sent to ``serial``."""
+    per_loop = _slots.setdefault(asyncio.get_running_loop(), {})
+    slot = per_loop.get(serial)
+    if slot is None:
+        slot = per_loop[serial] = asyncio.Semaphore(_device_concurrency)
+    return slot
+
+
+def _serial_from_args(args: List[str]) -> str | None:
+    if len(args) > 1 and args[0] == "-s":
+        return args[1]
+    return None
+
+
+async def _exec(argv: List[str]) -> subprocess.CompletedProcess:
+    proc = await asyncio.create_subprocess_exec(
+        *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await proc.communicate()
+    return subprocess.CompletedProcess(
+        argv,
+        proc.returncode,
+        stdout.decode("utf-8", "replace"),
+        stderr.decode("utf-8", "replace"),
+    )
+
+
+async def run_adb(args: List[str]) -> subprocess.CompletedProcess:
+    """Run an adb command without blocking the event loop.
+
+    Mirrors :func:`utils.adb_utils.run_adb`: raises ``CalledProcessError`` on a
+    non-zero exit and ``RuntimeError`` if adb is missing.
+    """
+    argv = [adb_utils.get_adb_path(), *args]
+    serial = _serial_from_args(args)
+    try:
+        if serial is None:
+            result = await _exec(argv)
+        else:
+            async with device_slot(serial):
+                result = await _exec(argv)
+    except FileNotFoundError as err:
+        raise RuntimeError(
+            "ADB executable not found. Ensure it is installed or bundled."
+        ) from err
+    result.check_returncode()
+    return result
+
+
+async def adb_shell(serial: str, cmd: str) -> str:
+    """Async counterpart of :func:`utils.adb_utils.adb_shell`."""
+    if adb_utils.get_adb_backend() != "subprocess":
+        async with device_slot(serial):
+            return await asyncio.to_thread(adb_utils.adb_shell, serial, cmd)
+    try:
+        result = await run_adb(["-s", serial, "shell", cmd])
+    except (subprocess.CalledProcessError, RuntimeError):
+        return "N/A"
+    return result.stdout.strip()
+
+
+async def list_packages(serial: str, flags: List[str] | None = None) -> List[str]:
+    """Async counterpart of :func:`utils.adb_utils.list_packages`."""
+    if adb_utils.get_adb_backend() != "subprocess":
+        async with device_slot(serial):
+            return await asyncio.to_thread(adb_utils.list_packages, serial, flags)
+    try:
+        result = await run_adb(["-s", serial, "shell", "pm", "list", "packages", *(flags or [])])
+    except (subprocess.CalledProcessError, RuntimeError):
+        return []
+    return [
+        line.replace("package:", "").strip()
+        for line in result.stdout.strip().splitlines()
+        if line.strip()
+    ]
+
+
+async def adb_pull(serial: str, remote_path: str, local_path: str) -> None:
+    """Async counterpart of :func:`utils.adb_utils.adb_pull`."""
+    if adb_utils.get_adb_backend() == "socket":
+        async with device_slot(serial):
+            await asyncio.to_thread(adb_utils.adb_pull, serial, remote_path, local_path)
+        return
+    await run_adb(["-s", serial, "pull", remote_path, local_path])
+
+
+async def list_connected_devices() -> List[str]:
+    """Async counterpart of :func:`utils.adb_utils.list_connected_devices`."""
+    if adb_utils.get_adb_backend() == "socket":
+        return await asyncio.to_thread(adb_utils.list_connected_devices)
+    try:
+        result = await run_adb(["devices"])
+    except (subprocess.CalledProcessError, RuntimeError):
+        return []
+    lines = result.stdout.strip().splitlines()[1:]
+    return [
+        line.split()[0]
+        for line in lines
+        if "device" in line and not line.startswith("*")
+    ]
@@ -0,0 +1,275 @@
+"""Minimal client for the adb server's host protocol (no subprocess).
+
+The adb server listens on ``127.0.0.1:5037``. Each request is a 4 digit hex
+length followed by the payload, answered with ``OKAY`` or ``FAIL``. After
+``host:transport:SERIAL`` the same socket is bound to the device and carries a
+single device service such as ``shell:``, ``exec:`` or ``sync:``.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import struct
+import threading
+from typing import Dict, Iterator, List, Tuple
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5037
+_CHUNK_SIZE = 64 * 1024
+_RC_MARKER = "__NETHIRA_RC__"
+
+
+class AdbProtocolError(RuntimeError):
+    """Raised when the adb server or device rejects a request."""
+
+
+def _read_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise AdbProtocolError("connection closed by adb server")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _read_to_eof(sock: socket.socket) -> bytes:
+    parts = []
+    while True:
+        chunk = sock.recv(_CHUNK_SIZE)
+        if not chunk:
+            return b"".join(parts)
+        parts.append(chunk)
+
+
+def _send_request(sock: socket.socket, payload: str) -> None:
+    data = payload.encode("utf-8")
+    sock.sendall(b"%04x" % len(data) + data)
+
+
+def _read_status(sock: socket.socket) -> None:
+    status = _read_exact(sock, 4)
+    if status == b"OKAY":
+        return
+    if status == b"FAIL":
+        length = int(_read_exact(sock, 4), 16)
+        message = _read_exact(sock, length).decode("utf-8", "replace")
+        raise AdbProtocolError(message)
+    raise AdbProtocolError(f"unexpected adb status: {status!r}")
+
+
+def _read_hex_payload(sock: socket.socket) -> bytes:
+    length = int(_read_exact(sock, 4), 16)
+    return _read_exact(sock, length)
+
+
+def parse_devices_l(text: str) -> List[Dict[str, str]]:
+    """Parse ``host:devices-l`` output into dictionaries."""
+    devices = []
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) < 2:
+            continue
+        entry = {"serial": parts[0], "state": parts[1]}
+        for part in parts[2:]:
+            key, sep, value = part.partition(":")
+            if sep:
+                entry[key] = value
+        devices.append(entry)
+    return devices
+
+
+class SyncConnection:
+    """A ``sync:`` session that can transfer several files in a row."""
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.lock = threading.Lock()
+        self.broken = False
+
+    def _request(self, command: bytes, path: str) -> None:
+        data = path.encode("utf-8")
+        self.sock.sendall(command + struct.pack("<I", len(data)) + data)
+
+    def stat(self, path: str) -> Tuple[int, int, int]:
+        """Return ``(mode, size, mtime)`` for ``path``; mode 0 if missing."""
+        self._request(b"STAT", path)
+        header = _read_exact(self.sock, 16)
+        if header[:4] != b"STAT":
+            self.broken = True
+            raise AdbProtocolError(f"unexpected sync reply: {header[:4]!r}")
+        return struct.unpack("<III", header[4:])
+
+    def iter_file(self, path: str) -> Iterator[bytes]:
+        """Yield the contents of remote ``path`` chunk by chunk."""
+        self._request(b"RECV", path)
+        done = False
+        try:
+            while True:
+                header = _read_exact(self.sock, 8)
+                ident, length = header[:4], struct.unpack("<I", header[4:])[0]
+                if ident == b"DATA":
+                    yield _read_exact(self.sock, length)
+                elif ident == b"DONE":
+                    done = True
+                    return
+                elif ident == b"FAIL":
+                    message = _read_exact(self.sock, length).decode("utf-8", "replace")
+                    done = True
+                    raise AdbProtocolError(f"pull {path} failed: {message}")
+                else:
+                    raise AdbProtocolError(f"unexpected sync reply: {ident!r}")
+        finally:
+            # A transfer abandoned midway leaves unread frames on the socket.
+            if not done:
+                self.broken = True
+
+    def pull(self, path: str, local_path: str) -> int:
+        """Copy remote ``path`` to ``local_path`` and return the byte count."""
+        total = 0
+        chunks = self.iter_file(path)
+        try:
+            with open(local_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    total += len(chunk)
+        finally:
+            chunks.close()
+        return total
+
+    def close(self) -> None:
+        try:
+            if not self.broken:
+                self.sock.sendall(b"QUIT" + struct.pack("<I", 0))
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class AdbClient:
+    """Talk to the local adb server over TCP instead of running ``adb``."""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int | None = None,
+                 timeout: float = 30.0) -> None:
+        self.host = host
+        self.port = port or int(os.environ.get("ANDROID_ADB_SERVER_PORT", DEFAULT_PORT))
+        self.timeout = timeout
+        self._sync: Dict[str, SyncConnection] = {}
+        self._lock = threading.Lock()
+
+    def _connect(self) -> socket.socket:
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        except OSError as err:
+            raise AdbProtocolError(
+                f"cannot reach adb server at {self.host}:{self.port}: {err}"
+            ) from err
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _host_query(self, request: str) -> bytes:
+        sock = self._connect()
+        try:
+            _send_request(sock, request)
+            _read_status(sock)
+            return _read_hex_payload(sock)
+        finally:
+            sock.close()
+
+    def version(self) -> int:
+        """Return the adb server's protocol version."""
+        return int(self._host_query("host:version"), 16)
+
+    def devices(self) -> List[Dict[str, str]]:
+        """Return attached devices as dictionaries from ``host:devices-l``."""
+        text = self._host_query("host:devices-l").decode("utf-8", "replace")
+        return parse_devices_l(text)
+
+    def open_service(self, serial: str, service: str) -> socket.socket:
+        """Return a socket bound to ``service`` on the device ``serial``."""
+        sock = self._connect()
+        try:
+            _send_request(sock, f"host:transport:{serial}")
+            _read_status(sock)
+            _send_request(sock, service)
+            _read_status(sock)
+        except (AdbProtocolError, OSError):
+            sock.close()
+            raise
+        return sock
+
+    def exec_out(self, serial: str, cmd: str) -> bytes:
+        """Run ``cmd`` through ``exec:`` and return its raw stdout."""
+        sock = self.open_service(serial, f"exec:{cmd}")
+        try:
+            return _read_to_eof(sock)
+        finally:
+            sock.close()
+
+    def shell(self, serial: str, cmd: str) -> Tuple[int, str]:
+        """Run ``cmd`` through ``shell:`` and return ``(exit_status, stdout)``.
+
+        The legacy shell service does not report exit codes, so the command is
+        followed by a marker line carrying ``$?``.
+        """
+        wrapped = f"({cmd}) 2>/dev/null; printf '\\n%s %s\\n' '{_RC_MARKER}' \"$?\""
+        sock = self.open_service(serial, f"shell:{wrapped}")
+        try:
+            raw = _read_to_eof(sock)
+        finally:
+            sock.close()
+        text = raw.decode("utf-8", "replace").replace("\r\n", "\n")
+        head, sep, tail = text.rpartition(f"\n{_RC_MARKER} ")
+        if not sep:
+            return 1, text
+        status = tail.strip()
+        return (int(status) if status.lstrip("-").isdigit() else 1), head
+
+    def _sync_connection(self, serial: str) -> SyncConnection:
+        with self._lock:
+            conn = self._sync.get(serial)
+            if conn is None or conn.broken:
+                conn = SyncConnection(self.open_service(serial, "sync:"))
+                self._sync[serial] = conn
+            return conn
+
+    def _drop_sync(self, serial: str, conn: SyncConnection) -> None:
+        with self._lock:
+            if self._sync.get(serial) is conn:
+                del self._sync[serial]
+        conn.close()
+
+    def pull(self, serial: str, remote_path: str, local_path: str) -> int:
+        """Pull ``remote_path`` over a reused ``sync:`` connection."""
+        conn = self._sync_connection(serial)
+        with conn.lock:
+            try:
+                return conn.pull(remote_path, local_path)
+            except (AdbProtocolError, OSError):
+                if conn.broken:
+                    self._drop_sync(serial, conn)
+                raise
+
+    def iter_file(self, serial: str, remote_path: str) -> Iterator[bytes]:
+        """Yield ``remote_path`` chunk by chunk over a reused ``sync:`` connection.
+
+        The connection stays locked until the generator finishes or is closed.
+        """
+        conn = self._sync_connection(serial)
+        with conn.lock:
+            chunks = conn.iter_file(remote_path)
+            try:
+                yield from chunks
+            finally:
+                chunks.close()
+                if conn.broken:
+                    self._drop_sync(serial, conn)
+
+    def close(self) -> None:
+        """Close any cached sync connections."""
+        with self._lock:
+            conns = list(self._sync.values())
+            self._sync.clear()
+        for conn in conns:
+            conn.close()
@@ -0,0 +1,197 @@
+"""Persistent ``adb shell`` sessions multiplexed with sentinel framing."""
+
+from __future__ import annotations
+
+import atexit
+import queue
+import subprocess
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Tuple
+
+
+class ShellSessionError(RuntimeError):
+    """Raised when a pooled shell session fails or times out."""
+
+
+class _SessionClosed(ShellSessionError):
+    """The shell exited underneath us; safe to reconnect and retry."""
+
+
+class ShellSession:
+    """A single long-lived interactive shell process.
+
+    Commands are written to the shell's stdin one at a time. Each command is
+    followed by a ``printf`` of a random marker and the exit status, so the
+    output of one command can be separated from the next without restarting
+    the process.
+    """
+
+    def __init__(self, argv: List[str], timeout: float = 30.0) -> None:
+        self.argv = argv
+        self.timeout = timeout
+        self._proc: subprocess.Popen | None = None
+        self._lines: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def _start(self) -> None:
+        print(f"[adb_session] Starting shell: {' '.join(self.argv)}")
+        self._proc = subprocess.Popen(
+            self.argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0,
+        )
+        self._lines = queue.Queue()
+        reader = threading.Thread(
+            target=self._pump, args=(self._proc.stdout, self._lines), daemon=True
+        )
+        reader.start()
+
+    @staticmethod
+    def _pump(stream, lines: queue.Queue) -> None:
+        for raw in iter(stream.readline, b""):
+            lines.put(raw)
+        lines.put(None)  # EOF marker
+
+    def _exchange(self, cmd: str) -> Tuple[int, str]:
+        marker = f"__NETHIRA_{uuid.uuid4().hex}__"
+        script = (
+            f"({cmd}) </dev/null 2>/dev/null; "
+            f"printf '\\n%s %s\\n' '{marker}' \"$?\"\n"
+        )
+        assert self._proc is not None and self._proc.stdin is not None
+        try:
+            self._proc.stdin.write(script.encode("utf-8"))
+            self._proc.stdin.flush()
+        except OSError as err:
+            raise _SessionClosed(f"shell stdin closed: {err}") from err
+
+        deadline = time.monotonic() + self.timeout
+        out: List[bytes] = []
+        prefix = marker.encode("ascii") + b" "
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ShellSessionError(f"timed out running: {cmd}")
+            try:
+                raw = self._lines.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if raw is None:
+                raise _SessionClosed("shell session closed")
+            line = raw.rstrip(b"\r\n")
+            if line.startswith(prefix):
+                rc_text = line[len(prefix):].decode("ascii", "replace")
+                rc = int(rc_text) if rc_text.lstrip("-").isdigit() else 1
+                break
+            out.append(raw.replace(b"\r\n", b"\n"))
+
+        text = b"".join(out).decode("utf-8", "replace")
+        # Drop the newline printed ahead of the marker.
+        if text.endswith("\n"):
+            text = text[:-1]
+        return rc, text
+
+    def run(self, cmd: str) -> Tuple[int, str]:
+        """Run ``cmd`` and return ``(exit_status, stdout)``.
+
+        A dead session is restarted once before giving up. Timeouts are not
+        retried since the command may already have had side effects.
+        """
+        with self._lock:
+            for attempt in range(2):
+                if not self.alive:
+                    self._start()
+                try:
+                    return self._exchange(cmd)
+                except _SessionClosed as err:
+                    self._close_locked()
+                    if attempt:
+                        raise
+                    print(f"[adb_session] Reconnecting after error: {err}")
+                except ShellSessionError:
+                    self._close_locked()
+                    raise
+        raise ShellSessionError("unreachable")  # pragma: no cover
+
+    def _close_locked(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            if proc.stdin:
+                proc.stdin.close()
+        except OSError:
+            pass
+        if proc.poll() is None:
+            proc.kill()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:  # pragma: no cover - kill is immediate
+            pass
+
+    def close(self) -> None:
+        """Terminate the underlying shell process."""
+        with self._lock:
+            self._close_locked()
+
+
+class ShellSessionPool:
+    """Keep one :class:`ShellSession` per device serial."""
+
+    def __init__(self, argv_factory: Callable[[str], List[str]],
+                 timeout: float = 30.0) -> None:
+        self.argv_factory = argv_factory
+        self.timeout = timeout
+        self._sessions: Dict[str, ShellSession] = {}
+        self._lock = threading.Lock()
+
+    def session(self, serial: str) -> ShellSession:
+        """Return the session for ``serial``, creating it if needed."""
+        with self._lock:
+            sess = self._sessions.get(serial)
+            if sess is None:
+                sess = ShellSession(self.argv_factory(serial), self.timeout)
+                self._sessions[serial] = sess
+            return sess
+
+    def run(self, serial: str, cmd: str) -> Tuple[int, str]:
+        """Run ``cmd`` on ``serial`` through its pooled session."""
+        return self.session(serial).run(cmd)
+
+    def close(self, serial: str) -> None:
+        """Close and forget the session for ``serial``."""
+        with self._lock:
+            sess = self._sessions.pop(serial, None)
+        if sess:
+            sess.close()
+
+    def close_all(self) -> None:
+        """Close every pooled session."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for sess in sessions:
+            sess.close()
+
+
+_pools: List[ShellSessionPool] = []
+
+
+def register_pool(pool: ShellSessionPool) -> ShellSessionPool:
+    """Ensure ``pool`` is shut down when the interpreter exits."""
+    _pools.append(pool)
+    return pool
+
+
+@atexit.register
+def _close_pools() -> None:
+    for pool in _pools:
+        pool.close_all()
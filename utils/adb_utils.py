@@ -3,9 +3,20 @@
 from __future__ import annotations
 
 import os
+import shlex
 import shutil
 import subprocess
-from typing import List
+from typing import Iterable, Iterator, List, Optional
+
+from .adb_protocol import AdbClient, AdbProtocolError
+from .adb_session import ShellSessionError, ShellSessionPool, register_pool
+
+ADB_BACKENDS = ("subprocess", "pool", "socket")
+
+# ``subprocess`` spawns one adb process per call; ``pool`` keeps a persistent
+# ``adb shell`` per device and multiplexes commands over it; ``socket`` talks
+# to the adb server directly over TCP without running the adb binary.
+_backend = os.environ.get("NETHIRA_ADB_BACKEND", "subprocess")
 
 
 def get_adb_path() -> str:
@@ -38,33 +49,240 @@ def run_adb(args: List[str]) -> subprocess.CompletedProcess:
         ) from err
 
 
+def get_adb_backend() -> str:
+    """Return the name of the backend used for shell commands."""
+    return _backend
+
+
+def set_adb_backend(name: str) -> None:
+    """Select the backend used by :func:`adb_shell` and :func:`list_packages`."""
+    global _backend
+    if name not in ADB_BACKENDS:
+        raise ValueError(f"Unknown adb backend: {name}")
+    if _backend == "pool" and name != "pool":
+        _shell_pool.close_all()
+    _backend = name
+
+
+_shell_pool = register_pool(
+    ShellSessionPool(lambda serial: [get_adb_path(), "-s", serial, "shell"])
+)
+_socket_client: AdbClient | None = None
+
+
+def get_adb_client() -> AdbClient:
+    """Return the shared :class:`AdbClient` used by the socket backend."""
+    global _socket_client
+    if _socket_client is None:
+        _socket_client = AdbClient()
+    return _socket_client
+
+
+def _shell_stdout(serial: str, cmd: str) -> str | None:
+    """Return stdout of ``cmd`` on ``serial`` or ``None`` on failure."""
+    if _backend == "pool":
+        try:
+            status, output = _shell_pool.run(serial, cmd)
+        except (ShellSessionError, OSError):
+            return None
+        return output if status == 0 else None
+    if _backend == "socket":
+        try:
+            status, output = get_adb_client().shell(serial, cmd)
+        except (AdbProtocolError, OSError):
+            return None
+        return output if status == 0 else None
+    try:
+        return run_adb(["-s", serial, "shell", cmd]).stdout
+    except (subprocess.CalledProcessError, RuntimeError):
+        return None
+
+
 def adb_shell(serial: str, cmd: str) -> str:
     """Execute an adb shell command for a specific device."""
+    output = _shell_stdout(serial, cmd)
+    return "N/A" if output is None else output.strip()
+
+
+def iter_shell_lines(serial: str, cmd: str) -> Iterator[str]:
+    """Yield stdout lines of ``cmd`` as they arrive from the device.
+
+    Unlike :func:`adb_shell` the output is never held in memory as a whole,
+    which suits multi-megabyte dumps. Nothing is yielded if the command cannot
+    be started.
+    """
+    if _backend == "socket":
+        try:
+            sock = get_adb_client().open_service(serial, f"shell:{cmd}")
+        except (AdbProtocolError, OSError):
+            return
+        with sock, sock.makefile("r", encoding="utf-8", errors="replace") as stream:
+            yield from stream
+        return
     try:
-        result = run_adb(["-s", serial, "shell", cmd])
-        return result.stdout.strip()
-    except (subprocess.CalledProcessError, RuntimeError):
-        return "N/A"
+        proc = subprocess.Popen(
+            [get_adb_path(), "-s", serial, "shell", cmd],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+    except OSError:
+        return
+    try:
+        yield from proc.stdout
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
 
 
 def list_packages(serial: str, flags: List[str] | None = None) -> List[str]:
     """Return a list of package names from `pm list packages`."""
-    args = ["-s", serial, "shell", "pm", "list", "packages"]
-    if flags:
-        args.extend(flags)
-    try:
-        result = run_adb(args)
-        return [
-            line.replace("package:", "").strip()
-            for line in result.stdout.strip().splitlines()
-            if line.strip()
-        ]
-    except (subprocess.CalledProcessError, RuntimeError):
+    cmd = " ".join(["pm", "list", "packages", *(flags or [])])
+    output = _shell_stdout(serial, cmd)
+    if output is None:
         return []
+    return [
+        line.replace("package:", "").strip()
+        for line in output.strip().splitlines()
+        if line.strip()
+    ]
+
+
+def adb_pull(serial: str, remote_path: str, local_path: str) -> None:
+    """Copy ``remote_path`` from the device to ``local_path``.
+
+    Raises ``RuntimeError`` (or ``CalledProcessError``) if the pull fails.
+    """
+    if _backend == "socket":
+        try:
+            get_adb_client().pull(serial, remote_path, local_path)
+        except (AdbProtocolError, OSError) as err:
+            raise RuntimeError(f"adb pull failed: {err}") from err
+        return
+    run_adb(["-s", serial, "pull", remote_path, local_path])
+
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+# Keep batched command lines well below the device's ARG_MAX.
+COMMAND_BATCH_BYTES = 64 * 1024
+
+
+def batched_commands(prefix: str, args: Iterable[str],
+                     suffix: str = " 2>/dev/null; true",
+                     limit: int = COMMAND_BATCH_BYTES) -> List[str]:
+    """Split ``prefix arg1 arg2 ...`` into as few shell commands as fit ``limit``.
+
+    ``args`` must already be shell-quoted (globs may be left unquoted).
+    """
+    commands: List[str] = []
+    batch: List[str] = []
+    size = 0
+    for arg in args:
+        if batch and size + len(arg) > limit:
+            commands.append(f"{prefix} {' '.join(batch)}{suffix}")
+            batch, size = [], 0
+        batch.append(arg)
+        size += len(arg) + 1
+    if batch:
+        commands.append(f"{prefix} {' '.join(batch)}{suffix}")
+    return commands
+
+
+def stream_file(serial: str, remote_path: str,
+                chunk_size: int = STREAM_CHUNK_SIZE,
+                expected_size: Optional[int] = None) -> Iterator[bytes]:
+    """Yield the bytes of ``remote_path`` without writing them to disk.
+
+    Uses the ``sync:`` protocol on the socket backend and ``adb exec-out cat``
+    otherwise, so only one chunk is held in memory at a time. Raises
+    ``RuntimeError`` if the transfer fails. ``exec-out`` cannot report a
+    missing file or a stream cut short, which just end early; pass
+    ``expected_size`` (e.g. from ``stat``) to raise ``RuntimeError`` when
+    the byte count differs.
+    """
+    received = 0
+    chunks = _file_chunks(serial, remote_path, chunk_size)
+    try:
+        for chunk in chunks:
+            received += len(chunk)
+            yield chunk
+    finally:
+        chunks.close()
+    if expected_size is not None and received != expected_size:
+        raise RuntimeError(
+            f"adb stream of {remote_path} returned {received} of {expected_size} bytes"
+        )
+
+
+def _file_chunks(serial: str, remote_path: str, chunk_size: int) -> Iterator[bytes]:
+    if _backend == "socket":
+        chunks = get_adb_client().iter_file(serial, remote_path)
+        try:
+            yield from chunks
+        except (AdbProtocolError, OSError) as err:
+            raise RuntimeError(f"adb stream failed: {err}") from err
+        finally:
+            chunks.close()
+        return
+    yield from iter_exec_out(serial, f"cat {shlex.quote(remote_path)} 2>/dev/null", chunk_size)
+
+
+def iter_exec_out(serial: str, cmd: str,
+                  chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the raw stdout of ``cmd`` run through ``exec-out`` in chunks.
+
+    Output is binary-safe (no pty newline translation). Raises
+    ``RuntimeError`` if the command cannot be started or adb fails.
+    """
+    if _backend == "socket":
+        try:
+            sock = get_adb_client().open_service(serial, f"exec:{cmd}")
+        except (AdbProtocolError, OSError) as err:
+            raise RuntimeError(f"adb exec-out failed: {err}") from err
+        with sock:
+            while True:
+                try:
+                    chunk = sock.recv(chunk_size)
+                except OSError as err:
+                    raise RuntimeError(f"adb exec-out failed: {err}") from err
+                if not chunk:
+                    return
+                yield chunk
+    try:
+        proc = subprocess.Popen(
+            [get_adb_path(), "-s", serial, "exec-out", cmd],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError as err:
+        raise RuntimeError(f"adb exec-out failed: {err}") from err
+    try:
+        while True:
+            chunk = proc.stdout.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+        returncode = proc.wait()
+    if returncode != 0:
+        raise RuntimeError(f"adb exec-out exited with status {returncode}")
 
 
 def list_connected_devices() -> List[str]:
     """Return the serial numbers of all attached devices."""
+    if _backend == "socket":
+        try:
+            devices = get_adb_client().devices()
+        except (AdbProtocolError, OSError):
+            return []
+        return [d["serial"] for d in devices if d["state"] == "device"]
     try:
         result = run_adb(["devices"])
         lines = result.stdout.strip().splitlines()[1:]
@@ -2,69 +2,513 @@
 
 from __future__ import annotations
 
+import mmap
 import os
+import struct
 import zipfile
-from typing import Optional
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .axml import AXMLError, decode_manifest
+from .hash_utils import hashes_of_file, md5_digest, sha1_digest, sha256_digest
+
+if TYPE_CHECKING:  # pragma: no cover
+    from database.hash_cache import HashCache
 
 try:
     from apkutils2 import AXML
 except Exception:  # pragma: no cover - apkutils2 may not be installed
     AXML = None
 
+try:
+    from apkutils2 import Manifest
+except Exception:  # pragma: no cover - apkutils2 may not be installed
+    Manifest = None
 
-def extract_manifest(apk_path: str) -> Optional[bytes]:
-    """Return the raw AndroidManifest.xml from the APK or ``None`` if missing."""
-    print(f"[apk_utils] extract_manifest: {apk_path}")
-    if not os.path.isfile(apk_path):
-        print("[apk_utils] File not found")
-        return None
-    try:
-        with zipfile.ZipFile(apk_path, "r") as z:
-            with z.open("AndroidManifest.xml") as f:
-                data = f.read()
-                print(f"[apk_utils] Manifest size: {len(data)} bytes")
+MANIFEST_NAME = "AndroidManifest.xml"
+CERT_SUFFIXES = (".rsa", ".dsa", ".ec")
+
+_EOCD_SIG = b"PK\x05\x06"
+_ZIP64_LOCATOR_SIG = b"PK\x06\x07"
+_ZIP64_EOCD_SIG = b"PK\x06\x06"
+_CD_SIG = b"PK\x01\x02"
+_LOCAL_SIG = b"PK\x03\x04"
+_EOCD = struct.Struct("<4s4H2LH")
+_ZIP64_LOCATOR = struct.Struct("<4sLQL")
+_ZIP64_EOCD = struct.Struct("<4sQ2H2L4Q")
+_CD = struct.Struct("<4s6H3L5H2L")
+_LOCAL = struct.Struct("<4s5H3L2H")
+_CD_NAME_OFFSET = _CD.size  # 46
+# EOCD plus the longest possible archive comment.
+_EOCD_SEARCH = _EOCD.size + 0xFFFF
+_STREAM_CHUNK = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ZipEntry:
+    """One central-directory record."""
+
+    name: str
+    method: int
+    flags: int
+    crc: int
+    compressed_size: int
+    size: int
+    header_offset: int
+
+    @property
+    def is_stored(self) -> bool:
+        return self.method == zipfile.ZIP_STORED
+
+
+class MappedZip:
+    """Read-only zip reader over a memory-mapped file.
+
+    Only the end-of-central-directory record (including ZIP64) is parsed up
+    front. Entries are located by searching the mapped central directory for
+    their name, so looking up a few entries of a 2 GB APK with hundreds of
+    thousands of files costs neither a Python object per entry nor a read of
+    the archive. Stored entries are exposed as zero-copy ``memoryview``
+    slices; deflated ones are inflated in chunks.
+
+    Views returned by :meth:`view` must be released before :meth:`close`
+    can unmap the file.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as exc:  # empty file
+                raise zipfile.BadZipFile(f"cannot map {path}: {exc}") from exc
+        try:
+            self.cd_offset, self.cd_size, self.count = self._locate_central_directory()
+        except BaseException:
+            self._map.close()
+            raise
+
+    def __enter__(self) -> "MappedZip":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        try:
+            self._map.close()
+        except BufferError:
+            # A view is still alive; the mapping is released with it.
+            pass
+
+    def _locate_central_directory(self) -> Tuple[int, int, int]:
+        mm = self._map
+        floor = max(0, len(mm) - _EOCD_SEARCH)
+        pos = mm.rfind(_EOCD_SIG, floor)
+        # The signature may also occur inside the archive comment; the real
+        # record's comment length reaches exactly to the end of the file.
+        while pos >= 0 and (pos + _EOCD.size > len(mm)
+                            or pos + _EOCD.size + _EOCD.unpack_from(mm, pos)[7] != len(mm)):
+            pos = mm.rfind(_EOCD_SIG, floor, pos)
+        if pos < 0:
+            raise zipfile.BadZipFile(f"{self.path}: end of central directory not found")
+        _sig, _disk, _cd_disk, _n_disk, count, cd_size, cd_offset, _clen = _EOCD.unpack_from(mm, pos)
+        loc = pos - _ZIP64_LOCATOR.size
+        if loc >= 0 and mm[loc:loc + 4] == _ZIP64_LOCATOR_SIG:
+            _sig, _disk, eocd64, _disks = _ZIP64_LOCATOR.unpack_from(mm, loc)
+            if mm[eocd64:eocd64 + 4] != _ZIP64_EOCD_SIG:
+                raise zipfile.BadZipFile(f"{self.path}: bad ZIP64 end of central directory")
+            fields = _ZIP64_EOCD.unpack_from(mm, eocd64)
+            count, cd_size, cd_offset = fields[7], fields[8], fields[9]
+        if cd_offset + cd_size > len(mm):
+            raise zipfile.BadZipFile(f"{self.path}: central directory out of bounds")
+        return cd_offset, cd_size, count
+
+    def _entry_at(self, pos: int) -> Tuple[ZipEntry, int]:
+        """Parse the central-directory record at ``pos``; return it and the next offset."""
+        mm = self._map
+        (sig, _made, _need, flags, method, _time, _date, crc, csize, usize,
+         name_len, extra_len, comment_len, _disk, _iattr, _eattr, offset) = _CD.unpack_from(mm, pos)
+        if sig != _CD_SIG:
+            raise zipfile.BadZipFile(f"{self.path}: bad central directory record at {pos}")
+        start = pos + _CD_NAME_OFFSET
+        raw_name = mm[start:start + name_len]
+        name = raw_name.decode("utf-8" if flags & 0x800 else "cp437")
+        if 0xFFFFFFFF in (csize, usize, offset):
+            usize, csize, offset = self._zip64_sizes(
+                start + name_len, extra_len, usize, csize, offset
+            )
+        entry = ZipEntry(name, method, flags, crc, csize, usize, offset)
+        return entry, start + name_len + extra_len + comment_len
+
+    def _zip64_sizes(self, pos: int, length: int, usize: int, csize: int,
+                     offset: int) -> Tuple[int, int, int]:
+        mm = self._map
+        end = pos + length
+        while pos + 4 <= end:
+            tag, size = struct.unpack_from("<HH", mm, pos)
+            if tag == 0x0001:
+                values = iter(struct.unpack_from(f"<{size // 8}Q", mm, pos + 4))
+                if usize == 0xFFFFFFFF:
+                    usize = next(values)
+                if csize == 0xFFFFFFFF:
+                    csize = next(values)
+                if offset == 0xFFFFFFFF:
+                    offset = next(values)
+                break
+            pos += 4 + size
+        return usize, csize, offset
+
+    def iter_entries(self) -> Iterator[ZipEntry]:
+        """Yield every entry in central-directory order."""
+        pos, end = self.cd_offset, self.cd_offset + self.cd_size
+        while pos < end:
+            entry, pos = self._entry_at(pos)
+            yield entry
+
+    def _iter_name_hits(self, needle: bytes) -> Iterator[Tuple[int, int]]:
+        """Yield ``(record_start, name_len)`` of records whose name starts with ``needle``."""
+        mm = self._map
+        start, end = self.cd_offset, self.cd_offset + self.cd_size
+        pos = mm.find(needle, start + _CD_NAME_OFFSET, end)
+        while pos >= 0:
+            record = pos - _CD_NAME_OFFSET
+            if mm[record:record + 4] == _CD_SIG:
+                name_len = struct.unpack_from("<H", mm, record + 28)[0]
+                if name_len >= len(needle):
+                    yield record, name_len
+            pos = mm.find(needle, pos + 1, end)
+
+    def find(self, name: str) -> Optional[ZipEntry]:
+        """Return the entry called ``name`` without walking the directory.
+
+        Raises :class:`zipfile.BadZipFile` if several entries share the name:
+        Android rejects such APKs, and readers disagree on which copy counts.
+        """
+        needle = name.encode("utf-8")
+        found: Optional[int] = None
+        for record, name_len in self._iter_name_hits(needle):
+            if name_len == len(needle):
+                if found is not None:
+                    raise zipfile.BadZipFile(f"{self.path}: duplicate entry {name}")
+                found = record
+        return None if found is None else self._entry_at(found)[0]
+
+    def find_prefix(self, prefix: str) -> List[ZipEntry]:
+        """Return entries whose name starts with ``prefix``."""
+        return [self._entry_at(record)[0]
+                for record, _ in self._iter_name_hits(prefix.encode("utf-8"))]
+
+    def _data_offset(self, entry: ZipEntry) -> int:
+        mm = self._map
+        if mm[entry.header_offset:entry.header_offset + 4] != _LOCAL_SIG:
+            raise zipfile.BadZipFile(f"{self.path}: bad local header for {entry.name}")
+        fields = _LOCAL.unpack_from(mm, entry.header_offset)
+        name_len, extra_len = fields[9], fields[10]
+        start = entry.header_offset + _LOCAL.size + name_len + extra_len
+        if start + entry.compressed_size > len(mm):
+            raise zipfile.BadZipFile(f"{self.path}: {entry.name} extends past end of file")
+        return start
+
+    def raw_view(self, entry: ZipEntry) -> memoryview:
+        """Zero-copy view of the entry's stored (possibly compressed) bytes."""
+        start = self._data_offset(entry)
+        return memoryview(self._map)[start:start + entry.compressed_size]
+
+    def view(self, entry: ZipEntry) -> memoryview:
+        """Zero-copy view of a stored entry's contents."""
+        if not entry.is_stored:
+            raise ValueError(f"{entry.name} is compressed; use iter_chunks()")
+        return self.raw_view(entry)
+
+    def iter_chunks(self, entry: ZipEntry, chunk_size: int = _STREAM_CHUNK) -> Iterator[bytes]:
+        """Yield the entry's contents in chunks, inflating as needed."""
+        if entry.flags & 0x1:
+            raise zipfile.BadZipFile(f"{entry.name} is encrypted")
+        if entry.method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise NotImplementedError(f"compression method {entry.method} for {entry.name}")
+        with self.raw_view(entry) as raw:
+            if entry.is_stored:
+                for pos in range(0, len(raw), chunk_size):
+                    yield bytes(raw[pos:pos + chunk_size])
+                return
+            inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+            for pos in range(0, len(raw), chunk_size):
+                data = inflater.decompress(raw[pos:pos + chunk_size], chunk_size)
+                while data:
+                    yield data
+                    data = inflater.decompress(inflater.unconsumed_tail, chunk_size)
+            tail = inflater.flush()
+            if tail:
+                yield tail
+
+    def read(self, name: str) -> Optional[bytes]:
+        """Return the contents of ``name`` (CRC-checked), or ``None`` if absent."""
+        entry = self.find(name)
+        if entry is None:
+            return None
+        data = b"".join(self.iter_chunks(entry))
+        if zlib.crc32(data) != entry.crc:
+            raise zipfile.BadZipFile(f"{self.path}: CRC mismatch for {name}")
+        return data
+
+
+class ApkHandle:
+    """An APK opened once, with every derived artifact computed on demand.
+
+    The archive is memory-mapped (:class:`MappedZip`) the first time it is
+    needed and only the entries actually used are looked up; the manifest bytes, decoded manifest, certificates, file hashes
+    and dict form are each computed once and memoized. Pass a handle instead
+    of a path to ``manifest_info``, ``ManifestAnalyzer``, ``ComponentScanner``
+    and ``CertificateParser`` so a full static pass shares one open and one
+    decode. With ``hash_cache`` the file digests are served from a
+    :class:`~database.HashCache` while the APK's stat is unchanged.
+    """
+
+    def __init__(self, path: str, hash_cache: Optional["HashCache"] = None) -> None:
+        self.path = path
+        self.hash_cache = hash_cache
+        self._zip: Optional[MappedZip] = None
+        self._open_failed = False
+
+    def __repr__(self) -> str:
+        return f"ApkHandle({self.path!r})"
+
+    def __enter__(self) -> "ApkHandle":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the archive; memoized artifacts remain available."""
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    @property
+    def exists(self) -> bool:
+        return os.path.isfile(self.path)
+
+    def _archive(self) -> Optional[MappedZip]:
+        if self._zip is None and not self._open_failed:
+            if not self.exists:
+                print(f"[ApkHandle] File not found: {self.path}")
+                self._open_failed = True
+                return None
+            try:
+                print(f"[ApkHandle] Opening {self.path}")
+                self._zip = MappedZip(self.path)
+            except (OSError, zipfile.BadZipFile) as exc:
+                print(f"[ApkHandle] Failed to open {self.path}: {exc}")
+                self._open_failed = True
+        return self._zip
+
+    @cached_property
+    def names(self) -> List[str]:
+        """Entry names from the central directory (walks every record)."""
+        archive = self._archive()
+        return [e.name for e in archive.iter_entries()] if archive is not None else []
+
+    def read(self, name: str) -> Optional[bytes]:
+        """Return the contents of entry ``name`` or ``None`` if unavailable."""
+        archive = self._archive()
+        if archive is None:
+            return None
+        try:
+            return archive.read(name)
+        except (OSError, zlib.error, zipfile.BadZipFile, NotImplementedError) as exc:
+            print(f"[ApkHandle] Failed to read {name}: {exc}")
+            return None
+
+    @cached_property
+    def manifest_bytes(self) -> Optional[bytes]:
+        """Raw binary ``AndroidManifest.xml``."""
+        return self.read(MANIFEST_NAME)
+
+    @cached_property
+    def manifest_xml(self) -> Optional[str]:
+        """The manifest decoded to an XML string."""
+        raw = self.manifest_bytes
+        if not raw:
+            return None
+        if AXML is None:
+            print("[ApkHandle] apkutils2.AXML is unavailable")
+            return None
+        try:
+            return AXML(raw).get_xml()
+        except Exception as exc:
+            print(f"[ApkHandle] Failed to decode manifest XML: {exc}")
+            return None
+
+    @cached_property
+    def manifest(self) -> Any:
+        """The decoded manifest, or ``None``.
+
+        This is a :class:`~utils.axml.ManifestModel` from the built-in
+        decoder; ``apkutils2.Manifest`` is only used, when installed, for
+        manifests the decoder rejects.
+        """
+        raw = self.manifest_bytes
+        if not raw:
+            return None
+        try:
+            return decode_manifest(raw)
+        except AXMLError as exc:
+            print(f"[ApkHandle] Native AXML decode failed ({exc}), trying apkutils2")
+        xml = self.manifest_xml
+        if not xml:
+            return None
+        if Manifest is None:
+            print("[ApkHandle] apkutils2.Manifest is unavailable")
+            return None
+        try:
+            return Manifest(xml)
+        except Exception as exc:
+            print(f"[ApkHandle] Failed to parse manifest: {exc}")
+            return None
+
+    def read_manifest(self, fields: Optional[Iterable[str]] = None) -> Any:
+        """Return the manifest, decoding only ``fields`` if it is not cached yet.
+
+        ``fields`` are names from :data:`utils.axml.FIELDS`; the partial model
+        is not memoized, so a later full :attr:`manifest` still decodes once.
+        """
+        if fields is None or "manifest" in self.__dict__:
+            return self.manifest
+        raw = self.manifest_bytes
+        if not raw:
+            return None
+        try:
+            return decode_manifest(raw, fields)
+        except AXMLError:
+            return self.manifest
+
+    @cached_property
+    def manifest_dict(self) -> Dict[str, Any]:
+        """The manifest converted to a dictionary (empty if unavailable)."""
+        manifest = self.manifest
+        if manifest is None:
+            return {}
+        try:
+            return manifest.json() or {}
+        except Exception as exc:
+            print(f"[ApkHandle] Failed to convert manifest to dict: {exc}")
+            return {}
+
+    @cached_property
+    def certificate_names(self) -> List[str]:
+        """Signature block entries (``META-INF/*.RSA|DSA|EC``)."""
+        archive = self._archive()
+        if archive is None:
+            return []
+        names = [e.name for e in archive.find_prefix("META-INF/")]
+        if not names:
+            # Unusually cased directory; fall back to a full walk.
+            names = [n for n in self.names if n.lower().startswith("meta-inf/")]
+        return [n for n in names if n.lower().endswith(CERT_SUFFIXES)]
+
+    @cached_property
+    def certificate(self) -> Optional[bytes]:
+        """Contents of the first signature block."""
+        for name in self.certificate_names:
+            data = self.read(name)
+            if data is not None:
                 return data
-    except Exception as e:
-        print(f"[apk_utils] Failed to extract manifest: {e}")
         return None
 
+    @cached_property
+    def certificates(self) -> List[Tuple[str, str]]:
+        """``(subject, md5)`` for every certificate in the signature block."""
+        data = self.certificate
+        if data is None:
+            return []
+        try:
+            from apkutils2.cert import Certificate
+        except Exception as exc:  # pragma: no cover - optional dependency
+            print(f"[ApkHandle] Certificate parsing unavailable: {exc}")
+            return []
+        try:
+            return list(Certificate(data).get() or [])
+        except Exception as exc:
+            print(f"[ApkHandle] Failed to parse certificates: {exc}")
+            return []
 
-def extract_certificate(apk_path: str) -> Optional[bytes]:
+    @cached_property
+    def certificate_fingerprints(self) -> Dict[str, str]:
+        """SHA-256, SHA-1 and MD5 of the signature block."""
+        cert = self.certificate
+        if not cert:
+            return {}
+        return {
+            "sha256": sha256_digest(cert),
+            "sha1": sha1_digest(cert),
+            "md5": md5_digest(cert),
+        }
+
+    @cached_property
+    def sha256(self) -> Optional[str]:
+        """SHA-256 of the APK file, without computing the other digests."""
+        if "hashes" in self.__dict__:
+            return self.hashes.get("sha256")
+        if not self.exists:
+            return None
+        return hashes_of_file(self.path, ("sha256",), cache=self.hash_cache)["sha256"]
+
+    @cached_property
+    def hashes(self) -> Dict[str, str]:
+        """SHA-256, SHA-1 and MD5 of the APK file itself."""
+        if not self.exists:
+            return {}
+        return hashes_of_file(self.path, ("sha256", "sha1", "md5"), cache=self.hash_cache)
+
+
+ApkSource = Union[str, ApkHandle]
+
+
+@contextmanager
+def open_apk(apk: ApkSource, hash_cache: Optional["HashCache"] = None) -> Iterator[ApkHandle]:
+    """Yield a handle for ``apk``; a path is opened and closed, a handle passed through.
+
+    ``hash_cache`` is given to a handle opened here.
+    """
+    if isinstance(apk, ApkHandle):
+        yield apk
+        return
+    with ApkHandle(apk, hash_cache) as handle:
+        yield handle
+
+
+def extract_manifest(apk: ApkSource) -> Optional[bytes]:
+    """Return the raw AndroidManifest.xml from the APK or ``None`` if missing."""
+    with open_apk(apk) as handle:
+        print(f"[apk_utils] extract_manifest: {handle.path}")
+        data = handle.manifest_bytes
+        if data is not None:
+            print(f"[apk_utils] Manifest size: {len(data)} bytes")
+        return data
+
+
+def extract_certificate(apk: ApkSource) -> Optional[bytes]:
     """Return the first certificate file from ``META-INF`` or ``None``."""
-    print(f"[apk_utils] extract_certificate: {apk_path}")
-    if not os.path.isfile(apk_path):
-        print("[apk_utils] File not found")
-        return None
-    try:
-        with zipfile.ZipFile(apk_path, "r") as z:
-            for name in z.namelist():
-                lower = name.lower()
-                if lower.startswith("meta-inf/") and lower.endswith((".rsa", ".dsa", ".ec")):
-                    with z.open(name) as f:
-                        data = f.read()
-                        print(f"[apk_utils] Certificate {name} size: {len(data)} bytes")
-                        return data
-    except Exception as e:
-        print(f"[apk_utils] Failed to extract certificate: {e}")
-        return None
-    print("[apk_utils] Certificate not found")
-    return None
+    with open_apk(apk) as handle:
+        print(f"[apk_utils] extract_certificate: {handle.path}")
+        data = handle.certificate
+        if data is None:
+            print("[apk_utils] Certificate not found")
+        else:
+            print(f"[apk_utils] Certificate {handle.certificate_names[0]} size: {len(data)} bytes")
+        return data
 
 
-def extract_manifest_xml(apk_path: str) -> Optional[str]:
+def extract_manifest_xml(apk: ApkSource) -> Optional[str]:
     """Return the decoded manifest XML string or ``None`` if unavailable."""
-    print(f"[apk_utils] extract_manifest_xml: {apk_path}")
-    raw = extract_manifest(apk_path)
-    if not raw:
-        print("[apk_utils] No manifest bytes extracted")
-        return None
-    if AXML is None:
-        print("[apk_utils] apkutils2.AXML is unavailable")
-        return None
-    try:
-        xml = AXML(raw).get_xml()
-        print(f"[apk_utils] Decoded manifest XML length: {len(xml)}")
+    with open_apk(apk) as handle:
+        print(f"[apk_utils] extract_manifest_xml: {handle.path}")
+        xml = handle.manifest_xml
+        if xml:
+            print(f"[apk_utils] Decoded manifest XML length: {len(xml)}")
         return xml
-    except Exception as e:
-        print(f"[apk_utils] Failed to decode manifest XML: {e}")
-        return None
@@ -0,0 +1,408 @@
+"""Decode binary AndroidManifest.xml (AXML) straight into a manifest model.
+
+The usual route decodes AXML to an XML string, parses that string into a DOM
+and converts it again into a dict. Here the string pool and element chunks
+are walked directly into a small typed :class:`ManifestModel`, strings are
+decoded only when referenced, and decoding can stop as soon as the requested
+fields are known (see :func:`decode_manifest`).
+"""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Chunk types (frameworks/base/libs/androidfw/include/androidfw/ResourceTypes.h).
+RES_STRING_POOL_TYPE = 0x0001
+RES_XML_TYPE = 0x0003
+RES_XML_START_NAMESPACE_TYPE = 0x0100
+RES_XML_END_NAMESPACE_TYPE = 0x0101
+RES_XML_START_ELEMENT_TYPE = 0x0102
+RES_XML_END_ELEMENT_TYPE = 0x0103
+RES_XML_RESOURCE_MAP_TYPE = 0x0180
+UTF8_FLAG = 0x100
+NO_INDEX = 0xFFFFFFFF
+
+# Typed value types.
+TYPE_REFERENCE = 0x01
+TYPE_ATTRIBUTE = 0x02
+TYPE_STRING = 0x03
+TYPE_FLOAT = 0x04
+TYPE_INT_DEC = 0x10
+TYPE_INT_HEX = 0x11
+TYPE_INT_BOOLEAN = 0x12
+TYPE_FIRST_COLOR_INT = 0x1C
+TYPE_LAST_COLOR_INT = 0x1F
+
+ANDROID_NS = "http://schemas.android.com/apk/res/android"
+# android.R.attr IDs, used when obfuscators blank the attribute name strings.
+ANDROID_ATTRS = {
+    0x01010001: "label",
+    0x01010002: "icon",
+    0x01010003: "name",
+    0x01010006: "permission",
+    0x0101000E: "enabled",
+    0x0101000F: "debuggable",
+    0x01010010: "exported",
+    0x01010011: "process",
+    0x01010018: "authorities",
+    0x0101001C: "priority",
+    0x01010026: "mimeType",
+    0x01010027: "scheme",
+    0x01010028: "host",
+    0x01010029: "port",
+    0x0101002A: "path",
+    0x0101002B: "pathPrefix",
+    0x0101002C: "pathPattern",
+    0x0101020C: "minSdkVersion",
+    0x0101021B: "versionCode",
+    0x0101021C: "versionName",
+    0x01010270: "targetSdkVersion",
+    0x01010271: "maxSdkVersion",
+    0x01010280: "allowBackup",
+}
+
+COMPONENT_TAGS = ("activity", "activity-alias", "service", "receiver", "provider")
+PERMISSION_TAGS = ("uses-permission", "uses-permission-sdk-23")
+FIELDS = ("package", "version", "sdk", "permissions", "components")
+# Bump when decoding changes what a manifest yields; cached results keyed on
+# an older version are then ignored.
+DECODER_VERSION = 1
+
+_HEADER = struct.Struct("<HHI")
+_POOL = struct.Struct("<IIIII")
+_ELEMENT = struct.Struct("<IIHHHHHH")
+_ATTRIBUTE = struct.Struct("<IIIHBBI")
+
+
+class AXMLError(ValueError):
+    """Raised when the data is not a well-formed binary XML document."""
+
+
+@dataclass
+class IntentFilter:
+    """Actions, categories and data specs of one ``<intent-filter>``."""
+
+    actions: List[str] = field(default_factory=list)
+    categories: List[str] = field(default_factory=list)
+    data: List[Dict[str, str]] = field(default_factory=list)
+
+    def json(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        if self.actions:
+            out["action"] = [{"@android:name": a} for a in self.actions]
+        if self.categories:
+            out["category"] = [{"@android:name": c} for c in self.categories]
+        if self.data:
+            out["data"] = [{f"@{k}": v for k, v in d.items()} for d in self.data]
+        return out
+
+
+@dataclass
+class Component:
+    """An activity, activity-alias, service, receiver or provider."""
+
+    kind: str
+    attributes: Dict[str, str] = field(default_factory=dict)
+    intent_filters: List[IntentFilter] = field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        return self.attributes.get("android:name", "")
+
+    @property
+    def exported(self) -> Optional[bool]:
+        """The ``android:exported`` flag, or ``None`` when not declared."""
+        value = self.attributes.get("android:exported")
+        return None if value is None else value == "true"
+
+    @property
+    def permission(self) -> str:
+        return self.attributes.get("android:permission", "")
+
+    @property
+    def actions(self) -> List[str]:
+        return [a for flt in self.intent_filters for a in flt.actions]
+
+    def json(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {f"@{k}": v for k, v in self.attributes.items()}
+        if self.intent_filters:
+            out["intent-filter"] = [flt.json() for flt in self.intent_filters]
+        return out
+
+
+@dataclass
+class ManifestModel:
+    """Compact manifest with the fields static analysis needs.
+
+    It offers the parts of ``apkutils2.Manifest`` the analyzers use
+    (``package_name``, ``version_code``, ``version_name``, ``permissions``,
+    ``main_activity`` and ``json()``). ``complete`` is false when decoding
+    stopped early.
+    """
+
+    package_name: str = ""
+    version_code: str = ""
+    version_name: str = ""
+    min_sdk: str = ""
+    target_sdk: str = ""
+    max_sdk: str = ""
+    permissions: List[str] = field(default_factory=list)
+    application: Dict[str, str] = field(default_factory=dict)
+    components: List[Component] = field(default_factory=list)
+    complete: bool = True
+    _json: Optional[Dict[str, Any]] = field(default=None, repr=False, compare=False)
+
+    @property
+    def main_activity(self) -> Optional[str]:
+        """The first activity handling ``MAIN`` with the ``LAUNCHER`` category."""
+        for comp in self.components:
+            if comp.kind != "activity":
+                continue
+            actions = {a for flt in comp.intent_filters for a in flt.actions}
+            categories = {c for flt in comp.intent_filters for c in flt.categories}
+            if ("android.intent.action.MAIN" in actions
+                    and "android.intent.category.LAUNCHER" in categories):
+                return comp.name
+        return None
+
+    def components_of(self, kind: str) -> List[Component]:
+        return [c for c in self.components if c.kind == kind]
+
+    def json(self) -> Dict[str, Any]:
+        """Return the manifest in ``xmltodict`` form (computed once).
+
+        Repeated elements are always lists, which every consumer here
+        already accepts.
+        """
+        if self._json is not None:
+            return self._json
+        data: Dict[str, Any] = {}
+        if self.package_name:
+            data["@package"] = self.package_name
+        if self.version_code:
+            data["@android:versionCode"] = self.version_code
+        if self.version_name:
+            data["@android:versionName"] = self.version_name
+        sdk = {
+            "@android:minSdkVersion": self.min_sdk,
+            "@android:targetSdkVersion": self.target_sdk,
+            "@android:maxSdkVersion": self.max_sdk,
+        }
+        sdk = {k: v for k, v in sdk.items() if v}
+        if sdk:
+            data["uses-sdk"] = sdk
+        if self.permissions:
+            data["uses-permission"] = [{"@android:name": p} for p in self.permissions]
+        app: Dict[str, Any] = {f"@{k}": v for k, v in self.application.items()}
+        for comp in self.components:
+            app.setdefault(comp.kind, []).append(comp.json())
+        if app:
+            data["application"] = app
+        self._json = data
+        return data
+
+
+class _StringPool:
+    """String pool whose entries are decoded on first use."""
+
+    def __init__(self, data: bytes, offset: int, header_size: int, size: int) -> None:
+        if offset + 28 > len(data):
+            raise AXMLError("truncated string pool header")
+        count, _styles, flags, strings_start, _ = _POOL.unpack_from(data, offset + 8)
+        offsets_at = offset + header_size
+        if offsets_at + 4 * count > offset + size:
+            raise AXMLError("string pool offsets out of bounds")
+        self._data = data
+        self._offsets = struct.unpack_from(f"<{count}I", data, offsets_at)
+        self._base = offset + strings_start
+        self._end = offset + size
+        self._utf8 = bool(flags & UTF8_FLAG)
+        self._cache: List[Optional[str]] = [None] * count
+
+    def get(self, index: int) -> str:
+        if index == NO_INDEX or index >= len(self._cache):
+            return ""
+        value = self._cache[index]
+        if value is None:
+            value = self._decode(self._base + self._offsets[index])
+            self._cache[index] = value
+        return value
+
+    def _decode(self, pos: int) -> str:
+        data = self._data
+        try:
+            if self._utf8:
+                pos += 2 if data[pos] & 0x80 else 1  # length in characters
+                length = data[pos]
+                if length & 0x80:
+                    length = ((length & 0x7F) << 8) | data[pos + 1]
+                    pos += 1
+                pos += 1
+                raw = data[pos:pos + length]
+                return raw.decode("utf-8", errors="replace")
+            length = data[pos] | (data[pos + 1] << 8)
+            pos += 2
+            if length & 0x8000:
+                length = ((length & 0x7FFF) << 16) | data[pos] | (data[pos + 1] << 8)
+                pos += 2
+            return data[pos:pos + 2 * length].decode("utf-16-le", errors="replace")
+        except IndexError as exc:
+            raise AXMLError("string out of bounds") from exc
+
+
+def _format_value(value_type: int, value: int, raw: str) -> str:
+    """Format a typed value the way ``apkutils2`` renders it."""
+    if value_type == TYPE_STRING:
+        return raw
+    if value_type == TYPE_INT_BOOLEAN:
+        return "false" if value == 0 else "true"
+    if value_type == TYPE_INT_HEX:
+        return "0x%08X" % value
+    if value_type == TYPE_REFERENCE:
+        return "@%s%08X" % ("android:" if value >> 24 == 1 else "", value)
+    if value_type == TYPE_ATTRIBUTE:
+        return "?%s%08X" % ("android:" if value >> 24 == 1 else "", value)
+    if value_type == TYPE_FLOAT:
+        return "%f" % struct.unpack("<f", struct.pack("<I", value))[0]
+    if TYPE_FIRST_COLOR_INT <= value_type <= TYPE_LAST_COLOR_INT:
+        return "#%08X" % value
+    if value_type >= TYPE_INT_DEC:
+        # Signed, as aapt stores negative decimal values in two's complement.
+        return "%d" % (value - (1 << 32) if value & 0x80000000 else value)
+    return raw
+
+
+def iter_elements(data: bytes) -> Iterator[Tuple[str, str, Dict[str, str]]]:
+    """Yield ``("start", tag, attributes)`` and ``("end", tag, {})`` events.
+
+    Attribute names carry their namespace prefix (``android:name``).
+    Raises :class:`AXMLError` on malformed input.
+    """
+    if len(data) < 8:
+        raise AXMLError("data too short for AXML")
+    doc_type, header_size, doc_size = _HEADER.unpack_from(data, 0)
+    if doc_type != RES_XML_TYPE:
+        raise AXMLError(f"not binary XML (chunk type 0x{doc_type:04x})")
+    if doc_size > len(data):
+        raise AXMLError(f"truncated AXML ({len(data)} of {doc_size} bytes)")
+    end = doc_size
+    pos = header_size
+    pool: Optional[_StringPool] = None
+    resource_ids: Tuple[int, ...] = ()
+    prefixes: Dict[str, str] = {}
+    while pos + 8 <= end:
+        chunk_type, chunk_header, chunk_size = _HEADER.unpack_from(data, pos)
+        if chunk_size < 8 or pos + chunk_size > end:
+            raise AXMLError(f"bad chunk size {chunk_size} at offset {pos}")
+        if chunk_type == RES_STRING_POOL_TYPE:
+            pool = _StringPool(data, pos, chunk_header, chunk_size)
+        elif chunk_type == RES_XML_RESOURCE_MAP_TYPE:
+            count = (chunk_size - chunk_header) // 4
+            resource_ids = struct.unpack_from(f"<{count}I", data, pos + chunk_header)
+        elif pool is None:
+            raise AXMLError("element before string pool")
+        elif chunk_type == RES_XML_START_NAMESPACE_TYPE:
+            prefix, uri = struct.unpack_from("<II", data, pos + chunk_header)
+            prefixes[pool.get(uri)] = pool.get(prefix)
+        elif chunk_type == RES_XML_START_ELEMENT_TYPE:
+            ext = pos + chunk_header
+            (_ns, name, attr_start, attr_size, attr_count,
+             _id, _cls, _style) = _ELEMENT.unpack_from(data, ext)
+            attrs: Dict[str, str] = {}
+            at = ext + attr_start
+            if at + attr_count * attr_size > pos + chunk_size:
+                raise AXMLError("attributes out of bounds")
+            for _ in range(attr_count):
+                a_ns, a_name, a_raw, _sz, _res0, a_type, a_data = _ATTRIBUTE.unpack_from(data, at)
+                at += attr_size
+                attr_name = pool.get(a_name)
+                if not attr_name and a_name < len(resource_ids):
+                    attr_name = ANDROID_ATTRS.get(resource_ids[a_name], "")
+                    a_ns_uri = ANDROID_NS
+                else:
+                    a_ns_uri = pool.get(a_ns)
+                if not attr_name:
+                    continue
+                prefix = prefixes.get(a_ns_uri, "android" if a_ns_uri == ANDROID_NS else "")
+                key = f"{prefix}:{attr_name}" if prefix else attr_name
+                attrs[key] = _format_value(a_type, a_data, pool.get(a_raw))
+            yield "start", pool.get(name), attrs
+        elif chunk_type == RES_XML_END_ELEMENT_TYPE:
+            _ns, name = struct.unpack_from("<II", data, pos + chunk_header)
+            yield "end", pool.get(name), {}
+        pos += chunk_size
+
+
+def decode_manifest(data: bytes, fields: Optional[Iterable[str]] = None) -> ManifestModel:
+    """Decode binary ``AndroidManifest.xml`` into a :class:`ManifestModel`.
+
+    By default the whole document is decoded. ``fields`` limits decoding to some of :data:`FIELDS`; decoding stops once
+    they are all known. ``package`` and ``version`` come from the root
+    element and ``components`` needs the whole application element.
+    ``sdk`` and ``permissions`` are only complete at ``</manifest>``: the
+    package manager accepts those elements anywhere under the root, so a
+    manifest may place them after ``<application>``.
+    """
+    wanted = set(FIELDS if fields is None else fields)
+    unknown = wanted - set(FIELDS)
+    if unknown:
+        raise ValueError(f"unknown manifest fields: {sorted(unknown)}")
+    model = ManifestModel()
+    done: set = set()
+    stack: List[str] = []
+    component: Optional[Component] = None
+    intent: Optional[IntentFilter] = None
+
+    for event, tag, attrs in iter_elements(data):
+        if event == "end":
+            if stack:
+                stack.pop()
+            if tag == "intent-filter":
+                intent = None
+            elif tag in COMPONENT_TAGS:
+                component = None
+            elif tag == "application":
+                done.add("components")
+            elif tag == "manifest" and not stack:
+                done.update(("sdk", "permissions"))
+        else:
+            parent = stack[-1] if stack else ""
+            stack.append(tag)
+            if tag == "manifest" and parent == "":
+                model.package_name = attrs.get("package", "")
+                model.version_code = attrs.get("android:versionCode", "")
+                model.version_name = attrs.get("android:versionName", "")
+                done.update(("package", "version"))
+            elif parent == "manifest" and tag in PERMISSION_TAGS:
+                perm = attrs.get("android:name")
+                if perm:
+                    model.permissions.append(perm)
+            elif parent == "manifest" and tag == "uses-sdk":
+                model.min_sdk = attrs.get("android:minSdkVersion", "")
+                model.target_sdk = attrs.get("android:targetSdkVersion", "")
+                model.max_sdk = attrs.get("android:maxSdkVersion", "")
+            elif parent == "manifest" and tag == "application":
+                model.application = attrs
+            elif parent == "application" and tag in COMPONENT_TAGS:
+                component = Component(tag, attrs)
+                model.components.append(component)
+            elif component is not None and parent == component.kind and tag == "intent-filter":
+                intent = IntentFilter()
+                component.intent_filters.append(intent)
+            elif intent is not None and parent == "intent-filter":
+                name = attrs.get("android:name", "")
+                if tag == "action" and name:
+                    intent.actions.append(name)
+                elif tag == "category" and name:
+                    intent.categories.append(name)
+                elif tag == "data":
+                    intent.data.append(attrs)
+        if fields is not None and wanted <= done:
+            # Stopping at </manifest> has still read the whole document.
+            model.complete = not stack
+            return model
+    if "package" not in done:
+        raise AXMLError("no <manifest> element")
+    return model
@@ -0,0 +1,153 @@
+"""Buffered CSV appending that is safe across threads and processes.
+
+Rows are collected in memory and written in one locked append once
+``max_rows`` are pending or ``flush_interval`` seconds have passed since the
+last write. The file lock (``fcntl`` on POSIX, ``msvcrt`` on Windows) is held
+while the header is checked and the batch written, so several workers can
+share one CSV without interleaving partial lines or duplicating the header.
+An appender stays registered until :meth:`BufferedCSVAppender.close`, so rows
+still pending in one that was never closed are flushed at interpreter exit.
+"""
+
+from __future__ import annotations
+
+import atexit
+import csv
+import io
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Set, TextIO
+
+try:  # POSIX
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
+DEFAULT_MAX_ROWS = 500
+DEFAULT_FLUSH_INTERVAL = 2.0
+
+# Strong references: an appender dropped without close() must not take its
+# pending rows with it.
+_open_appenders: "Set[BufferedCSVAppender]" = set()
+_registry_lock = threading.Lock()
+
+
+@contextmanager
+def _locked(f: TextIO) -> Iterator[None]:
+    """Hold an exclusive lock on ``f`` for the duration of the block."""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return
+    # msvcrt locks a byte range from the current position; every writer
+    # locks the first byte so they exclude each other.
+    f.seek(0)
+    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+    try:
+        f.seek(0, os.SEEK_END)
+        yield
+    finally:
+        f.flush()
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class BufferedCSVAppender:
+    """Append rows to ``path`` in locked batches, writing ``header`` once."""
+
+    def __init__(self, path: str, header: Optional[Sequence[str]] = None,
+                 max_rows: int = DEFAULT_MAX_ROWS,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.path = path
+        self.header = list(header) if header else None
+        self.max_rows = max(1, max_rows)
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.rows_written = 0
+        self._pending: List[Sequence[object]] = []
+        self._lock = threading.Lock()
+        self._last_flush = clock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _registry_lock:
+            _open_appenders.add(self)
+
+    @property
+    def pending(self) -> int:
+        """Number of rows buffered but not yet written."""
+        return len(self._pending)
+
+    def append(self, row: Sequence[object]) -> None:
+        """Buffer one row, flushing if a threshold has been reached."""
+        self.extend((row,))
+
+    def extend(self, rows: Iterable[Sequence[object]]) -> None:
+        """Buffer several rows, flushing if a threshold has been reached."""
+        with self._lock:
+            self._pending.extend(rows)
+            if (len(self._pending) >= self.max_rows
+                    or self.clock() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def flush(self) -> int:
+        """Write every buffered row now and return how many were written."""
+        with self._lock:
+            return self._flush_locked()
+
+    def _flush_locked(self) -> int:
+        self._last_flush = self.clock()
+        if not self._pending:
+            return 0
+        rows, self._pending = self._pending, []
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerows(rows)
+        try:
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                with _locked(f):
+                    # Checked under the lock so concurrent writers add it once.
+                    if self.header and os.fstat(f.fileno()).st_size == 0:
+                        header = io.StringIO()
+                        csv.writer(header).writerow(self.header)
+                        f.write(header.getvalue())
+                        print(f"[csv_appender] Writing header to {self.path}")
+                    f.write(buf.getvalue())
+                    f.flush()
+        except OSError:
+            # Keep the batch (ahead of rows buffered since) for the next flush.
+            self._pending = rows + self._pending
+            raise
+        self.rows_written += len(rows)
+        return len(rows)
+
+    def close(self) -> None:
+        """Flush pending rows and stop tracking this appender for exit."""
+        self.flush()
+        with _registry_lock:
+            _open_appenders.discard(self)
+
+    def __enter__(self) -> "BufferedCSVAppender":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+@atexit.register
+def flush_all() -> None:
+    """Flush every open appender; registered to run at interpreter exit."""
+    with _registry_lock:
+        appenders = list(_open_appenders)
+    for appender in appenders:
+        try:
+            appender.flush()
+        except OSError as exc:
+            print(f"[csv_appender] Could not flush {appender.path}: {exc}")
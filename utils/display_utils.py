@@ -65,24 +65,13 @@ def print_banner():
     print()
 
 
-def print_device_table(devices_info: List[DeviceInfo]):
-    """
-    Displays a formatted table of connected Android devices.
+_DEVICE_ROW_FORMAT = "{:<3} {:<16} {:<20} {:<12} {:<13} {:<9} {:<12} {:<10}"
 
-    Args:
-        devices_info (List[DeviceInfo]): List of connected device info objects.
-    """
-    if not devices_info:
-        print_warning("No devices to display.")
-        return
-
-    header_format = (
-        "{:<3} {:<16} {:<20} {:<12} {:<13} {:<9} {:<12} {:<10}"
-    )
-    row_format = header_format
 
+def print_device_table_header() -> None:
+    """Print the column header used by :func:`print_device_table`."""
     print(
-        header_format.format(
+        _DEVICE_ROW_FORMAT.format(
             "No",
             "Serial",
             "Model",
@@ -95,17 +84,38 @@ def print_device_table(devices_info: List[DeviceInfo]):
     )
     print("-" * 100)
 
+
+def print_device_row(idx: int, device: DeviceInfo) -> None:
+    """Print a single device table row, flagging stale entries."""
+    row = _DEVICE_ROW_FORMAT.format(
+        idx,
+        device.serial,
+        device.model[:24],
+        device.manufacturer[:14],
+        device.android_version,
+        device.sdk_version,
+        device.build_number[:11],
+        device.security_patch[:9]
+    )
+    if device.stale:
+        row = _color(f"{row} [stale]", _YELLOW)
+    print(row)
+
+
+def print_device_table(devices_info: List[DeviceInfo]):
+    """
+    Displays a formatted table of connected Android devices.
+
+    Args:
+        devices_info (List[DeviceInfo]): List of connected device info objects.
+    """
+    if not devices_info:
+        print_warning("No devices to display.")
+        return
+
+    print_device_table_header()
     for idx, device in enumerate(devices_info, start=1):
-        print(row_format.format(
-            idx,
-            device.serial,
-            device.model[:24],
-            device.manufacturer[:14],
-            device.android_version,
-            device.sdk_version,
-            device.build_number[:11],
-            device.security_patch[:9]
-        ))
+        print_device_row(idx, device)
 
     print()
 
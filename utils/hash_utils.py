@@ -3,10 +3,18 @@
 from __future__ import annotations
 
 import hashlib
-from typing import Generator
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Generator, Iterable, List, Optional
+
+if TYPE_CHECKING:  # pragma: no cover
+    from database.hash_cache import HashCache
 
 
 _CHUNK_SIZE = 8192
+# Larger reads for bulk hashing of multi-megabyte APKs.
+_BULK_CHUNK_SIZE = 1024 * 1024
 
 
 def _hash_data(data: bytes, algo: str) -> str:
@@ -46,9 +54,14 @@ def _file_chunks(path: str, chunk_size: int = _CHUNK_SIZE) -> Generator[bytes, N
             yield chunk
 
 
-def sha256_of_file(path: str) -> str:
-    """Return the SHA-256 hex digest for the contents of *path*."""
+def sha256_of_file(path: str, cache: Optional["HashCache"] = None) -> str:
+    """Return the SHA-256 hex digest for the contents of *path*.
+
+    With ``cache`` the stored digest is returned while the file's stat is unchanged.
+    """
     print(f"[hash_utils] sha256_of_file: {path}")
+    if cache is not None:
+        return _cached_hashes(path, ("sha256",), cache)["sha256"]
     hasher = hashlib.sha256()
     for chunk in _file_chunks(path):
         hasher.update(chunk)
@@ -57,9 +70,14 @@ def sha256_of_file(path: str) -> str:
     return digest
 
 
-def sha1_of_file(path: str) -> str:
-    """Return the SHA-1 hex digest for the contents of *path*."""
+def sha1_of_file(path: str, cache: Optional["HashCache"] = None) -> str:
+    """Return the SHA-1 hex digest for the contents of *path*.
+
+    With ``cache`` the stored digest is returned while the file's stat is unchanged.
+    """
     print(f"[hash_utils] sha1_of_file: {path}")
+    if cache is not None:
+        return _cached_hashes(path, ("sha1",), cache)["sha1"]
     hasher = hashlib.sha1()
     for chunk in _file_chunks(path):
         hasher.update(chunk)
@@ -68,12 +86,128 @@ def sha1_of_file(path: str) -> str:
     return digest
 
 
-def md5_of_file(path: str) -> str:
-    """Return the MD5 hex digest for the contents of *path*."""
+def md5_of_file(path: str, cache: Optional["HashCache"] = None) -> str:
+    """Return the MD5 hex digest for the contents of *path*.
+
+    With ``cache`` the stored digest is returned while the file's stat is unchanged.
+    """
     print(f"[hash_utils] md5_of_file: {path}")
+    if cache is not None:
+        return _cached_hashes(path, ("md5",), cache)["md5"]
     hasher = hashlib.md5()
     for chunk in _file_chunks(path):
         hasher.update(chunk)
     digest = hasher.hexdigest()
     print(f"[hash_utils] MD5: {digest}")
     return digest
+
+
+class MultiHasher:
+    """Feed one stream of chunks to several digests at once."""
+
+    def __init__(self, algos: Iterable[str] = ("sha256",)) -> None:
+        self._hashers = {algo: hashlib.new(algo) for algo in algos}
+        self.size = 0
+
+    def update(self, chunk: bytes) -> None:
+        for hasher in self._hashers.values():
+            hasher.update(chunk)
+        self.size += len(chunk)
+
+    def hexdigests(self) -> Dict[str, str]:
+        return {algo: hasher.hexdigest() for algo, hasher in self._hashers.items()}
+
+
+def hashes_of_file(path: str, algos: Iterable[str] = ("sha256",),
+                   cache: Optional["HashCache"] = None) -> Dict[str, str]:
+    """Return ``{algo: hex digest}`` for *path* in a single chunked read.
+
+    With ``cache`` the file is only read if a digest is missing for its
+    current stat.
+    """
+    print(f"[hash_utils] hashes_of_file: {path}")
+    if cache is not None:
+        return _cached_hashes(path, algos, cache)
+    hasher = MultiHasher(algos)
+    for chunk in _file_chunks(path, _BULK_CHUNK_SIZE):
+        hasher.update(chunk)
+    digests = hasher.hexdigests()
+    print(f"[hash_utils] Digests: {digests}")
+    return digests
+
+
+def _same_stat(a: os.stat_result, b: os.stat_result) -> bool:
+    return ((a.st_dev, a.st_ino, a.st_size, a.st_mtime_ns)
+            == (b.st_dev, b.st_ino, b.st_size, b.st_mtime_ns))
+
+
+def _cached_hashes(path: str, algos: Iterable[str], cache: "HashCache") -> Dict[str, str]:
+    algos = tuple(algos)
+    st = os.stat(path)
+    digests = cache.lookup(path, st, algos)
+    missing = [algo for algo in algos if algo not in digests]
+    if not missing:
+        print(f"[hash_utils] Cached digests for {path}")
+        return digests
+    started_ns = time.time_ns()
+    hasher = MultiHasher(missing)
+    for chunk in _file_chunks(path, _BULK_CHUNK_SIZE):
+        hasher.update(chunk)
+    fresh = hasher.hexdigests()
+    # Only cache what was read from an unchanged file.
+    if _same_stat(st, os.stat(path)):
+        cache.store(path, st, fresh, started_ns)
+    digests.update(fresh)
+    return {algo: digests[algo] for algo in algos}
+
+
+def _walk_files(root: str, suffixes: Optional[Iterable[str]]) -> List[str]:
+    ends = tuple(s.lower() for s in suffixes) if suffixes else None
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if ends is None or name.lower().endswith(ends):
+                path = os.path.join(dirpath, name)
+                if os.path.isfile(path):
+                    paths.append(path)
+    return paths
+
+
+def hash_tree(root: str, algos: Iterable[str] = ("sha256",),
+              cache: Optional["HashCache"] = None,
+              suffixes: Optional[Iterable[str]] = None,
+              workers: int = 1) -> Dict[str, Dict[str, str]]:
+    """Return ``{path: {algo: hex digest}}`` for every file under *root*.
+
+    ``suffixes`` (e.g. ``(".apk",)``) limits which files are hashed. With
+    ``cache`` only files whose stat changed since they were last hashed are
+    read, so re-indexing an unchanged tree costs one ``stat`` per file.
+    ``workers`` hashes that many files concurrently. Files that vanish or
+    cannot be read during the walk are skipped.
+    """
+    algos = tuple(algos)
+    paths = _walk_files(root, suffixes)
+    print(f"[hash_utils] hash_tree: {len(paths)} file(s) under {root}")
+
+    def one(path: str) -> Optional[Dict[str, str]]:
+        try:
+            if cache is not None:
+                return _cached_hashes(path, algos, cache)
+            return hashes_of_file(path, algos)
+        except OSError as exc:
+            print(f"[hash_utils] Skipping {path}: {exc}")
+            return None
+
+    def run() -> List[Optional[Dict[str, str]]]:
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(one, paths))
+        return [one(path) for path in paths]
+
+    if cache is not None:
+        with cache.batch():
+            results = run()
+    else:
+        results = run()
+    return {path: digests for path, digests in zip(paths, results) if digests is not None}
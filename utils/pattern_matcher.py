@@ -0,0 +1,224 @@
+"""Multi-pattern matching shared by the package and permission scanners.
+
+Three kinds of rule are supported, each matched in time linear in the input
+regardless of how many patterns are loaded:
+
+* exact names, via a dict lookup;
+* prefixes, via :class:`PrefixTrie` (one walk down the trie per input);
+* substrings, via :class:`AhoCorasick` (one pass over the input).
+
+Every pattern carries a value (a category name, a priority, ...) and lookups
+return the values of all matching patterns. :class:`PatternMatcher` combines
+the three behind a single interface.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Any, Dict, Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+_END = ""  # trie key holding the values of patterns ending at that node
+
+
+class PrefixTrie(Generic[V]):
+    """Trie answering "which patterns are a prefix of this text"."""
+
+    def __init__(self, ignore_case: bool = False) -> None:
+        self.ignore_case = ignore_case
+        self._root: Dict[str, Any] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, prefix: str, value: V) -> None:
+        if self.ignore_case:
+            prefix = prefix.lower()
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node.setdefault(_END, []).append(value)
+        self._size += 1
+
+    def iter_matches(self, text: str) -> Iterator[V]:
+        """Yield the values of matching prefixes, shortest prefix first."""
+        if self.ignore_case:
+            text = text.lower()
+        node = self._root
+        if _END in node:
+            yield from node[_END]
+        for char in text:
+            node = node.get(char)
+            if node is None:
+                return
+            values = node.get(_END)
+            if values:
+                yield from values
+
+    def matches(self, text: str) -> List[V]:
+        return list(self.iter_matches(text))
+
+    def has_match(self, text: str) -> bool:
+        return next(self.iter_matches(text), _MISSING) is not _MISSING
+
+
+_MISSING = object()
+
+
+class AhoCorasick(Generic[V]):
+    """Aho–Corasick automaton for finding many substrings in one pass.
+
+    Patterns may be added until the first search, at which point the failure
+    links are built. Adding more patterns afterwards rebuilds them lazily.
+    Searches are safe from several threads: the links are built under a lock
+    and published only once complete. :meth:`add` must not run concurrently
+    with searches.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, V]] = (),
+                 ignore_case: bool = False) -> None:
+        self.ignore_case = ignore_case
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[List[V]] = [[]]
+        # (failure links, output links) once built; None while stale.
+        self._links: Optional[Tuple[List[int], List[int]]] = ([0], [0])
+        self._build_lock = threading.Lock()
+        self._size = 0
+        for pattern, value in patterns:
+            self.add(pattern, value)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, pattern: str, value: V) -> None:
+        if not pattern:
+            raise ValueError("empty substring pattern")
+        if self.ignore_case:
+            pattern = pattern.lower()
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._out.append([])
+            state = nxt
+        self._out[state].append(value)
+        self._size += 1
+        self._links = None
+
+    def _build(self) -> Tuple[List[int], List[int]]:
+        count = len(self._goto)
+        fail_links = [0] * count
+        # Nearest state along the failure chain that has outputs (0 = none).
+        out_links = [0] * count
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = fail_links[state]
+                while fail and char not in self._goto[fail]:
+                    fail = fail_links[fail]
+                target = self._goto[fail].get(char, 0)
+                fail_links[nxt] = target if target != nxt else 0
+                link = fail_links[nxt]
+                out_links[nxt] = link if self._out[link] else out_links[link]
+        return fail_links, out_links
+
+    def _built_links(self) -> Tuple[List[int], List[int]]:
+        links = self._links
+        if links is None:
+            with self._build_lock:
+                links = self._links
+                if links is None:
+                    links = self._links = self._build()
+        return links
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, V]]:
+        """Yield ``(end_index, value)`` for every occurrence of every pattern."""
+        fail, out_link = self._built_links()
+        if self.ignore_case:
+            text = text.lower()
+        goto, out = self._goto, self._out
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            hit = state
+            while hit:
+                for value in out[hit]:
+                    yield index, value
+                hit = out_link[hit]
+
+    def matches(self, text: str) -> List[V]:
+        """Return the distinct values matched in ``text`` in order of first hit."""
+        seen: Dict[Any, None] = {}
+        for _, value in self.iter_matches(text):
+            seen.setdefault(value, None)
+        return list(seen)
+
+    def has_match(self, text: str) -> bool:
+        return next(self.iter_matches(text), _MISSING) is not _MISSING
+
+
+class PatternMatcher(Generic[V]):
+    """Exact, prefix and substring rules behind one lookup."""
+
+    def __init__(self, ignore_case: bool = False) -> None:
+        self.ignore_case = ignore_case
+        self._exact: Dict[str, List[V]] = {}
+        # Patterns and text are folded here, once, rather than in each part.
+        self._prefixes: PrefixTrie[V] = PrefixTrie()
+        self._substrings: AhoCorasick[V] = AhoCorasick()
+
+    @classmethod
+    def from_rules(cls, exact: Iterable[Tuple[str, V]] = (),
+                   prefixes: Iterable[Tuple[str, V]] = (),
+                   substrings: Iterable[Tuple[str, V]] = (),
+                   ignore_case: bool = False) -> "PatternMatcher[V]":
+        matcher: PatternMatcher[V] = cls(ignore_case)
+        for pattern, value in exact:
+            matcher.add_exact(pattern, value)
+        for pattern, value in prefixes:
+            matcher.add_prefix(pattern, value)
+        for pattern, value in substrings:
+            matcher.add_substring(pattern, value)
+        return matcher
+
+    def __len__(self) -> int:
+        exact = sum(len(v) for v in self._exact.values())
+        return exact + len(self._prefixes) + len(self._substrings)
+
+    def _fold(self, text: str) -> str:
+        return text.lower() if self.ignore_case else text
+
+    def add_exact(self, name: str, value: V) -> None:
+        self._exact.setdefault(self._fold(name), []).append(value)
+
+    def add_prefix(self, prefix: str, value: V) -> None:
+        self._prefixes.add(self._fold(prefix), value)
+
+    def add_substring(self, pattern: str, value: V) -> None:
+        self._substrings.add(self._fold(pattern), value)
+
+    def iter_matches(self, text: str) -> Iterator[V]:
+        """Yield the value of every matching rule (duplicates possible)."""
+        text = self._fold(text)
+        yield from self._exact.get(text, ())
+        yield from self._prefixes.iter_matches(text)
+        if len(self._substrings):
+            for _, value in self._substrings.iter_matches(text):
+                yield value
+
+    def matches(self, text: str) -> List[V]:
+        """Return the distinct values of every rule matching ``text``."""
+        return list(dict.fromkeys(self.iter_matches(text)))
+
+    def has_match(self, text: str) -> bool:
+        return next(self.iter_matches(text), _MISSING) is not _MISSING